@@ -0,0 +1,153 @@
+"""Per-session conversation memory with a rolling token budget
+
+Each chat session keeps a running summary plus its most recent turns. Once the
+turns exceed the prompt budget, the oldest ones are folded into the summary in
+the background, so prompt size stays flat however long a chat runs. A hard
+per-session cap trims the oldest turns if summarization falls behind.
+
+State lives in a pluggable store: an in-process LRU or Redis, both with idle
+expiry.
+"""
+
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, List, Optional
+
+def estimate_tokens(text: str) -> int:
+    """Cheap token estimate (~4 characters per token for English/BM text)"""
+    return len(text) // 4 + 1
+
+def _new_state() -> Dict:
+    return {"summary": "", "turns": [], "next_id": 0}
+
+class InMemorySessionStore:
+    def __init__(self, max_sessions: int = 10000, idle_ttl: int = 1800):
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self._sessions: "OrderedDict[str, tuple]" = OrderedDict()
+
+    async def get(self, session_id: str) -> Optional[Dict]:
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            return None
+        last_active, state = entry
+        if time.monotonic() - last_active > self.idle_ttl:
+            del self._sessions[session_id]
+            return None
+        return json.loads(state)
+
+    async def set(self, session_id: str, state: Dict):
+        # Stored serialized so callers never share mutable state
+        self._sessions[session_id] = (time.monotonic(), json.dumps(state))
+        self._sessions.move_to_end(session_id)
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)
+
+    async def delete(self, session_id: str):
+        self._sessions.pop(session_id, None)
+
+class RedisSessionStore:
+    def __init__(self, redis_client, idle_ttl: int = 1800, key_prefix: str = "hrms:chat:"):
+        self.redis_client = redis_client
+        self.idle_ttl = idle_ttl
+        self.key_prefix = key_prefix
+
+    async def get(self, session_id: str) -> Optional[Dict]:
+        raw = await asyncio.to_thread(self.redis_client.get, self.key_prefix + session_id)
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, session_id: str, state: Dict):
+        # SETEX refreshes the idle expiry on every turn
+        await asyncio.to_thread(self.redis_client.setex, self.key_prefix + session_id, self.idle_ttl, json.dumps(state))
+
+    async def delete(self, session_id: str):
+        await asyncio.to_thread(self.redis_client.delete, self.key_prefix + session_id)
+
+Summarizer = Callable[[str, List[Dict]], Awaitable[str]]
+
+class ConversationMemoryManager:
+    def __init__(self, store=None, summarize_fn: Optional[Summarizer] = None,
+                 prompt_token_budget: int = 1500, max_session_tokens: int = 4000,
+                 keep_recent_turns: int = 4):
+        self.store = store or InMemorySessionStore()
+        self.summarize_fn = summarize_fn
+        self.prompt_token_budget = prompt_token_budget
+        self.max_session_tokens = max_session_tokens
+        self.keep_recent_turns = keep_recent_turns
+        # Striped locks keep lock count bounded regardless of session count
+        self._locks = [asyncio.Lock() for _ in range(64)]
+        self._summarizing: Dict[str, asyncio.Task] = {}
+
+    def _lock(self, session_id: str) -> asyncio.Lock:
+        return self._locks[hash(session_id) % len(self._locks)]
+
+    @staticmethod
+    def _turn_tokens(state: Dict) -> int:
+        return sum(turn["tokens"] for turn in state["turns"])
+
+    async def history(self, session_id: str) -> List[Dict]:
+        """Messages to prepend to the next prompt: summary, then recent turns"""
+        state = await self.store.get(session_id) or _new_state()
+        messages = []
+        if state["summary"]:
+            messages.append({"role": "system", "content": f"Summary of the conversation so far: {state['summary']}"})
+        messages += [{"role": turn["role"], "content": turn["content"]} for turn in state["turns"]]
+        return messages
+
+    async def append(self, session_id: str, user_message: str, assistant_message: str):
+        """Record a completed turn and schedule summarization when over budget"""
+        async with self._lock(session_id):
+            state = await self.store.get(session_id) or _new_state()
+            for role, content in (("user", user_message), ("assistant", assistant_message)):
+                state["turns"].append({
+                    "id": state["next_id"],
+                    "role": role,
+                    "content": content,
+                    "tokens": estimate_tokens(content)
+                })
+                state["next_id"] += 1
+
+            # Hard cap: never let one session grow without bound
+            while self._turn_tokens(state) + estimate_tokens(state["summary"]) > self.max_session_tokens \
+                    and len(state["turns"]) > 2:
+                state["turns"].pop(0)
+
+            await self.store.set(session_id, state)
+            over_budget = self._turn_tokens(state) > self.prompt_token_budget
+
+        if over_budget and self.summarize_fn and session_id not in self._summarizing:
+            task = asyncio.create_task(self._summarize(session_id))
+            self._summarizing[session_id] = task
+            task.add_done_callback(lambda _: self._summarizing.pop(session_id, None))
+
+    async def _summarize(self, session_id: str):
+        state = await self.store.get(session_id)
+        if not state or len(state["turns"]) <= self.keep_recent_turns:
+            return
+        to_fold = state["turns"][:-self.keep_recent_turns]
+        try:
+            summary = await self.summarize_fn(state["summary"], to_fold)
+        except Exception:
+            # Keep the raw turns; the hard cap still bounds the session
+            return
+        last_folded = to_fold[-1]["id"]
+
+        async with self._lock(session_id):
+            # Turns may have arrived (or been trimmed) while the LLM was busy
+            current = await self.store.get(session_id)
+            if current is None:
+                return
+            current["summary"] = summary
+            current["turns"] = [turn for turn in current["turns"] if turn["id"] > last_folded]
+            await self.store.set(session_id, current)
+
+    async def wait_idle(self, session_id: str):
+        """Wait for any background summarization of a session to finish"""
+        task = self._summarizing.get(session_id)
+        if task:
+            await asyncio.gather(task, return_exceptions=True)
+
+    async def clear(self, session_id: str):
+        await self.store.delete(session_id)
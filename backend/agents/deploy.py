@@ -8,14 +8,14 @@ import argparse
 import grpc
 from concurrent import futures
 import time
-from langchain_openai import ChatOpenAI
 from langchain.agents import create_openai_functions_agent, AgentExecutor
 from langchain.tools import Tool
 from langchain.prompts import ChatPromptTemplate
+from core.llm_backends import get_chat_model
 
 class ComplianceBot:
     def __init__(self):
-        self.llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0)
+        self.llm = get_chat_model(model="gpt-3.5-turbo", temperature=0)
         self.agent = self._create_agent()
     
     def _create_agent(self):
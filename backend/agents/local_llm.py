@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Deterministic local stand-in for the OpenAI chat-completions API
+Usage: python -m agents.local_llm --port=8081 --latency-ms=250 --tokens-per-second=40
+
+Point the agents at it with HRMS_LLM_BACKEND=local. Completions are derived
+from a hash of the request, so the same prompt always produces the same
+answer, and timing follows the configured first-token latency and token rate.
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import time
+from typing import Dict, List, Optional
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+
+VOCABULARY = [
+    "EPF", "SOCSO", "EIS", "PCB", "HRDF", "employee", "employer", "salary",
+    "contribution", "leave", "policy", "Employment Act", "probation", "notice",
+    "payroll", "allowance", "overtime", "compliance", "claim", "training",
+    "interview", "candidate", "feedback", "workload", "manager", "review",
+    "the", "is", "for", "and", "per", "month", "with", "under", "required",
+    "sila", "rujuk", "dasar", "syarikat", "pekerja", "gaji", "cuti",
+]
+
+class LocalLLMConfig:
+    def __init__(self, latency_ms: float = 200, tokens_per_second: float = 50,
+                 completion_tokens: int = 64, jitter_ms: float = 0):
+        self.latency_ms = latency_ms
+        self.tokens_per_second = tokens_per_second
+        self.completion_tokens = completion_tokens
+        self.jitter_ms = jitter_ms
+
+def _request_seed(model: str, messages: List[Dict]) -> int:
+    payload = json.dumps({"model": model, "messages": messages}, sort_keys=True, default=str)
+    return int(hashlib.sha256(payload.encode()).hexdigest()[:16], 16)
+
+def generate_tokens(model: str, messages: List[Dict], max_tokens: Optional[int], config: LocalLLMConfig) -> List[str]:
+    """Deterministically generate completion tokens for a request"""
+    rng = random.Random(_request_seed(model, messages))
+    count = config.completion_tokens
+    if max_tokens:
+        count = min(count, max_tokens)
+    tokens = [rng.choice(VOCABULARY) for _ in range(count)]
+    return [token if i == 0 else f" {token}" for i, token in enumerate(tokens)]
+
+def first_token_delay(model: str, messages: List[Dict], config: LocalLLMConfig) -> float:
+    """First-token latency in seconds, with seeded jitter so runs repeat exactly"""
+    jitter = 0.0
+    if config.jitter_ms:
+        jitter = random.Random(_request_seed(model, messages) ^ 0x5EED).uniform(0, config.jitter_ms)
+    return (config.latency_ms + jitter) / 1000
+
+def _prompt_tokens(messages: List[Dict]) -> int:
+    return sum(len(str(m.get("content") or "").split()) for m in messages)
+
+def create_app(config: Optional[LocalLLMConfig] = None) -> FastAPI:
+    config = config or LocalLLMConfig()
+    app = FastAPI(title="HRMS Local LLM Stand-in")
+
+    @app.get("/v1/models")
+    async def list_models():
+        return {"object": "list", "data": [{"id": "local-stand-in", "object": "model", "owned_by": "hrms"}]}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(body: Dict):
+        model = body.get("model", "local-stand-in")
+        messages = body.get("messages", [])
+        tokens = generate_tokens(model, messages, body.get("max_tokens"), config)
+        completion_id = f"chatcmpl-{_request_seed(model, messages):016x}"
+        created = int(time.time())
+        token_interval = 1 / config.tokens_per_second if config.tokens_per_second else 0
+        usage = {
+            "prompt_tokens": _prompt_tokens(messages),
+            "completion_tokens": len(tokens),
+            "total_tokens": _prompt_tokens(messages) + len(tokens)
+        }
+
+        if body.get("stream"):
+            async def event_stream():
+                await asyncio.sleep(first_token_delay(model, messages, config))
+                for i, token in enumerate(tokens):
+                    if i:
+                        await asyncio.sleep(token_interval)
+                    delta = {"content": token}
+                    if i == 0:
+                        delta["role"] = "assistant"
+                    chunk = {
+                        "id": completion_id,
+                        "object": "chat.completion.chunk",
+                        "created": created,
+                        "model": model,
+                        "choices": [{"index": 0, "delta": delta, "finish_reason": None}]
+                    }
+                    yield f"data: {json.dumps(chunk)}\n\n"
+                final = {
+                    "id": completion_id,
+                    "object": "chat.completion.chunk",
+                    "created": created,
+                    "model": model,
+                    "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]
+                }
+                yield f"data: {json.dumps(final)}\n\n"
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+        await asyncio.sleep(first_token_delay(model, messages, config) + token_interval * max(len(tokens) - 1, 0))
+        return {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": created,
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": "".join(tokens)},
+                "finish_reason": "stop"
+            }],
+            "usage": usage
+        }
+
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the local LLM stand-in server")
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address")
+    parser.add_argument("--port", type=int, default=8081, help="Port number")
+    parser.add_argument("--latency-ms", type=float, default=200, help="Time to first token")
+    parser.add_argument("--tokens-per-second", type=float, default=50, help="Token generation rate")
+    parser.add_argument("--completion-tokens", type=int, default=64, help="Tokens per completion")
+    parser.add_argument("--jitter-ms", type=float, default=0, help="Max seeded extra first-token latency")
+
+    args = parser.parse_args()
+
+    import uvicorn
+    config = LocalLLMConfig(args.latency_ms, args.tokens_per_second, args.completion_tokens, args.jitter_ms)
+    print(f"🧪 Local LLM stand-in on http://{args.host}:{args.port}/v1")
+    uvicorn.run(create_app(config), host=args.host, port=args.port)
+
+if __name__ == "__main__":
+    main()
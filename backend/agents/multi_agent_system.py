@@ -1,22 +1,48 @@
 from langchain.agents import AgentExecutor, create_openai_functions_agent
 from langchain.tools import Tool
-from langchain_openai import ChatOpenAI
 from langchain.prompts import ChatPromptTemplate
 from langchain.memory import ConversationBufferMemory, ConversationSummaryBufferMemory
 from langchain.callbacks import AsyncCallbackManager
 from langchain.cache import InMemoryCache
-from typing import Dict, List, Optional
+from typing import AsyncIterator, Dict, List, Optional
 import asyncio
+import contextlib
 import json
+import hashlib
 from datetime import datetime, timedelta
 from functools import lru_cache
 import redis
 from core.malaysian_compliance import MalaysianCompliance
+from core.llm_backends import get_chat_model
+from agents.response_cache import AgentResponseCache
+from agents.router import AgentRouter
+from agents.conversation_memory import ConversationMemoryManager, InMemorySessionStore, RedisSessionStore
+from agents.scheduler import AgentScheduler, AGENT_PRIORITIES, PRIORITY_NORMAL
+from monitoring.metrics import track_agent_queue_depth, track_agent_queue_wait
+
+# Bump when agent behaviour changes in ways the prompt/tool fingerprint can't see
+PROMPT_VERSION = "1"
+
+# Tools with side effects: a run that used one is never served from the cache
+ACTION_TOOLS = {"schedule_interview", "generate_payslip"}
+
+_default_scheduler: Optional[AgentScheduler] = None
+
+def get_default_scheduler() -> AgentScheduler:
+    """Process-wide scheduler, so every agent shares one provider concurrency limit"""
+    global _default_scheduler
+    if _default_scheduler is None:
+        _default_scheduler = AgentScheduler(
+            max_concurrency=8,
+            on_dispatch=track_agent_queue_wait,
+            on_queue_change=track_agent_queue_depth
+        )
+    return _default_scheduler
 
 class HRMultiAgentSystem:
-    def __init__(self, redis_url: Optional[str] = None):
+    def __init__(self, redis_url: Optional[str] = None, scheduler: Optional[AgentScheduler] = None):
         # Initialize with better models and caching
-        self.llm = ChatOpenAI(
+        self.llm = get_chat_model(
             model="gpt-4o-mini",  # Better performance/cost ratio
             temperature=0.1,
             max_tokens=2000,
@@ -26,11 +52,17 @@ class HRMultiAgentSystem:
         # Redis cache for agent responses
         self.redis_client = redis.from_url(redis_url) if redis_url else None
         self.cache_ttl = 3600  # 1 hour
+        self.response_cache = AgentResponseCache(self.redis_client, ttl=self.cache_ttl)
+        
+        # Bounded, prioritised access to the LLM provider
+        self.scheduler = scheduler or get_default_scheduler()
         
         # Malaysian compliance integration
         self.compliance = MalaysianCompliance()
         
+        self.router = AgentRouter()
         self.agents = {}
+        self.agent_versions = {}
         self.agent_metrics = {}
         self._initialize_agents()
     
@@ -100,11 +132,20 @@ class HRMultiAgentSystem:
             ("placeholder", "{agent_scratchpad}")
         ])
         
+        # Cache entries are only valid for the prompt and toolset that produced them
+        fingerprint = "|".join([PROMPT_VERSION, prompts[agent_type]] + [f"{t.name}:{t.description}" for t in tools])
+        self.agent_versions[agent_type] = hashlib.sha256(fingerprint.encode()).hexdigest()[:16]
+        
         agent = create_openai_functions_agent(self.llm, tools, prompt)
-        return AgentExecutor(agent=agent, tools=tools, verbose=True)
+        return AgentExecutor(agent=agent, tools=tools, verbose=True, return_intermediate_steps=True)
     
-    async def process_hr_request(self, request: str, agent_type: str = "auto") -> Dict:
-        """Process HR request using appropriate agent"""
+    async def process_hr_request(self, request: str, agent_type: str = "auto", priority: Optional[int] = None,
+                                 use_cache: bool = True) -> Dict:
+        """Process HR request using appropriate agent
+        
+        use_cache=False always runs the agent; runs that call an action tool
+        are never cached either way.
+        """
         
         if agent_type == "auto":
             agent_type = self._determine_agent_type(request)
@@ -112,12 +153,35 @@ class HRMultiAgentSystem:
         if agent_type not in self.agents:
             return {"error": f"Unknown agent type: {agent_type}"}
         
+        cache_key = self.response_cache.make_key(agent_type, request, self.agent_versions[agent_type])
+        
+        if priority is None:
+            priority = AGENT_PRIORITIES.get(agent_type, PRIORITY_NORMAL)
+        
+        actions_taken = set()
+        
+        async def invoke_agent():
+            # The response cache already coalesces identical requests
+            result = await self.scheduler.submit(
+                lambda: self.agents[agent_type].ainvoke({"input": request}),
+                priority=priority,
+                agent=agent_type
+            )
+            actions_taken.update(action.tool for action, _ in result.get("intermediate_steps", [])
+                                 if action.tool in ACTION_TOOLS)
+            return result["output"]
+        
         try:
-            result = await self.agents[agent_type].ainvoke({"input": request})
+            if use_cache:
+                output, cached = await self.response_cache.get_or_compute(
+                    cache_key, invoke_agent, cacheable=lambda _: not actions_taken)
+            else:
+                output, cached = await invoke_agent(), False
             return {
                 "agent": agent_type,
-                "response": result["output"],
-                "success": True
+                "response": output,
+                "success": True,
+                "cached": cached
             }
         except Exception as e:
             return {
@@ -126,18 +190,64 @@ class HRMultiAgentSystem:
                 "success": False
             }
     
-    def _determine_agent_type(self, request: str) -> str:
-        """Determine which agent should handle the request"""
-        request_lower = request.lower()
+    async def stream_hr_request(self, request: str, agent_type: str = "auto", priority: Optional[int] = None,
+                                use_cache: bool = True) -> AsyncIterator[Dict]:
+        """Stream tool progress and response tokens as they are produced
+        
+        Closing the iterator (client disconnect) cancels the agent run, which
+        closes the upstream LLM stream and stops generation.
+        """
+        if agent_type == "auto":
+            agent_type = self._determine_agent_type(request)
+        
+        if agent_type not in self.agents:
+            yield {"event": "error", "error": f"Unknown agent type: {agent_type}"}
+            return
         
-        if any(word in request_lower for word in ['hire', 'recruit', 'interview', 'resume', 'candidate']):
-            return "recruitment"
-        elif any(word in request_lower for word in ['salary', 'payroll', 'epf', 'socso', 'pay']):
-            return "payroll"
-        elif any(word in request_lower for word in ['feedback', 'sentiment', 'employee', 'satisfaction']):
-            return "employee_relations"
+        yield {"event": "agent", "agent": agent_type}
         
-        return "employee_relations"  # Default
+        cache_key = self.response_cache.make_key(agent_type, request, self.agent_versions[agent_type])
+        cached = await self.response_cache.get(cache_key) if use_cache else None
+        if cached is not None:
+            yield {"event": "token", "content": cached}
+            yield {"event": "done", "agent": agent_type, "response": cached, "cached": True}
+            return
+        
+        if priority is None:
+            priority = AGENT_PRIORITIES.get(agent_type, PRIORITY_NORMAL)
+        
+        tokens = []
+        output = None
+        acted = False
+        try:
+            events = self.agents[agent_type].astream_events({"input": request}, version="v2")
+            async with self.scheduler.slot(priority, agent_type), contextlib.aclosing(events):
+                async for event in events:
+                    kind = event["event"]
+                    if kind == "on_chat_model_stream":
+                        content = event["data"]["chunk"].content
+                        if content:
+                            tokens.append(content)
+                            yield {"event": "token", "content": content}
+                    elif kind == "on_tool_start":
+                        acted = acted or event["name"] in ACTION_TOOLS
+                        yield {"event": "tool_start", "tool": event["name"], "input": event["data"].get("input")}
+                    elif kind == "on_tool_end":
+                        yield {"event": "tool_end", "tool": event["name"], "output": str(event["data"].get("output"))}
+                    elif kind == "on_chain_end" and event["name"] == "AgentExecutor":
+                        output = event["data"]["output"]["output"]
+        except Exception as e:
+            yield {"event": "error", "agent": agent_type, "error": str(e)}
+            return
+        
+        output = output if output is not None else "".join(tokens)
+        if use_cache and not acted:
+            await self.response_cache.set(cache_key, output)
+        yield {"event": "done", "agent": agent_type, "response": output, "cached": False}
+    
+    def _determine_agent_type(self, request: str) -> str:
+        """Determine which agent should handle the request"""
+        return self.router.route(request).agent
     
     def _screen_resume(self, resume_text: str) -> str:
         """Screen resume for job requirements"""
@@ -181,13 +291,28 @@ class HRMultiAgentSystem:
         return "Suggested interventions: Continue positive engagement, recognize good performance"
 
 class ConversationalHRAgent:
-    def __init__(self):
-        self.llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0.7)
-        self.memory = ConversationBufferMemory(return_messages=True)
-        
-    async def chat(self, message: str, context: Dict = None) -> str:
-        """Conversational HR assistant"""
+    def __init__(self, scheduler: Optional[AgentScheduler] = None, redis_url: Optional[str] = None):
+        self.llm = get_chat_model(model="gpt-3.5-turbo", temperature=0.7)
+        self.scheduler = scheduler or get_default_scheduler()
         
+        # Per-session history with a rolling token budget (30 min idle expiry)
+        store = RedisSessionStore(redis.from_url(redis_url)) if redis_url else InMemorySessionStore()
+        self.memory = ConversationMemoryManager(store, summarize_fn=self._summarize_turns)
+    
+    async def _summarize_turns(self, summary: str, turns: List[Dict]) -> str:
+        """Fold older turns into the running summary"""
+        transcript = "\n".join(f"{turn['role']}: {turn['content']}" for turn in turns)
+        response = await self.scheduler.submit(
+            lambda: self.llm.ainvoke([
+                {"role": "system", "content": "Summarize this HR chat in under 120 words. Keep names, figures, dates and open questions."},
+                {"role": "user", "content": f"Existing summary: {summary or 'none'}\n\nNew turns:\n{transcript}"}
+            ]),
+            priority=AGENT_PRIORITIES["conversational"],
+            agent="conversational"
+        )
+        return response.content
+    
+    def _build_messages(self, message: str, context: Dict = None, history: List[Dict] = None) -> List[Dict]:
         system_prompt = """You are CikguHR, a friendly Malaysian HR assistant. 
         You help with HR queries in English, Bahasa Malaysia, and basic Mandarin.
         You understand Malaysian workplace culture, EPF, SOCSO, and local labor laws.
@@ -197,9 +322,40 @@ class ConversationalHRAgent:
         if context:
             system_prompt += f"\nContext: {context}"
         
-        response = await self.llm.ainvoke([
+        return [
             {"role": "system", "content": system_prompt},
+            *(history or []),
             {"role": "user", "content": message}
-        ])
+        ]
+    
+    async def chat(self, message: str, context: Dict = None, session_id: Optional[str] = None) -> str:
+        """Conversational HR assistant"""
+        history = await self.memory.history(session_id) if session_id else None
+        messages = self._build_messages(message, context, history)
+        key = hashlib.sha256(json.dumps(messages, sort_keys=True, default=str).encode()).hexdigest()
+        response = await self.scheduler.submit(
+            lambda: self.llm.ainvoke(messages),
+            priority=AGENT_PRIORITIES["conversational"],
+            agent="conversational",
+            key=key
+        )
+        
+        if session_id:
+            await self.memory.append(session_id, message, response.content)
+        return response.content
+    
+    async def stream_chat(self, message: str, context: Dict = None, session_id: Optional[str] = None) -> AsyncIterator[str]:
+        """Yield response tokens as the model produces them"""
+        history = await self.memory.history(session_id) if session_id else None
+        messages = self._build_messages(message, context, history)
+        tokens = []
+        chunks = self.llm.astream(messages)
+        async with self.scheduler.slot(AGENT_PRIORITIES["conversational"], "conversational"), contextlib.aclosing(chunks):
+            async for chunk in chunks:
+                if chunk.content:
+                    tokens.append(chunk.content)
+                    yield chunk.content
         
-        return response.content
\ No newline at end of file
+        # Abandoned streams never reach here, so partial answers stay out of history
+        if session_id:
+            await self.memory.append(session_id, message, "".join(tokens))
\ No newline at end of file
@@ -2,14 +2,14 @@ from langchain.vectorstores import FAISS
 from langchain.embeddings import HuggingFaceEmbeddings
 from langchain.text_splitter import RecursiveCharacterTextSplitter
 from langchain.chains import RetrievalQA
-from langchain_openai import ChatOpenAI
 from typing import List, Dict
 import os
+from core.llm_backends import get_chat_model
 
 class HRKnowledgeRAG:
     def __init__(self):
         self.embeddings = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
-        self.llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0)
+        self.llm = get_chat_model(model="gpt-3.5-turbo", temperature=0)
         self.vectorstore = None
         self.qa_chain = None
         self._initialize_knowledge_base()
@@ -133,7 +133,7 @@ class HRKnowledgeRAG:
 class SmartHRAssistant:
     def __init__(self):
         self.rag_system = HRKnowledgeRAG()
-        self.llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0.3)
+        self.llm = get_chat_model(model="gpt-3.5-turbo", temperature=0.3)
     
     async def process_query(self, query: str, context: Dict = None) -> Dict:
         """Process HR query with RAG and context"""
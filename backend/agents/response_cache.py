@@ -0,0 +1,132 @@
+"""Two-tier response cache for HR agents
+
+Tier one is an in-process LRU, tier two is Redis (shared across workers).
+Concurrent misses on the same key share one in-flight computation, so a burst
+of identical month-end payroll questions costs a single agent round trip.
+"""
+
+import asyncio
+import hashlib
+import json
+import re
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Optional, Tuple
+
+class AgentResponseCache:
+    def __init__(self, redis_client=None, max_entries: int = 1024, ttl: int = 3600,
+                 key_prefix: str = "hrms:agent:"):
+        self.redis_client = redis_client
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.key_prefix = key_prefix
+        self._local: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.stats = {"local_hits": 0, "redis_hits": 0, "misses": 0, "coalesced": 0}
+
+    @staticmethod
+    def normalize_request(request: str) -> str:
+        """Collapse case, whitespace and trailing punctuation so trivial variants share a key"""
+        return re.sub(r"\s+", " ", request.strip().lower()).rstrip("?!. ")
+
+    def make_key(self, agent_type: str, request: str, version: str) -> str:
+        """Key by agent type, normalized request and tool/prompt version"""
+        digest = hashlib.sha256(
+            f"{agent_type}\x00{version}\x00{self.normalize_request(request)}".encode()
+        ).hexdigest()
+        return f"{self.key_prefix}{agent_type}:{digest}"
+
+    def _get_local(self, key: str) -> Optional[Any]:
+        entry = self._local.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._local[key]
+            return None
+        self._local.move_to_end(key)
+        return value
+
+    def _set_local(self, key: str, value: Any):
+        self._local[key] = (time.monotonic() + self.ttl, value)
+        self._local.move_to_end(key)
+        while len(self._local) > self.max_entries:
+            self._local.popitem(last=False)
+
+    async def _get_redis(self, key: str) -> Optional[Any]:
+        if not self.redis_client:
+            return None
+        try:
+            raw = await asyncio.to_thread(self.redis_client.get, key)
+        except Exception:
+            # Redis is an optimisation; never fail a request because it is down
+            return None
+        return json.loads(raw) if raw is not None else None
+
+    async def _set_redis(self, key: str, value: Any):
+        if not self.redis_client:
+            return
+        try:
+            await asyncio.to_thread(self.redis_client.setex, key, self.ttl, json.dumps(value, default=str))
+        except Exception:
+            pass
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = self._get_local(key)
+        if value is not None:
+            self.stats["local_hits"] += 1
+            return value
+        value = await self._get_redis(key)
+        if value is not None:
+            self.stats["redis_hits"] += 1
+            self._set_local(key, value)
+        return value
+
+    async def set(self, key: str, value: Any):
+        self._set_local(key, value)
+        await self._set_redis(key, value)
+
+    async def _compute_and_set(self, key: str, compute: Callable[[], Awaitable[Any]],
+                               cacheable: Optional[Callable[[Any], bool]]) -> Any:
+        value = await compute()
+        if cacheable is None or cacheable(value):
+            await self.set(key, value)
+        return value
+
+    def _computation_done(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved when every caller has gone
+
+    async def get_or_compute(self, key: str, compute: Callable[[], Awaitable[Any]],
+                             cacheable: Optional[Callable[[Any], bool]] = None) -> Tuple[Any, bool]:
+        """Return (value, cached). Identical concurrent misses await one shared computation.
+
+        The computation runs as its own task, so a cancelled caller (the first
+        one included) leaves it running for everyone else still waiting.
+        Failures reach every waiter and nothing is cached; neither is a value
+        cacheable(value) rejects.
+        """
+        value = await self.get(key)
+        if value is not None:
+            return value, True
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.stats["coalesced"] += 1
+            return await asyncio.shield(inflight), True
+
+        self.stats["misses"] += 1
+        task = asyncio.get_running_loop().create_task(self._compute_and_set(key, compute, cacheable))
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._computation_done(key, done))
+        return await asyncio.shield(task), False
+
+    def invalidate(self, key: str):
+        self._local.pop(key, None)
+        if self.redis_client:
+            try:
+                self.redis_client.delete(key)
+            except Exception:
+                pass
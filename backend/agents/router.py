@@ -0,0 +1,130 @@
+"""Embedding-based request router for HR agents
+
+Requests are embedded and compared against precomputed per-agent centroid
+vectors. Unambiguous whole-word keyword hits skip the embedding entirely, and
+low-confidence requests fall back to the default agent.
+
+The default embedder hashes word and character n-grams into a fixed-size
+vector: no model download, deterministic, and well under a millisecond per
+request. A sentence-transformers model can be plugged in via embed_fn.
+"""
+
+import re
+import zlib
+from functools import lru_cache
+from typing import Callable, Dict, List, NamedTuple, Optional
+import numpy as np
+
+AGENT_KEYWORDS = {
+    "recruitment": ["hire", "hiring", "recruit", "recruitment", "interview", "resume", "cv", "candidate", "vacancy", "temuduga", "calon"],
+    "payroll": ["salary", "payroll", "payslip", "epf", "kwsp", "socso", "perkeso", "eis", "pcb", "gaji", "bonus", "overtime"],
+    "employee_relations": ["feedback", "sentiment", "satisfaction", "morale", "grievance", "burnout", "conflict", "harassment"]
+}
+
+AGENT_EXAMPLES = {
+    "recruitment": [
+        "We need to hire a software engineer for the KL office",
+        "Screen these resumes for the finance analyst role",
+        "Schedule an interview with the shortlisted candidate next week",
+        "How do we attract fresh graduates from UM and USM",
+        "Write a job posting for a marketing executive vacancy",
+        "Saya nak tahu status temuduga calon untuk jawatan kerani",
+        "How do I apply for the open position"
+    ],
+    "payroll": [
+        "Calculate the EPF and SOCSO contribution for RM5000 salary",
+        "When will this month's pay be credited to my account",
+        "Why is my PCB deduction higher this month",
+        "Generate payslips for all staff for March",
+        "How is overtime pay computed under the Employment Act",
+        "Berapa potongan KWSP untuk gaji saya bulan ini"
+    ],
+    "employee_relations": [
+        "Analyze the feedback from the latest engagement survey",
+        "An employee complained about unfair treatment by their manager",
+        "Team morale is low after the restructuring, what should we do",
+        "What is the company policy on flexible working arrangements",
+        "How do we handle a grievance between two colleagues",
+        "Pekerja rasa tak puas hati dengan beban kerja",
+        "My supervisor keeps shouting at me in front of the team",
+        "Staff are stressed and overworked this quarter"
+    ]
+}
+
+class RouteDecision(NamedTuple):
+    agent: str
+    confidence: float
+    method: str  # keyword, embedding, fallback
+
+def _features(text: str) -> List[str]:
+    words = re.findall(r"\w+", text.lower())
+    features = [f"w:{w}" for w in words]
+    features += [f"b:{a}_{b}" for a, b in zip(words, words[1:])]
+    for w in words:
+        padded = f"<{w}>"
+        features += [f"c:{padded[i:i + 3]}" for i in range(len(padded) - 2)]
+    return features
+
+class HashingEmbedder:
+    """Signed feature-hashing embedder over word and character n-grams"""
+
+    def __init__(self, dims: int = 512):
+        self.dims = dims
+
+    def __call__(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dims, dtype=np.float32)
+        for feature in _features(text):
+            h = zlib.crc32(feature.encode())
+            vector[h % self.dims] += 1.0 if (h >> 31) & 1 else -1.0
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+def sentence_transformer_embedder(model_name: str = "all-MiniLM-L6-v2") -> Callable[[str], np.ndarray]:
+    """Use a sentence-transformers model instead of feature hashing"""
+    from sentence_transformers import SentenceTransformer
+    model = SentenceTransformer(model_name)
+    return lambda text: model.encode(text, normalize_embeddings=True)
+
+class AgentRouter:
+    def __init__(self, embed_fn: Optional[Callable[[str], np.ndarray]] = None,
+                 threshold: float = 0.15, default_agent: str = "employee_relations",
+                 examples: Dict[str, List[str]] = None, keywords: Dict[str, List[str]] = None,
+                 cache_size: int = 4096):
+        self.threshold = threshold
+        self.default_agent = default_agent
+        self._embed_uncached = embed_fn or HashingEmbedder()
+        # Repeated questions (month-end payroll) skip re-embedding entirely
+        self._embed = lru_cache(maxsize=cache_size)(self._embed_uncached)
+
+        keywords = keywords or AGENT_KEYWORDS
+        self._keyword_patterns = {
+            agent: re.compile(r"\b(?:" + "|".join(re.escape(k) for k in words) + r")\b", re.IGNORECASE)
+            for agent, words in keywords.items()
+        }
+
+        examples = examples or AGENT_EXAMPLES
+        self.agents = list(examples)
+        centroids = []
+        for agent in self.agents:
+            centroid = np.mean([self._embed_uncached(text) for text in examples[agent]], axis=0)
+            centroids.append(centroid / (np.linalg.norm(centroid) or 1.0))
+        self._centroids = np.vstack(centroids).astype(np.float32)
+
+    def _keyword_match(self, request: str) -> Optional[str]:
+        hits = [agent for agent, pattern in self._keyword_patterns.items() if pattern.search(request)]
+        # Only trust the fast path when exactly one agent claims the request
+        return hits[0] if len(hits) == 1 else None
+
+    def route(self, request: str) -> RouteDecision:
+        """Pick the agent for a request"""
+        agent = self._keyword_match(request)
+        if agent:
+            return RouteDecision(agent, 1.0, "keyword")
+
+        normalized = " ".join(request.lower().split())
+        scores = self._centroids @ self._embed(normalized)
+        best = int(np.argmax(scores))
+        confidence = float(scores[best])
+        if confidence < self.threshold:
+            return RouteDecision(self.default_agent, confidence, "fallback")
+        return RouteDecision(self.agents[best], confidence, "embedding")
@@ -0,0 +1,193 @@
+"""Concurrency-limited scheduler for agent LLM calls
+
+All agents share one provider rate limit, so calls go through a single
+scheduler: a bounded number run at once, the rest wait in a priority queue
+(payroll ahead of chit-chat), identical in-flight requests are coalesced, and
+429 responses shrink the concurrency limit and back off before retrying.
+"""
+
+import asyncio
+import contextlib
+import heapq
+import itertools
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# Lower runs first
+PRIORITY_PAYROLL = 0
+PRIORITY_HIGH = 1
+PRIORITY_NORMAL = 2
+PRIORITY_CHAT = 3
+
+AGENT_PRIORITIES = {
+    "payroll": PRIORITY_PAYROLL,
+    "recruitment": PRIORITY_HIGH,
+    "employee_relations": PRIORITY_NORMAL,
+    "conversational": PRIORITY_CHAT
+}
+
+def is_rate_limited(error: Exception) -> bool:
+    """Detect provider 429s across openai/httpx exception shapes"""
+    if type(error).__name__ == "RateLimitError":
+        return True
+    if getattr(error, "status_code", None) == 429:
+        return True
+    response = getattr(error, "response", None)
+    return getattr(response, "status_code", None) == 429
+
+def _retry_after(error: Exception) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+class AgentScheduler:
+    def __init__(self, max_concurrency: int = 8, max_retries: int = 3, base_backoff: float = 0.5,
+                 max_backoff: float = 20.0,
+                 on_dispatch: Optional[Callable[[str, float], None]] = None,
+                 on_queue_change: Optional[Callable[[str, int], None]] = None):
+        self.max_concurrency = max_concurrency
+        self.limit = max_concurrency
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.on_dispatch = on_dispatch
+        self.on_queue_change = on_queue_change
+        self._queued: Dict[str, int] = {}
+        self._active = 0
+        self._successes = 0
+        self._waiters: List = []
+        self._seq = itertools.count()
+        self._inflight: Dict[str, asyncio.Task] = {}
+        self.metrics = {"dispatched": 0, "coalesced": 0, "rate_limited": 0, "total_wait_seconds": 0.0}
+
+    @property
+    def queue_depth(self) -> int:
+        return sum(1 for _, _, waiter in self._waiters if not waiter.done())
+
+    def _queue_changed(self, agent: str, delta: int):
+        depth = self._queued.get(agent, 0) + delta
+        self._queued[agent] = depth
+        if self.on_queue_change:
+            self.on_queue_change(agent, depth)
+
+    async def _acquire(self, priority: int, agent: str = "default"):
+        if self._active < self.limit and not self._waiters:
+            self._active += 1
+            return
+        waiter = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._waiters, (priority, next(self._seq), waiter))
+        self._queue_changed(agent, 1)
+        try:
+            await waiter
+        except asyncio.CancelledError:
+            # Granted a slot just as we were cancelled: hand it on
+            if waiter.done() and not waiter.cancelled():
+                self._release()
+            raise
+        finally:
+            self._queue_changed(agent, -1)
+
+    def _release(self):
+        self._active -= 1
+        self._wake()
+
+    def _wake(self):
+        while self._waiters and self._active < self.limit:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if waiter.done():
+                continue
+            self._active += 1
+            waiter.set_result(None)
+
+    async def _dispatch(self, priority: int, agent: str):
+        enqueued = time.monotonic()
+        await self._acquire(priority, agent)
+        waited = time.monotonic() - enqueued
+        self.metrics["dispatched"] += 1
+        self.metrics["total_wait_seconds"] += waited
+        if self.on_dispatch:
+            self.on_dispatch(agent, waited)
+
+    def _on_rate_limited(self):
+        # Multiplicative decrease; recovered additively in _on_success
+        self.metrics["rate_limited"] += 1
+        self.limit = max(1, self.limit // 2)
+        self._successes = 0
+
+    def _on_success(self):
+        if self.limit >= self.max_concurrency:
+            return
+        self._successes += 1
+        if self._successes >= self.limit:
+            self.limit += 1
+            self._successes = 0
+            self._wake()
+
+    async def _run(self, call: Callable[[], Awaitable[Any]], priority: int, agent: str) -> Any:
+        attempt = 0
+        while True:
+            await self._dispatch(priority, agent)
+            try:
+                result = await call()
+                self._on_success()
+                return result
+            except Exception as e:
+                if not is_rate_limited(e) or attempt >= self.max_retries:
+                    raise
+                self._on_rate_limited()
+                delay = _retry_after(e) or min(self.max_backoff, self.base_backoff * (2 ** attempt))
+                delay *= random.uniform(0.8, 1.2)
+                attempt += 1
+            finally:
+                self._release()
+            await asyncio.sleep(delay)
+
+    @contextlib.asynccontextmanager
+    async def slot(self, priority: int = PRIORITY_NORMAL, agent: str = "default"):
+        """Hold one concurrency slot for a streamed call; no retries once tokens flow"""
+        await self._dispatch(priority, agent)
+        try:
+            yield
+            self._on_success()
+        finally:
+            self._release()
+
+    def _call_done(self, key: str, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved when every caller has gone
+
+    async def submit(self, call: Callable[[], Awaitable[Any]], priority: int = PRIORITY_NORMAL,
+                     agent: str = "default", key: Optional[str] = None) -> Any:
+        """Run call under the concurrency limit; calls sharing a key run once
+
+        A keyed call runs as its own task, so cancelling whichever caller
+        started it doesn't cancel the others waiting on the same key.
+        """
+        if key is None:
+            return await self._run(call, priority, agent)
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.metrics["coalesced"] += 1
+            return await asyncio.shield(inflight)
+
+        task = asyncio.get_running_loop().create_task(self._run(call, priority, agent))
+        self._inflight[key] = task
+        task.add_done_callback(lambda done: self._call_done(key, done))
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        dispatched = self.metrics["dispatched"]
+        return {
+            "queue_depth": self.queue_depth,
+            "queued_by_agent": {agent: depth for agent, depth in self._queued.items() if depth},
+            "active": self._active,
+            "concurrency_limit": self.limit,
+            "avg_wait_seconds": round(self.metrics["total_wait_seconds"] / dispatched, 4) if dispatched else 0.0,
+            **self.metrics
+        }
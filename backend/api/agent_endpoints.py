@@ -0,0 +1,74 @@
+"""Server-sent-event streaming for HR agents"""
+
+import contextlib
+import json
+import uuid
+from typing import Any, AsyncIterator, Dict
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+
+router = APIRouter(prefix="/api/agents", tags=["agents"])
+
+_agent_system = None
+_chat_agent = None
+
+def get_agent_system():
+    global _agent_system
+    if _agent_system is None:
+        from agents.multi_agent_system import HRMultiAgentSystem
+        _agent_system = HRMultiAgentSystem()
+    return _agent_system
+
+def get_chat_agent():
+    global _chat_agent
+    if _chat_agent is None:
+        from agents.multi_agent_system import ConversationalHRAgent
+        _chat_agent = ConversationalHRAgent(scheduler=get_agent_system().scheduler)
+    return _chat_agent
+
+def _sse(event: Dict[str, Any]) -> str:
+    return f"event: {event['event']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+async def _relay(request: Request, events: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[str]:
+    # StreamingResponse pulls one event at a time, so a slow client throttles
+    # generation instead of buffering; a disconnect closes the agent stream,
+    # which cancels the upstream LLM call.
+    async with contextlib.aclosing(events):
+        async for event in events:
+            if await request.is_disconnected():
+                break
+            yield _sse(event)
+
+async def _chat_events(message: str, context: Dict = None, session_id: str = None) -> AsyncIterator[Dict[str, Any]]:
+    # Every streamed chat gets session memory; clients send the id back to continue
+    session_id = session_id or uuid.uuid4().hex
+    yield {"event": "session", "session_id": session_id}
+    tokens = []
+    try:
+        chunks = get_chat_agent().stream_chat(message, context, session_id)
+        async with contextlib.aclosing(chunks):
+            async for token in chunks:
+                tokens.append(token)
+                yield {"event": "token", "content": token}
+    except Exception as e:
+        yield {"event": "error", "error": str(e)}
+        return
+    yield {"event": "done", "response": "".join(tokens), "session_id": session_id}
+
+@router.post("/request/stream")
+async def stream_hr_request(payload: Dict[str, Any], request: Request):
+    """Stream an HR agent run: routing, tool progress, then response tokens"""
+    events = get_agent_system().stream_hr_request(
+        payload.get("request", ""),
+        agent_type=payload.get("agent_type", "auto"),
+        use_cache=payload.get("use_cache", True)
+    )
+    return StreamingResponse(_relay(request, events), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@router.post("/chat/stream")
+async def stream_chat(payload: Dict[str, Any], request: Request):
+    """Stream CikguHR chat tokens as they are generated, remembering turns per session_id"""
+    events = _chat_events(payload.get("message", ""), payload.get("context"), payload.get("session_id"))
+    return StreamingResponse(_relay(request, events), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
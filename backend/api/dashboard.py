@@ -1,12 +1,28 @@
 from fastapi import APIRouter
 from datetime import datetime
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+from sqlalchemy.exc import SQLAlchemyError
+import logging
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api", tags=["dashboard"])
 
-@router.get("/dashboard")
-async def get_unified_dashboard() -> Dict[str, Any]:
-    """Get unified dashboard data from all modules"""
+def _burnout_alerts() -> Optional[int]:
+    """Alerts from the latest nightly burnout run; None when the database is unavailable"""
+    from backend.core import database
+    from backend.modules.er.burnout import burnout_alert_count
+    
+    try:
+        database.get_engine()
+        with database.SessionLocal() as session:
+            return burnout_alert_count(session)
+    except (ImportError, SQLAlchemyError):
+        # No driver installed, database down, or tables not created yet
+        logger.warning("Burnout alerts unavailable", exc_info=True)
+        return None
+
+def _dashboard_data(burnout_alerts: Optional[int]) -> Dict[str, Any]:
     return {
         "ir": {
             "active_cases": 12,
@@ -25,7 +41,7 @@ async def get_unified_dashboard() -> Dict[str, Any]:
                 {"department": "Finance", "score": 6.8},
                 {"department": "Operations", "score": 7.0}
             ],
-            "burnout_alerts": 3,
+            "burnout_alerts": burnout_alerts,
             "pulse_response_rate": 85
         },
         "ta": {
@@ -92,10 +108,16 @@ async def get_unified_dashboard() -> Dict[str, Any]:
         }
     }
 
+@router.get("/dashboard")
+async def get_unified_dashboard() -> Dict[str, Any]:
+    """Get unified dashboard data from all modules"""
+    return _dashboard_data(_burnout_alerts())
+
 @router.get("/dashboard/{module}")
 async def get_module_dashboard(module: str) -> Dict[str, Any]:
     """Get specific module dashboard data"""
-    full_data = await get_unified_dashboard()
+    # Only the ER section reads the database
+    full_data = _dashboard_data(_burnout_alerts() if module == "er" else None)
     return {module: full_data.get(module, {})}
 
 @router.get("/dashboard/metrics/summary")
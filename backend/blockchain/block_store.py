@@ -0,0 +1,295 @@
+"""Append-only block storage for HRMSBlockchain
+
+Blocks are appended to segment files as length-prefixed records:
+
+    [u32 payload length][u32 crc32 of payload][payload]
+
+Version 2 blocks use the canonical binary encoding; older blocks stay JSON.
+
+A fixed-width offset index (one 48-byte entry per block: block hash, segment
+number, offset, length) gives O(1) lookup by height, and an in-memory
+hash -> height map gives O(1) lookup by hash. Reads go through mmap.
+
+Writes are fsynced in batches (every N blocks or T seconds). A checkpoint file
+records the height up to which the index is durable, so startup loads the index
+up to the checkpoint and replays only the segment tail written after it,
+truncating any torn record left by a crash.
+"""
+
+import json
+import mmap
+import os
+import struct
+import time
+import zlib
+from typing import Dict, Iterator, List, Optional, Union
+from .encoding import BLOCK_VERSION, decode_value, encode_value
+
+RECORD_HEADER = struct.Struct(">II")
+INDEX_ENTRY = struct.Struct(">32sIQI")
+SEGMENT_PATTERN = "segment-{:06d}.log"
+
+def encode_block(block: Dict) -> bytes:
+    if block.get("version", 1) >= BLOCK_VERSION:
+        return encode_value(block)
+    # Legacy blocks keep JSON key order: their hashes cover json.dumps of the transactions
+    return json.dumps(block, separators=(",", ":"), default=str).encode()
+
+def decode_block(payload: bytes) -> Dict:
+    # Binary records start with a type tag, never "{"
+    if payload[:1] == b"{":
+        return json.loads(payload)
+    return decode_value(payload)
+
+def export_blocks(blocks: List[Dict]) -> bytes:
+    """Blocks framed like segment records, for shipping to another node"""
+    out = bytearray()
+    for block in blocks:
+        payload = encode_block(block)
+        out += RECORD_HEADER.pack(len(payload), zlib.crc32(payload))
+        out += payload
+    return bytes(out)
+
+def iter_exported_blocks(data: bytes) -> Iterator[Dict]:
+    offset = 0
+    while offset < len(data):
+        length, checksum = RECORD_HEADER.unpack_from(data, offset)
+        payload = data[offset + RECORD_HEADER.size:offset + RECORD_HEADER.size + length]
+        if len(payload) < length or zlib.crc32(payload) != checksum:
+            raise ValueError(f"Corrupt block record at offset {offset}")
+        yield decode_block(payload)
+        offset += RECORD_HEADER.size + length
+
+class MemoryBlockStore:
+    """Non-persistent store with the same interface, used when no directory is configured"""
+
+    def __init__(self):
+        self._blocks: List[Dict] = []
+        self._by_hash: Dict[str, int] = {}
+
+    def append(self, block: Dict) -> int:
+        self._blocks.append(block)
+        self._by_hash[block["hash"]] = len(self._blocks) - 1
+        return len(self._blocks) - 1
+
+    def get(self, index: int) -> Dict:
+        return self._blocks[index]
+
+    def get_by_hash(self, block_hash: str) -> Optional[Dict]:
+        index = self._by_hash.get(block_hash)
+        return self._blocks[index] if index is not None else None
+
+    def height_of(self, block_hash: str) -> Optional[int]:
+        return self._by_hash.get(block_hash)
+
+    def __len__(self) -> int:
+        return len(self._blocks)
+
+    def __getitem__(self, key: Union[int, slice]):
+        return self._blocks[key]
+
+    def __iter__(self) -> Iterator[Dict]:
+        return iter(self._blocks)
+
+    def flush(self):
+        pass
+
+    def close(self):
+        pass
+
+class BlockStore:
+    def __init__(self, directory: str, segment_size: int = 64 * 1024 * 1024,
+                 sync_every: int = 32, sync_interval: float = 1.0, checkpoint_every: int = 1024):
+        self.directory = directory
+        self.segment_size = segment_size
+        self.sync_every = sync_every
+        self.sync_interval = sync_interval
+        self.checkpoint_every = checkpoint_every
+        os.makedirs(directory, exist_ok=True)
+
+        self._index_path = os.path.join(directory, "index.bin")
+        self._checkpoint_path = os.path.join(directory, "checkpoint.json")
+        self._by_hash: Dict[str, int] = {}
+        self._maps: Dict[int, mmap.mmap] = {}
+        self._index_map: Optional[mmap.mmap] = None
+        self._count = 0
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._checkpoint_height = 0
+
+        self._recover()
+
+    def _segment_path(self, segment: int) -> str:
+        return os.path.join(self.directory, SEGMENT_PATTERN.format(segment))
+
+    def _read_checkpoint(self) -> Dict:
+        try:
+            with open(self._checkpoint_path) as f:
+                return json.load(f)
+        except (FileNotFoundError, ValueError):
+            return {"height": 0, "segment": 0, "offset": 0}
+
+    def _recover(self):
+        checkpoint = self._read_checkpoint()
+        height = checkpoint["height"]
+
+        # Index entries past the checkpoint may be torn; rebuild them from segments
+        with open(self._index_path, "ab+") as index:
+            index.truncate(height * INDEX_ENTRY.size)
+        self._count = height
+        self._index_file = open(self._index_path, "ab")
+        self._remap_index()
+        for i in range(height):
+            block_hash, _, _, _ = self._index_entry(i)
+            self._by_hash[block_hash] = i
+
+        segment, offset = checkpoint["segment"], checkpoint["offset"]
+        while os.path.exists(self._segment_path(segment)):
+            offset = self._replay_segment(segment, offset)
+            if not os.path.exists(self._segment_path(segment + 1)):
+                break
+            segment, offset = segment + 1, 0
+
+        self._segment = segment
+        self._segment_file = open(self._segment_path(segment), "ab")
+        self._offset = self._segment_file.tell()
+        self._checkpoint_height = height
+        if self._count != height:
+            self.flush()
+
+    def _replay_segment(self, segment: int, offset: int) -> int:
+        path = self._segment_path(segment)
+        with open(path, "rb+") as f:
+            f.seek(offset)
+            while True:
+                header = f.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    break
+                length, checksum = RECORD_HEADER.unpack(header)
+                payload = f.read(length)
+                if len(payload) < length or zlib.crc32(payload) != checksum:
+                    break
+                block = decode_block(payload)
+                self._write_index_entry(block["hash"], segment, offset, RECORD_HEADER.size + length)
+                offset += RECORD_HEADER.size + length
+            # Drop a torn tail so new records start on a clean boundary
+            f.truncate(offset)
+        return offset
+
+    def _remap_index(self):
+        if self._index_map is not None:
+            self._index_map.close()
+            self._index_map = None
+        size = os.path.getsize(self._index_path)
+        if size:
+            with open(self._index_path, "rb") as f:
+                self._index_map = mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ)
+
+    def _index_entry(self, index: int):
+        if self._index_map is None or (index + 1) * INDEX_ENTRY.size > len(self._index_map):
+            self._index_file.flush()
+            self._remap_index()
+        raw_hash, segment, offset, length = INDEX_ENTRY.unpack_from(self._index_map, index * INDEX_ENTRY.size)
+        return raw_hash.hex(), segment, offset, length
+
+    def _write_index_entry(self, block_hash: str, segment: int, offset: int, length: int):
+        self._index_file.write(INDEX_ENTRY.pack(bytes.fromhex(block_hash), segment, offset, length))
+        self._by_hash[block_hash] = self._count
+        self._count += 1
+
+    def _segment_map(self, segment: int, end: int) -> mmap.mmap:
+        mapped = self._maps.get(segment)
+        if mapped is None or len(mapped) < end:
+            if mapped is not None:
+                mapped.close()
+            if segment == self._segment:
+                self._segment_file.flush()
+            with open(self._segment_path(segment), "rb") as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            self._maps[segment] = mapped
+        return mapped
+
+    def _rotate(self):
+        self.flush()
+        self._segment_file.close()
+        self._segment += 1
+        self._segment_file = open(self._segment_path(self._segment), "ab")
+        self._offset = 0
+
+    def append(self, block: Dict) -> int:
+        """Append a block and return its height"""
+        payload = encode_block(block)
+        if self._offset and self._offset + RECORD_HEADER.size + len(payload) > self.segment_size:
+            self._rotate()
+
+        self._segment_file.write(RECORD_HEADER.pack(len(payload), zlib.crc32(payload)))
+        self._segment_file.write(payload)
+        height = self._count
+        self._write_index_entry(block["hash"], self._segment, self._offset, RECORD_HEADER.size + len(payload))
+        self._offset += RECORD_HEADER.size + len(payload)
+
+        self._unsynced += 1
+        if self._unsynced >= self.sync_every or time.monotonic() - self._last_sync >= self.sync_interval:
+            self.flush()
+        return height
+
+    def get(self, index: int) -> Dict:
+        """Fetch a block by height"""
+        if index < 0:
+            index += self._count
+        if not 0 <= index < self._count:
+            raise IndexError(f"Block {index} out of range")
+        _, segment, offset, length = self._index_entry(index)
+        mapped = self._segment_map(segment, offset + length)
+        return decode_block(mapped[offset + RECORD_HEADER.size:offset + length])
+
+    def get_by_hash(self, block_hash: str) -> Optional[Dict]:
+        index = self._by_hash.get(block_hash)
+        return self.get(index) if index is not None else None
+
+    def height_of(self, block_hash: str) -> Optional[int]:
+        return self._by_hash.get(block_hash)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, key: Union[int, slice]):
+        if isinstance(key, slice):
+            return [self.get(i) for i in range(*key.indices(self._count))]
+        return self.get(key)
+
+    def __iter__(self) -> Iterator[Dict]:
+        for i in range(self._count):
+            yield self.get(i)
+
+    def flush(self):
+        """fsync segment and index, then advance the checkpoint when due"""
+        self._segment_file.flush()
+        os.fsync(self._segment_file.fileno())
+        self._index_file.flush()
+        os.fsync(self._index_file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        if self._count - self._checkpoint_height >= self.checkpoint_every:
+            self._write_checkpoint()
+
+    def _write_checkpoint(self):
+        tmp_path = self._checkpoint_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"height": self._count, "segment": self._segment, "offset": self._offset}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._checkpoint_path)
+        self._checkpoint_height = self._count
+
+    def close(self):
+        self.flush()
+        self._write_checkpoint()
+        for mapped in self._maps.values():
+            mapped.close()
+        self._maps.clear()
+        if self._index_map is not None:
+            self._index_map.close()
+            self._index_map = None
+        self._segment_file.close()
+        self._index_file.close()
@@ -0,0 +1,65 @@
+"""Trusted verification checkpoints for HRMSBlockchain
+
+A checkpoint is a (height, block hash) marker recorded after a successful
+verification. Routine verification trusts everything below the checkpoint and
+only re-hashes newer blocks. Markers are HMAC-signed when a key is configured
+(HRMS_CHAIN_CHECKPOINT_KEY) and persisted next to the chain when it has a
+storage directory; a marker that fails its signature check is ignored.
+"""
+
+import hashlib
+import hmac
+import json
+import os
+from typing import Dict, Optional
+
+class VerificationCheckpoint:
+    def __init__(self, path: Optional[str] = None, key: Optional[bytes] = None):
+        self.path = path
+        if key is None and os.getenv("HRMS_CHAIN_CHECKPOINT_KEY"):
+            key = os.getenv("HRMS_CHAIN_CHECKPOINT_KEY").encode()
+        self.key = key
+        self.height = 0
+        self.block_hash: Optional[str] = None
+        if path:
+            self._load()
+
+    def _sign(self, height: int, block_hash: str) -> Optional[str]:
+        if not self.key:
+            return None
+        return hmac.new(self.key, f"{height}:{block_hash}".encode(), hashlib.sha256).hexdigest()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                marker = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        expected = self._sign(marker["height"], marker["hash"])
+        if expected is not None and not hmac.compare_digest(expected, marker.get("signature") or ""):
+            return  # tampered or signed with another key: start from genesis
+        self.height = marker["height"]
+        self.block_hash = marker["hash"]
+
+    def trusted(self, stored_block: Optional[Dict]) -> int:
+        """Height verification can start from, given the stored block at height - 1"""
+        if not self.height or stored_block is None or stored_block["hash"] != self.block_hash:
+            return 0
+        return self.height
+
+    def advance(self, height: int, block_hash: str):
+        """Record that blocks below height verified, ending in block_hash"""
+        self.height = height
+        self.block_hash = block_hash
+        if not self.path:
+            return
+        marker = {"height": height, "hash": block_hash, "signature": self._sign(height, block_hash)}
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(marker, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+
+    def reset(self):
+        self.advance(0, "")
@@ -0,0 +1,172 @@
+"""Pluggable block sealing for HRMSBlockchain
+
+- ProofOfWorkConsensus: the original "hash starts with N zeros" rule, but the
+  header prefix is serialized and absorbed into SHA-256 once, each attempt only
+  hashes the nonce, and the nonce space is split across worker processes at
+  higher difficulties.
+- PermissionedConsensus: no proof of work. Blocks are sealed by signing the
+  header hash with an authorised Ed25519 key, for private deployments where the
+  sealers are known.
+"""
+
+import base64
+import hashlib
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Optional
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey, Ed25519PublicKey
+from .encoding import BLOCK_VERSION, header_prefix_bytes, nonce_bytes
+
+def header_prefix(header: Dict) -> bytes:
+    """Everything the header hash covers except the nonce, in hash order"""
+    if header.get("version", 1) >= BLOCK_VERSION:
+        return header_prefix_bytes(header["index"], header["timestamp"], header["merkle_root"], header["previous_hash"])
+    return f"{header['index']}{header['timestamp']}{header['merkle_root']}{header['previous_hash']}".encode()
+
+def nonce_suffix(nonce: int, binary: bool) -> bytes:
+    return nonce_bytes(nonce) if binary else str(nonce).encode()
+
+def _meets_difficulty(digest: bytes, difficulty: int) -> bool:
+    # Leading zero hex digits, checked on raw bytes to skip hexdigest()
+    full, half = divmod(difficulty, 2)
+    if digest[:full] != bytes(full):
+        return False
+    return not half or digest[full] < 0x10
+
+def _search_nonces(prefix: bytes, start: int, stop: int, difficulty: int, binary: bool = False) -> Optional[int]:
+    base = hashlib.sha256(prefix)
+    if binary:
+        for nonce in range(start, stop):
+            attempt = base.copy()
+            attempt.update(nonce_bytes(nonce))
+            if _meets_difficulty(attempt.digest(), difficulty):
+                return nonce
+        return None
+    for nonce in range(start, stop):
+        attempt = base.copy()
+        attempt.update(str(nonce).encode())
+        if _meets_difficulty(attempt.digest(), difficulty):
+            return nonce
+    return None
+
+class ProofOfWorkConsensus:
+    name = "pow"
+
+    def __init__(self, difficulty: int = 2, workers: Optional[int] = None,
+                 batch_size: int = 50000, parallel_from_difficulty: int = 5):
+        self.difficulty = difficulty
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        # Below this, a single process finds a nonce faster than a pool can start
+        self.parallel_from_difficulty = parallel_from_difficulty
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    def _find_nonce(self, prefix: bytes, binary: bool) -> int:
+        if self.difficulty < self.parallel_from_difficulty or self.workers == 1:
+            start = 0
+            while True:
+                nonce = _search_nonces(prefix, start, start + self.batch_size, self.difficulty, binary)
+                if nonce is not None:
+                    return nonce
+                start += self.batch_size
+
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        start = 0
+        while True:
+            futures = [
+                self._pool.submit(_search_nonces, prefix, start + i * self.batch_size,
+                                  start + (i + 1) * self.batch_size, self.difficulty, binary)
+                for i in range(self.workers)
+            ]
+            # Lowest range wins, so the sealed nonce is deterministic
+            for future in futures:
+                nonce = future.result()
+                if nonce is not None:
+                    for pending in futures:
+                        pending.cancel()
+                    return nonce
+            start += self.workers * self.batch_size
+
+    def seal(self, header: Dict) -> Dict:
+        """Return the sealing fields (nonce, hash) for an unsealed header"""
+        prefix = header_prefix(header)
+        binary = header.get("version", 1) >= BLOCK_VERSION
+        nonce = self._find_nonce(prefix, binary)
+        return {"nonce": nonce, "hash": hashlib.sha256(prefix + nonce_suffix(nonce, binary)).hexdigest()}
+
+    def verify_seal(self, block: Dict) -> bool:
+        return block["hash"].startswith("0" * self.difficulty)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def __getstate__(self):
+        # Shipped to verification workers; the pool stays behind
+        state = self.__dict__.copy()
+        state["_pool"] = None
+        return state
+
+class PermissionedConsensus:
+    name = "permissioned"
+
+    def __init__(self, signing_key: Optional[Ed25519PrivateKey] = None,
+                 authorities: Optional[List[bytes]] = None, migration_height: int = 0):
+        """signing_key seals blocks on this node; authorities are raw Ed25519
+        public keys whose seals are accepted (this node's key is always included).
+        Unsigned proof-of-work blocks are only accepted below migration_height,
+        the height at which an existing chain switched to permissioned mode."""
+        self.migration_height = migration_height
+        if signing_key is None and os.getenv("HRMS_CHAIN_SEALER_KEY"):
+            with open(os.getenv("HRMS_CHAIN_SEALER_KEY"), "rb") as f:
+                signing_key = serialization.load_pem_private_key(f.read(), password=None)
+        self.signing_key = signing_key
+        self.authorities = set(authorities or [])
+        if signing_key is not None:
+            self.authorities.add(self.sealer_id_bytes)
+
+    @property
+    def sealer_id_bytes(self) -> bytes:
+        return self.signing_key.public_key().public_bytes(
+            serialization.Encoding.Raw, serialization.PublicFormat.Raw
+        )
+
+    def seal(self, header: Dict) -> Dict:
+        if self.signing_key is None:
+            raise ValueError("Permissioned sealing requires a signing key (HRMS_CHAIN_SEALER_KEY)")
+        binary = header.get("version", 1) >= BLOCK_VERSION
+        block_hash = hashlib.sha256(header_prefix(header) + nonce_suffix(0, binary)).hexdigest()
+        return {
+            "nonce": 0,
+            "hash": block_hash,
+            "sealer": base64.b64encode(self.sealer_id_bytes).decode(),
+            "seal_signature": base64.b64encode(self.signing_key.sign(bytes.fromhex(block_hash))).decode()
+        }
+
+    def verify_seal(self, block: Dict) -> bool:
+        if "seal_signature" not in block:
+            # Blocks mined under proof of work before switching to permissioned mode
+            return block["index"] < self.migration_height and block["hash"].startswith("00")
+        try:
+            sealer = base64.b64decode(block["sealer"])
+            if sealer not in self.authorities:
+                return False
+            Ed25519PublicKey.from_public_bytes(sealer).verify(
+                base64.b64decode(block["seal_signature"]), bytes.fromhex(block["hash"])
+            )
+        except (InvalidSignature, ValueError, KeyError):
+            return False
+        return True
+
+    def close(self):
+        pass
+
+    def __getstate__(self):
+        # Verification workers only need the public authorities
+        state = self.__dict__.copy()
+        state["signing_key"] = None
+        return state
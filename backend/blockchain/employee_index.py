@@ -0,0 +1,64 @@
+"""Secondary index from employee_id to transaction positions
+
+Maintained incrementally as blocks are mined, so employee history lookups cost
+O(records for that employee) instead of a scan over every transaction. When
+the chain is persisted, the index is snapshotted next to it and, on startup,
+only blocks mined after the snapshot are re-indexed.
+"""
+
+import json
+import os
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Tuple
+
+Position = Tuple[int, int]  # (block index, transaction index within block)
+
+class EmployeeIndex:
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.height = 0  # number of blocks indexed
+        self._positions: Dict[str, List[Position]] = defaultdict(list)
+        if path:
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.path) as f:
+                snapshot = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        self.height = snapshot["height"]
+        for employee_id, positions in snapshot["positions"].items():
+            self._positions[employee_id] = [tuple(p) for p in positions]
+
+    def reset(self):
+        self.height = 0
+        self._positions.clear()
+
+    def add_block(self, block: Dict):
+        """Index one block; blocks must be added in chain order"""
+        if block["index"] < self.height:
+            return
+        for tx_index, tx in enumerate(block["transactions"]):
+            self._positions[tx["employee_id"]].append((block["index"], tx_index))
+        self.height = block["index"] + 1
+
+    def catch_up(self, blocks: Iterable[Dict]):
+        for block in blocks:
+            self.add_block(block)
+
+    def positions(self, employee_id: str) -> List[Position]:
+        return list(self._positions.get(employee_id, ()))
+
+    def count(self, employee_id: str) -> int:
+        return len(self._positions.get(employee_id, ()))
+
+    def save(self):
+        if not self.path:
+            return
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"height": self.height, "positions": self._positions}, f, separators=(",", ":"))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
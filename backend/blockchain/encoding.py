@@ -0,0 +1,200 @@
+"""Canonical compact binary encoding for blockchain records
+
+Values are written as a type tag followed by a fixed or length-prefixed
+payload. Dict keys are sorted by their UTF-8 bytes and floats are always
+8-byte IEEE 754, so equal values always encode to the same bytes whatever
+the dict insertion order. Version 2 blocks use it in place of json.dumps for
+transaction hashing, segment storage and block export.
+
+Block headers use a fixed layout instead:
+
+    [u8 version][u64 index][u16 len][timestamp][32B merkle root][32B previous hash]
+
+followed by the nonce as a u64, so proof of work only re-hashes 8 bytes.
+"""
+
+import math
+import struct
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, Tuple
+
+BLOCK_VERSION = 2
+GENESIS_PREVIOUS_HASH = "0" * 64
+
+_NONE, _FALSE, _TRUE, _INT, _FLOAT, _STR, _BYTES, _LIST, _DICT, _DATETIME, _DECIMAL, _DATE = range(12)
+
+_DOUBLE = struct.Struct(">d")
+_HEADER = struct.Struct(">BQH")
+_NONCE = struct.Struct(">Q")
+
+# Lengths and small ints are almost always one byte; skip the loop for them
+_SMALL_VARINTS = [bytes((i,)) for i in range(128)]
+
+def _varint(value: int) -> bytes:
+    if value < 128:
+        return _SMALL_VARINTS[value]
+    out = bytearray()
+    while value > 0x7F:
+        out.append((value & 0x7F) | 0x80)
+        value >>= 7
+    out.append(value)
+    return bytes(out)
+
+def _read_varint(buf: bytes, pos: int) -> Tuple[int, int]:
+    value = shift = 0
+    while True:
+        byte = buf[pos]
+        pos += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, pos
+        shift += 7
+
+def _tagged_text(tag: int, text: str, out: bytearray):
+    raw = text.encode()
+    out.append(tag)
+    out += _varint(len(raw))
+    out += raw
+
+def _encode_none(value, out: bytearray):
+    out.append(_NONE)
+
+def _encode_bool(value: bool, out: bytearray):
+    out.append(_TRUE if value else _FALSE)
+
+def _encode_int(value: int, out: bytearray):
+    out.append(_INT)
+    out += _varint(value * 2 if value >= 0 else -value * 2 - 1)
+
+def _encode_float(value: float, out: bytearray):
+    if math.isnan(value):
+        value = math.nan  # one NaN bit pattern
+    elif value == 0:
+        value = 0.0  # fold -0.0
+    out.append(_FLOAT)
+    out += _DOUBLE.pack(value)
+
+def _encode_str(value: str, out: bytearray):
+    _tagged_text(_STR, value, out)
+
+def _encode_bytes(value: bytes, out: bytearray):
+    out.append(_BYTES)
+    out += _varint(len(value))
+    out += value
+
+def _encode_list(value, out: bytearray):
+    out.append(_LIST)
+    out += _varint(len(value))
+    for item in value:
+        _encode(item, out)
+
+def _encode_dict(value: Dict, out: bytearray):
+    for key in value:
+        # str() would let {1: x} and {"1": x} hash the same
+        if not isinstance(key, str):
+            raise TypeError(f"Dict keys must be str, not {type(key).__name__}")
+    out.append(_DICT)
+    out += _varint(len(value))
+    for key in sorted(value, key=str.encode):
+        raw = key.encode()
+        out += _varint(len(raw))
+        out += raw
+        _encode(value[key], out)
+
+_ENCODERS = {
+    type(None): _encode_none,
+    bool: _encode_bool,
+    int: _encode_int,
+    float: _encode_float,
+    str: _encode_str,
+    bytes: _encode_bytes,
+    bytearray: _encode_bytes,
+    list: _encode_list,
+    tuple: _encode_list,
+    dict: _encode_dict,
+    datetime: lambda value, out: _tagged_text(_DATETIME, value.isoformat(), out),
+    date: lambda value, out: _tagged_text(_DATE, value.isoformat(), out),
+    Decimal: lambda value, out: _tagged_text(_DECIMAL, str(value), out)
+}
+
+def _encode(value: Any, out: bytearray):
+    encoder = _ENCODERS.get(type(value))
+    if encoder is None:
+        # Subclasses (IntEnum, OrderedDict, ...) encode as their base type
+        for base, candidate in _ENCODERS.items():
+            if base is not bool and isinstance(value, base):
+                encoder = candidate
+                break
+        else:
+            raise TypeError(f"Cannot encode {type(value).__name__}")
+    encoder(value, out)
+
+def encode_value(value: Any) -> bytes:
+    out = bytearray()
+    _encode(value, out)
+    return bytes(out)
+
+def _decode(buf: bytes, pos: int) -> Tuple[Any, int]:
+    tag = buf[pos]
+    pos += 1
+    if tag == _NONE:
+        return None, pos
+    if tag == _TRUE:
+        return True, pos
+    if tag == _FALSE:
+        return False, pos
+    if tag == _INT:
+        raw, pos = _read_varint(buf, pos)
+        return (raw >> 1) if not raw & 1 else -((raw + 1) >> 1), pos
+    if tag == _FLOAT:
+        return _DOUBLE.unpack_from(buf, pos)[0], pos + _DOUBLE.size
+    if tag in (_STR, _BYTES, _DATETIME, _DATE, _DECIMAL):
+        length, pos = _read_varint(buf, pos)
+        raw = bytes(buf[pos:pos + length])
+        pos += length
+        if tag == _BYTES:
+            return raw, pos
+        text = raw.decode()
+        if tag == _DATETIME:
+            return datetime.fromisoformat(text), pos
+        if tag == _DATE:
+            return date.fromisoformat(text), pos
+        if tag == _DECIMAL:
+            return Decimal(text), pos
+        return text, pos
+    if tag == _LIST:
+        count, pos = _read_varint(buf, pos)
+        items = []
+        for _ in range(count):
+            item, pos = _decode(buf, pos)
+            items.append(item)
+        return items, pos
+    if tag == _DICT:
+        count, pos = _read_varint(buf, pos)
+        result = {}
+        for _ in range(count):
+            length, pos = _read_varint(buf, pos)
+            key = bytes(buf[pos:pos + length]).decode()
+            result[key], pos = _decode(buf, pos + length)
+        return result, pos
+    raise ValueError(f"Unknown type tag {tag}")
+
+def decode_value(buf: bytes) -> Any:
+    value, pos = _decode(buf, 0)
+    if pos != len(buf):
+        raise ValueError("Trailing bytes after encoded value")
+    return value
+
+def transaction_bytes(employee_id: str, transaction_type: str, data: Dict, timestamp: str) -> bytes:
+    """Canonical bytes a version 2 transaction hash covers"""
+    return encode_value([employee_id, transaction_type, data, timestamp])
+
+def header_prefix_bytes(index: int, timestamp: str, merkle_root: str, previous_hash: str) -> bytes:
+    """Fixed-layout header without the nonce"""
+    raw_timestamp = timestamp.encode()
+    return (_HEADER.pack(BLOCK_VERSION, index, len(raw_timestamp)) + raw_timestamp
+            + bytes.fromhex(merkle_root) + bytes.fromhex(previous_hash))
+
+def nonce_bytes(nonce: int) -> bytes:
+    return _NONCE.pack(nonce)
@@ -8,10 +8,20 @@ from cryptography.hazmat.primitives.asymmetric import rsa, padding
 from cryptography.hazmat.backends import default_backend
 import base64
 import threading
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 import asyncio
+import os
+from .block_store import BlockStore, MemoryBlockStore, export_blocks, iter_exported_blocks
+from .employee_index import EmployeeIndex, Position
+from .checkpoints import VerificationCheckpoint
+from .consensus import ProofOfWorkConsensus, PermissionedConsensus, header_prefix, nonce_suffix
+from .encoding import BLOCK_VERSION, GENESIS_PREVIOUS_HASH, transaction_bytes
+from .sealer import BlockSealer
+from .signing import TransactionSigner
+from .payroll_anchor import ANCHOR_TRANSACTION_TYPE, PayrollRunAnchor, anchor_employee_id, verify_payslip_proof
+from .merkle import EMPTY_ROOT, merkle_root, merkle_proof, verify_merkle_proof
 
-@dataclass
+@dataclass(slots=True)
 class HRTransaction:
     employee_id: str
     transaction_type: str  # payroll, attendance, leave, performance, compliance
@@ -37,120 +47,386 @@ class HRTransaction:
             'digital_signature': self.digital_signature,
             'compliance_flags': self.compliance_flags
         }
+    
+    def to_bytes(self) -> bytes:
+        """Canonical encoding the transaction hash covers"""
+        return transaction_bytes(self.employee_id, self.transaction_type, self.data, self.timestamp.isoformat())
+    
+    def compute_hash(self) -> str:
+        return hashlib.sha256(self.to_bytes()).hexdigest()
+
+HEADER_FIELDS = ("version", "index", "timestamp", "merkle_root", "previous_hash", "nonce", "hash", "sealer", "seal_signature")
+
+def compute_block_hash(index: int, timestamp: str, transactions: List, previous_hash: str, nonce: int) -> str:
+    """Calculate SHA-256 hash of a legacy block (commits to the full transaction list)"""
+    block_string = f"{index}{timestamp}{json.dumps(transactions, default=str)}{previous_hash}{nonce}"
+    return hashlib.sha256(block_string.encode()).hexdigest()
+
+def compute_header_hash(index: int, timestamp: str, merkle_root: str, previous_hash: str, nonce: int) -> str:
+    """Calculate SHA-256 hash of a block header (commits to transactions via the Merkle root)"""
+    header_string = f"{index}{timestamp}{merkle_root}{previous_hash}{nonce}"
+    return hashlib.sha256(header_string.encode()).hexdigest()
+
+def compute_transaction_hash(employee_id: str, transaction_type: str, data: Dict, timestamp: str) -> str:
+    """Legacy transaction hash over json.dumps of the data (blocks before version 2)"""
+    return hashlib.sha256(f"{employee_id}{transaction_type}{json.dumps(data)}{timestamp}".encode()).hexdigest()
+
+def _recorded_transaction_hash(tx: Dict, version: int = 1) -> str:
+    if version >= BLOCK_VERSION:
+        return hashlib.sha256(transaction_bytes(tx["employee_id"], tx["type"], tx["data"], tx["timestamp"])).hexdigest()
+    # Legacy transactions are hashed with str(datetime) but stored with isoformat()
+    return compute_transaction_hash(tx["employee_id"], tx["type"], tx["data"], str(datetime.fromisoformat(tx["timestamp"])))
+
+def block_hash(block: Dict) -> str:
+    if block.get("version", 1) >= BLOCK_VERSION:
+        return hashlib.sha256(header_prefix(block) + nonce_suffix(block["nonce"], True)).hexdigest()
+    if "merkle_root" in block:
+        return compute_header_hash(block["index"], block["timestamp"], block["merkle_root"], block["previous_hash"], block["nonce"])
+    return compute_block_hash(block["index"], block["timestamp"], block["transactions"], block["previous_hash"], block["nonce"])
+
+def _verify_block_range(blocks: List[Dict], previous_hash: str, consensus=None) -> Optional[int]:
+    """Return the index of the first invalid block in a contiguous range, or None"""
+    for block in blocks:
+        if block["previous_hash"] != previous_hash:
+            return block["index"]
+        if consensus is not None and not consensus.verify_seal(block):
+            return block["index"]
+        if "merkle_root" in block:
+            # The header only commits to the root, so check the body against it
+            tx_hashes = [tx["hash"] for tx in block["transactions"]]
+            version = block.get("version", 1)
+            if any(_recorded_transaction_hash(tx, version) != tx["hash"] for tx in block["transactions"]):
+                return block["index"]
+            if merkle_root(tx_hashes) != block["merkle_root"]:
+                return block["index"]
+        if block["hash"] != block_hash(block):
+            return block["index"]
+        previous_hash = block["hash"]
+    return None
 
 class HRMSBlockchain:
-    def __init__(self):
-        self.chain: List[Dict] = []
+    def __init__(self, storage_dir: Optional[str] = None, index_snapshot_every: int = 256,
+                 consensus: Union[ProofOfWorkConsensus, PermissionedConsensus, None] = None, **store_options):
+        # Default keeps the original two-zero proof of work
+        self.consensus = consensus or ProofOfWorkConsensus(difficulty=2)
+        
+        # With a storage_dir, blocks survive restarts in an append-only segment store
+        self.store = BlockStore(storage_dir, **store_options) if storage_dir else MemoryBlockStore()
         self.pending_transactions: List[HRTransaction] = []
-        self.create_genesis_block()
+        self._pending_lock = threading.Lock()
+        # Serializes mining and verification against the chain tip
+        self._chain_lock = threading.RLock()
+        self.index_snapshot_every = index_snapshot_every
+        
+        index_path = os.path.join(storage_dir, "employee_index.json") if storage_dir else None
+        self.employee_index = EmployeeIndex(index_path)
+        if self.employee_index.height > len(self.store):
+            # Snapshot is ahead of a truncated chain; rebuild from scratch
+            self.employee_index.reset()
+        for i in range(self.employee_index.height, len(self.store)):
+            self.employee_index.add_block(self.store.get(i))
+        
+        checkpoint_path = os.path.join(storage_dir, "verify_checkpoint.json") if storage_dir else None
+        self.verify_checkpoint = VerificationCheckpoint(checkpoint_path)
+        
+        if len(self.store) == 0:
+            self.create_genesis_block()
+    
+    @property
+    def chain(self) -> Union[BlockStore, MemoryBlockStore]:
+        """Sequence view over stored blocks (supports len, indexing and slicing)"""
+        return self.store
+    
+    def get_block(self, index: int) -> Dict:
+        return self.store.get(index)
+    
+    def get_block_by_hash(self, block_hash: str) -> Optional[Dict]:
+        return self.store.get_by_hash(block_hash)
+    
+    def close(self):
+        """Flush pending writes and checkpoint the store and employee index"""
+        self.store.close()
+        self.employee_index.save()
+        self.consensus.close()
+    
+    def _append_block(self, block: Dict):
+        self.chain.append(block)
+        self.employee_index.add_block(block)
+        if self.employee_index.path and block["index"] % self.index_snapshot_every == 0:
+            # The snapshot must never get ahead of durable blocks
+            self.store.flush()
+            self.employee_index.save()
     
     def create_genesis_block(self):
         """Create the first block in the chain"""
+        timestamp = datetime.now().isoformat()
         genesis_block = {
+            "version": BLOCK_VERSION,
             "index": 0,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": timestamp,
             "transactions": [],
-            "previous_hash": "0",
-            "nonce": 0,
-            "hash": self.calculate_hash(0, datetime.now().isoformat(), [], "0", 0)
+            "merkle_root": EMPTY_ROOT,
+            "previous_hash": GENESIS_PREVIOUS_HASH,
+            "nonce": 0
         }
-        self.chain.append(genesis_block)
+        genesis_block["hash"] = block_hash(genesis_block)
+        self._append_block(genesis_block)
     
     def calculate_hash(self, index: int, timestamp: str, transactions: List, previous_hash: str, nonce: int) -> str:
         """Calculate SHA-256 hash of block"""
-        block_string = f"{index}{timestamp}{json.dumps(transactions, default=str)}{previous_hash}{nonce}"
-        return hashlib.sha256(block_string.encode()).hexdigest()
+        return compute_block_hash(index, timestamp, transactions, previous_hash, nonce)
     
     def add_transaction(self, transaction: HRTransaction):
         """Add transaction to pending pool"""
-        transaction.hash = hashlib.sha256(
-            f"{transaction.employee_id}{transaction.transaction_type}{json.dumps(transaction.data)}{transaction.timestamp}".encode()
-        ).hexdigest()
-        self.pending_transactions.append(transaction)
+        transaction.hash = transaction.compute_hash()
+        with self._pending_lock:
+            self.pending_transactions.append(transaction)
     
-    def mine_block(self) -> Dict:
-        """Mine a new block with pending transactions"""
-        if not self.pending_transactions:
-            return {"error": "No pending transactions"}
-        
+    def add_transactions(self, transactions: List[HRTransaction]):
+        """Add many transactions to the pending pool under one lock acquisition"""
+        for transaction in transactions:
+            transaction.hash = transaction.compute_hash()
+        with self._pending_lock:
+            self.pending_transactions.extend(transactions)
+    
+    def mine_block(self, max_transactions: Optional[int] = None) -> Dict:
+        """Mine a new block with pending transactions (at most max_transactions, oldest first)"""
+        with self._chain_lock:
+            with self._pending_lock:
+                batch = self.pending_transactions[:max_transactions]
+                self.pending_transactions = self.pending_transactions[len(batch):]
+            if not batch:
+                return {"error": "No pending transactions"}
+            try:
+                return self._mine_batch(batch)
+            except BaseException:
+                with self._pending_lock:
+                    self.pending_transactions[:0] = batch
+                raise
+    
+    def _mine_batch(self, batch: List[HRTransaction]) -> Dict:
         previous_block = self.chain[-1]
         new_index = previous_block["index"] + 1
         timestamp = datetime.now().isoformat()
         
         # Convert transactions to dict format
-        transactions = [
-            {
+        transactions = []
+        for tx in batch:
+            record = {
                 "employee_id": tx.employee_id,
                 "type": tx.transaction_type,
                 "data": tx.data,
                 "timestamp": tx.timestamp.isoformat(),
                 "hash": tx.hash
             }
-            for tx in self.pending_transactions
-        ]
+            if tx.digital_signature:
+                record["digital_signature"] = tx.digital_signature
+            transactions.append(record)
+        
+        header = {
+            "version": BLOCK_VERSION,
+            "index": new_index,
+            "timestamp": timestamp,
+            "merkle_root": merkle_root([tx["hash"] for tx in transactions]),
+            "previous_hash": previous_block["hash"]
+        }
         
-        # Simple proof of work (find hash starting with "00")
-        nonce = 0
-        while True:
-            hash_value = self.calculate_hash(new_index, timestamp, transactions, previous_block["hash"], nonce)
-            if hash_value.startswith("00"):
-                break
-            nonce += 1
+        # Proof of work or a permissioned signature, depending on consensus mode
+        seal = self.consensus.seal(header)
         
         new_block = {
+            "version": BLOCK_VERSION,
             "index": new_index,
             "timestamp": timestamp,
             "transactions": transactions,
+            "merkle_root": header["merkle_root"],
             "previous_hash": previous_block["hash"],
-            "nonce": nonce,
-            "hash": hash_value
+            **seal
         }
         
-        self.chain.append(new_block)
-        self.pending_transactions = []
-        
+        self._append_block(new_block)
         return new_block
     
-    def verify_chain(self) -> bool:
-        """Verify blockchain integrity"""
-        for i in range(1, len(self.chain)):
-            current_block = self.chain[i]
-            previous_block = self.chain[i-1]
-            
-            # Verify current block hash
-            calculated_hash = self.calculate_hash(
-                current_block["index"],
-                current_block["timestamp"],
-                current_block["transactions"],
-                current_block["previous_hash"],
-                current_block["nonce"]
-            )
-            
-            if current_block["hash"] != calculated_hash:
-                return False
+    def verify_chain(self, full_audit: bool = False, workers: Optional[int] = None,
+                     chunk_size: int = 2048) -> bool:
+        """Verify blockchain integrity
+        
+        Routine checks only re-hash blocks mined since the last trusted
+        checkpoint. A full audit ignores checkpoints and re-hashes every block,
+        split across a process pool since each block only depends on the
+        stored hash of its predecessor.
+        """
+        with self._chain_lock:
+            return self._verify_chain(full_audit, workers, chunk_size)
+    
+    def _verify_chain(self, full_audit: bool, workers: Optional[int], chunk_size: int) -> bool:
+        height = len(self.chain)
+        start = 1
+        if not full_audit:
+            trusted = self.verify_checkpoint.height
+            if trusted and trusted <= height:
+                start = max(1, self.verify_checkpoint.trusted(self.chain[trusted - 1]))
+        
+        if start < height:
+            ranges = [(i, min(i + chunk_size, height)) for i in range(start, height, chunk_size)]
+            if full_audit and len(ranges) > 1:
+                with ProcessPoolExecutor(max_workers=workers) as pool:
+                    futures = [
+                        pool.submit(_verify_block_range, self.chain[lo:hi], self.chain[lo - 1]["hash"], self.consensus)
+                        for lo, hi in ranges
+                    ]
+                    failures = [f.result() for f in futures]
+            else:
+                failures = []
+                for lo, hi in ranges:
+                    failures.append(_verify_block_range(self.chain[lo:hi], self.chain[lo - 1]["hash"], self.consensus))
+                    if failures[-1] is not None:
+                        break
             
-            # Verify link to previous block
-            if current_block["previous_hash"] != previous_block["hash"]:
+            if any(failure is not None for failure in failures):
+                self.verify_checkpoint.reset()
                 return False
         
+        self.verify_checkpoint.advance(height, self.chain[height - 1]["hash"])
         return True
     
+    def export_blocks(self, start: int = 0, stop: Optional[int] = None) -> bytes:
+        """Blocks [start, stop) in the compact storage encoding, for replication"""
+        return export_blocks(self.chain[start:stop])
+    
+    @staticmethod
+    def import_blocks(data: bytes) -> List[Dict]:
+        return list(iter_exported_blocks(data))
+    
+    @staticmethod
+    def block_header(block: Dict) -> Dict:
+        """Block without its transaction body; enough to check inclusion proofs"""
+        return {field: block[field] for field in HEADER_FIELDS if field in block}
+    
+    def get_inclusion_proof(self, block_index: int, tx_hash: str) -> Optional[Dict]:
+        """O(log n) Merkle proof that a transaction is in a block"""
+        block = self.store.get(block_index)
+        if "merkle_root" not in block:
+            return None
+        tx_hashes = [tx["hash"] for tx in block["transactions"]]
+        if tx_hash not in tx_hashes:
+            return None
+        return {
+            "tx_hash": tx_hash,
+            "proof": merkle_proof(tx_hashes, tx_hashes.index(tx_hash)),
+            "block_header": self.block_header(block)
+        }
+    
+    @staticmethod
+    def verify_inclusion_proof(proof: Dict, consensus: Union[ProofOfWorkConsensus, PermissionedConsensus]) -> bool:
+        """Check a proof against its block header alone, without the block body
+        
+        The header must carry a valid seal under the chain's consensus, so a
+        made-up header with an arbitrary Merkle root is rejected. Callers that
+        hold the chain should also anchor the header with is_header_on_chain.
+        """
+        header = proof.get("block_header") or {}
+        if "merkle_root" not in header:
+            return False
+        if not verify_merkle_proof(proof["tx_hash"], proof["proof"], header["merkle_root"]):
+            return False
+        return block_hash(header) == header["hash"] and consensus.verify_seal(header)
+    
+    def is_header_on_chain(self, header: Dict) -> bool:
+        """Header hash is a block of this chain at the claimed height (index lookup only)"""
+        return self.store.height_of(header.get("hash")) == header.get("index")
+    
+    def verify_signatures(self, signer: TransactionSigner, public_key: Optional[bytes] = None,
+                          start: int = 1, stop: Optional[int] = None) -> List[Position]:
+        """Positions of signed transactions in blocks [start, stop) whose signature fails"""
+        positions, records = [], []
+        for block in self.chain[start:stop]:
+            for tx_index, tx in enumerate(block["transactions"]):
+                if "digital_signature" in tx:
+                    positions.append((block["index"], tx_index))
+                    records.append(tx)
+        results = signer.verify_batch(records, public_key)
+        return [position for position, valid in zip(positions, results) if not valid]
+    
+    def _history_entry(self, position: Position, block: Optional[Dict] = None) -> Dict:
+        block_index, tx_index = position
+        block = block or self.store.get(block_index)
+        return {
+            "block_index": block["index"],
+            "transaction": block["transactions"][tx_index],
+            "block_hash": block["hash"]
+        }
+    
     def get_employee_history(self, employee_id: str) -> List[Dict]:
-        """Get all transactions for an employee"""
+        """Get all transactions for an employee via the employee index"""
         history = []
-        for block in self.chain[1:]:  # Skip genesis block
-            for tx in block["transactions"]:
-                if tx["employee_id"] == employee_id:
-                    history.append({
-                        "block_index": block["index"],
-                        "transaction": tx,
-                        "block_hash": block["hash"]
-                    })
+        block = None
+        for position in self.employee_index.positions(employee_id):
+            # Consecutive records often share a block; read it once
+            if block is None or block["index"] != position[0]:
+                block = self.store.get(position[0])
+            history.append(self._history_entry(position, block))
         return history
+    
+    def get_employee_summary(self, employee_id: str) -> Optional[Dict]:
+        """Record count plus first and latest record, reading at most two blocks"""
+        positions = self.employee_index.positions(employee_id)
+        if not positions:
+            return None
+        return {
+            "total_records": len(positions),
+            "first": self._history_entry(positions[0]),
+            "latest": self._history_entry(positions[-1])
+        }
 
 class HRMSSmartContract:
-    def __init__(self, blockchain: HRMSBlockchain):
+    def __init__(self, blockchain: HRMSBlockchain, sealer: Optional[BlockSealer] = None,
+                 signer: Optional[TransactionSigner] = None):
         self.blockchain = blockchain
+        # With a sealer, blocks are mined in the background instead of by mine_block() callers
+        self.sealer = sealer
+        self.signer = signer
+    
+    def _sign(self, transactions: List[HRTransaction]):
+        if self.signer is None:
+            return
+        for transaction in transactions:
+            transaction.hash = transaction.compute_hash()
+        self.signer.sign_batch(transactions)
+    
+    def _submit(self, transaction: HRTransaction):
+        self._sign([transaction])
+        if self.sealer is not None:
+            return self.sealer.submit(transaction)
+        self.blockchain.add_transaction(transaction)
+        return None
+    
+    def record_payroll_batch(self, payroll_results: Dict[str, Dict]) -> List[str]:
+        """Record a payroll run (employee_id -> salary data), signing it as one batch"""
+        timestamp = datetime.now()
+        transactions = [
+            HRTransaction(employee_id=employee_id, transaction_type="payroll", data=salary_data, timestamp=timestamp)
+            for employee_id, salary_data in payroll_results.items()
+        ]
+        self._sign(transactions)
+        if self.sealer is not None:
+            self.sealer.submit_many(transactions)
+        else:
+            self.blockchain.add_transactions(transactions)
+        return [transaction.hash for transaction in transactions]
+    
+    async def record_payroll_async(self, employee_id: str, salary_data: Dict) -> Dict:
+        """Record payroll and wait for its sealing receipt without blocking the event loop"""
+        if self.sealer is None:
+            raise RuntimeError("record_payroll_async requires a BlockSealer")
+        transaction = HRTransaction(
+            employee_id=employee_id,
+            transaction_type="payroll",
+            data=salary_data,
+            timestamp=datetime.now()
+        )
+        self._sign([transaction])
+        return await self.sealer.submit_async(transaction)
     
     def record_payroll(self, employee_id: str, salary_data: Dict):
         """Record payroll transaction"""
@@ -160,9 +436,47 @@ class HRMSSmartContract:
             data=salary_data,
             timestamp=datetime.now()
         )
-        self.blockchain.add_transaction(transaction)
+        self._submit(transaction)
         return transaction.hash
     
+    def anchor_payroll_run(self, run_id: str, period: str, payslips: Dict[str, Dict]) -> Dict:
+        """Anchor a whole payroll run (employee_id -> payslip) as one transaction
+        
+        Returns the run's Merkle root and a proof per employee; store each
+        proof with the payslip it belongs to.
+        """
+        anchor = PayrollRunAnchor.build(run_id, period, payslips)
+        transaction = HRTransaction(
+            employee_id=anchor_employee_id(run_id),
+            transaction_type=ANCHOR_TRANSACTION_TYPE,
+            data=anchor.anchor_data(),
+            timestamp=datetime.now()
+        )
+        self._submit(transaction)
+        return {
+            "run_id": run_id,
+            "merkle_root": anchor.merkle_root,
+            "anchor_tx_hash": transaction.hash,
+            "proofs": anchor.payslip_proofs(transaction.hash)
+        }
+    
+    def verify_payslip(self, payslip: Dict, proof: Dict) -> Dict:
+        """Check a payslip against its proof and the run's anchor on chain"""
+        if not verify_payslip_proof(payslip, proof):
+            return {"verified": False, "message": "Payslip does not match its proof"}
+        
+        for entry in self.blockchain.get_employee_history(anchor_employee_id(proof["run_id"])):
+            tx = entry["transaction"]
+            if tx["hash"] == proof["anchor_tx_hash"] and tx["data"].get("merkle_root") == proof["merkle_root"]:
+                return {
+                    "verified": True,
+                    "run_id": proof["run_id"],
+                    "employee_id": proof["employee_id"],
+                    "block_index": entry["block_index"],
+                    "block_hash": entry["block_hash"]
+                }
+        return {"verified": False, "message": "Payroll run is not anchored on chain"}
+    
     def record_attendance(self, employee_id: str, attendance_data: Dict):
         """Record attendance transaction"""
         transaction = HRTransaction(
@@ -171,20 +485,20 @@ class HRMSSmartContract:
             data=attendance_data,
             timestamp=datetime.now()
         )
-        self.blockchain.add_transaction(transaction)
+        self._submit(transaction)
         return transaction.hash
     
     def verify_employment(self, employee_id: str) -> Dict:
         """Verify employment history from blockchain"""
-        history = self.blockchain.get_employee_history(employee_id)
+        summary = self.blockchain.get_employee_summary(employee_id)
         
-        if not history:
+        if not summary:
             return {"verified": False, "message": "No employment records found"}
         
         return {
             "verified": True,
             "employee_id": employee_id,
-            "total_records": len(history),
-            "first_record": history[0]["transaction"]["timestamp"] if history else None,
-            "latest_record": history[-1]["transaction"]["timestamp"] if history else None
+            "total_records": summary["total_records"],
+            "first_record": summary["first"]["transaction"]["timestamp"],
+            "latest_record": summary["latest"]["transaction"]["timestamp"]
         }
\ No newline at end of file
@@ -0,0 +1,74 @@
+"""Merkle trees over transaction hashes
+
+Leaves and interior nodes are hashed with distinct prefixes (0x00 / 0x01) so
+an interior node can never be passed off as a transaction. An odd node at the
+end of a level is promoted unchanged rather than duplicated.
+"""
+
+import hashlib
+from typing import Dict, List
+
+EMPTY_ROOT = hashlib.sha256(b"").hexdigest()
+
+def _leaf(tx_hash: str) -> bytes:
+    return hashlib.sha256(b"\x00" + bytes.fromhex(tx_hash)).digest()
+
+def _node(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(b"\x01" + left + right).digest()
+
+def _next_level(level: List[bytes]) -> List[bytes]:
+    paired = [_node(level[i], level[i + 1]) for i in range(0, len(level) - 1, 2)]
+    if len(level) % 2:
+        paired.append(level[-1])
+    return paired
+
+def merkle_root(tx_hashes: List[str]) -> str:
+    """Merkle root over hex transaction hashes"""
+    if not tx_hashes:
+        return EMPTY_ROOT
+    level = [_leaf(h) for h in tx_hashes]
+    while len(level) > 1:
+        level = _next_level(level)
+    return level[0].hex()
+
+def merkle_proof(tx_hashes: List[str], index: int) -> List[Dict[str, str]]:
+    """Sibling path from leaf `index` to the root: O(log n) entries"""
+    if not 0 <= index < len(tx_hashes):
+        raise IndexError(f"Transaction {index} out of range")
+    proof = []
+    level = [_leaf(h) for h in tx_hashes]
+    while len(level) > 1:
+        sibling = index ^ 1
+        if sibling < len(level):
+            proof.append({"hash": level[sibling].hex(), "position": "left" if sibling < index else "right"})
+        level = _next_level(level)
+        index //= 2
+    return proof
+
+def merkle_proofs(tx_hashes: List[str]) -> List[List[Dict[str, str]]]:
+    """Proofs for every leaf from one pass over the tree: O(n log n) instead of O(n^2)"""
+    proofs: List[List[Dict[str, str]]] = [[] for _ in tx_hashes]
+    level = [_leaf(h) for h in tx_hashes]
+    # members[i] = leaves under node i of the current level
+    members = [[i] for i in range(len(tx_hashes))]
+    while len(level) > 1:
+        for i in range(0, len(level) - 1, 2):
+            for leaf in members[i]:
+                proofs[leaf].append({"hash": level[i + 1].hex(), "position": "right"})
+            for leaf in members[i + 1]:
+                proofs[leaf].append({"hash": level[i].hex(), "position": "left"})
+        members = [members[i] + members[i + 1] if i + 1 < len(members) else members[i]
+                   for i in range(0, len(members), 2)]
+        level = _next_level(level)
+    return proofs
+
+def verify_merkle_proof(tx_hash: str, proof: List[Dict[str, str]], root: str) -> bool:
+    """Check a transaction hash against a Merkle root using only its proof path"""
+    try:
+        node = _leaf(tx_hash)
+        for step in proof:
+            sibling = bytes.fromhex(step["hash"])
+            node = _node(sibling, node) if step["position"] == "left" else _node(node, sibling)
+    except (ValueError, KeyError, TypeError):
+        return False
+    return node.hex() == root
@@ -0,0 +1,79 @@
+"""Bulk anchoring of payroll runs
+
+A whole payroll run is committed to the chain as one transaction holding the
+Merkle root over every employee's payslip, so chain growth is one record per
+run rather than one per employee per month. Each employee gets a payslip
+proof: their leaf salt plus the sibling path to the anchored root.
+
+Leaves are salted per employee, so sibling hashes handed out in one proof
+can't be brute-forced back into a colleague's (low-entropy) salary figures.
+"""
+
+import hashlib
+import secrets
+from dataclasses import dataclass, field
+from typing import Dict, List
+from .encoding import encode_value
+from .merkle import merkle_proofs, merkle_root, verify_merkle_proof
+
+ANCHOR_TRANSACTION_TYPE = "payroll_anchor"
+
+def anchor_employee_id(run_id: str) -> str:
+    """Pseudo employee id the anchor transaction is indexed under"""
+    return f"payroll-run:{run_id}"
+
+def payslip_leaf_hash(run_id: str, employee_id: str, payslip: Dict, salt: str) -> str:
+    return hashlib.sha256(encode_value([run_id, employee_id, salt, payslip])).hexdigest()
+
+@dataclass
+class PayrollRunAnchor:
+    run_id: str
+    period: str
+    employee_ids: List[str]
+    leaf_hashes: List[str]
+    salts: List[str]
+    merkle_root: str
+    proofs: List[List[Dict[str, str]]] = field(repr=False)
+
+    @classmethod
+    def build(cls, run_id: str, period: str, payslips: Dict[str, Dict]) -> "PayrollRunAnchor":
+        """Hash every payslip of a run (employee_id -> payslip) into one root"""
+        employee_ids = sorted(payslips)
+        salts = [secrets.token_hex(16) for _ in employee_ids]
+        leaf_hashes = [
+            payslip_leaf_hash(run_id, employee_id, payslips[employee_id], salt)
+            for employee_id, salt in zip(employee_ids, salts)
+        ]
+        return cls(run_id, period, employee_ids, leaf_hashes, salts,
+                   merkle_root(leaf_hashes), merkle_proofs(leaf_hashes))
+
+    def anchor_data(self) -> Dict:
+        """Payload of the single on-chain transaction for this run"""
+        return {
+            "run_id": self.run_id,
+            "period": self.period,
+            "merkle_root": self.merkle_root,
+            "employee_count": len(self.employee_ids)
+        }
+
+    def payslip_proofs(self, anchor_tx_hash: str) -> Dict[str, Dict]:
+        """employee_id -> proof linking that employee's payslip to the anchored root"""
+        return {
+            employee_id: {
+                "run_id": self.run_id,
+                "employee_id": employee_id,
+                "salt": salt,
+                "proof": proof,
+                "merkle_root": self.merkle_root,
+                "anchor_tx_hash": anchor_tx_hash
+            }
+            for employee_id, salt, proof in zip(self.employee_ids, self.salts, self.proofs)
+        }
+
+def verify_payslip_proof(payslip: Dict, proof: Dict) -> bool:
+    """Payslip hashes up to the proof's root (the root itself must be checked on chain)"""
+    try:
+        leaf = payslip_leaf_hash(proof["run_id"], proof["employee_id"], payslip, proof["salt"])
+    except (KeyError, TypeError):
+        return False
+    return verify_merkle_proof(leaf, proof.get("proof", []), proof.get("merkle_root", ""))
@@ -0,0 +1,161 @@
+"""Background block sealing for HRMSBlockchain
+
+Transactions submitted to a BlockSealer are added to the pending pool right
+away, and a worker thread seals a block once max_transactions are pending or
+the oldest has waited max_wait_ms. Callers get a Future (or an awaitable via
+submit_async) that resolves to a receipt once their transaction is in a block,
+so request handlers never run proof of work themselves.
+"""
+
+import asyncio
+import threading
+import time
+from collections import defaultdict, deque
+from concurrent.futures import Future
+from typing import Deque, Dict, List, Optional
+
+class BlockSealer:
+    def __init__(self, blockchain, max_transactions: int = 500, max_wait_ms: float = 200):
+        self.blockchain = blockchain
+        self.max_transactions = max_transactions
+        self.max_wait = max_wait_ms / 1000
+        self.blocks_sealed = 0
+        self.last_error: Optional[BaseException] = None
+
+        self._cond = threading.Condition()
+        # tx hash -> futures in submission order; equal hashes resolve FIFO
+        self._waiters: Dict[str, Deque[Future]] = defaultdict(deque)
+        self._waiting = 0
+        self._oldest: Optional[float] = None
+        self._flush_requested = False
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name="hrms-block-sealer", daemon=True)
+        self._thread.start()
+
+    def submit(self, transaction) -> Future:
+        """Queue a transaction for sealing; the Future resolves to its receipt"""
+        future: Future = Future()
+        with self._cond:
+            if self._stopping:
+                raise RuntimeError("BlockSealer is closed")
+            self.blockchain.add_transaction(transaction)
+            self._waiters[transaction.hash].append(future)
+            self._waiting += 1
+            if self._oldest is None:
+                # Wake the worker so it starts the max_wait timer for this batch
+                self._oldest = time.monotonic()
+                self._cond.notify()
+            elif self._waiting >= self.max_transactions:
+                self._cond.notify()
+        return future
+
+    def submit_many(self, transactions) -> List[Future]:
+        """Queue a batch (e.g. a payroll run) with one lock acquisition"""
+        futures = [Future() for _ in transactions]
+        with self._cond:
+            if self._stopping:
+                raise RuntimeError("BlockSealer is closed")
+            self.blockchain.add_transactions(transactions)
+            for transaction, future in zip(transactions, futures):
+                self._waiters[transaction.hash].append(future)
+            self._waiting += len(transactions)
+            if self._oldest is None:
+                self._oldest = time.monotonic()
+            self._cond.notify()
+        return futures
+
+    def submit_async(self, transaction) -> asyncio.Future:
+        return asyncio.wrap_future(self.submit(transaction))
+
+    def _due(self) -> bool:
+        if self._stopping or self._flush_requested or self._waiting >= self.max_transactions:
+            return True
+        return self._oldest is not None and time.monotonic() - self._oldest >= self.max_wait
+
+    def _run(self):
+        while True:
+            with self._cond:
+                while not self._due():
+                    timeout = None if self._oldest is None else self._oldest + self.max_wait - time.monotonic()
+                    self._cond.wait(timeout)
+                if self._stopping and not self.blockchain.pending_transactions:
+                    return
+            if not self._seal_once() and self._stopping:
+                self._fail_waiters(self.last_error)
+                return
+
+    def _fail_waiters(self, exc: BaseException):
+        with self._cond:
+            futures = [f for queue in self._waiters.values() for f in queue]
+            self._waiters.clear()
+            self._waiting = 0
+        for future in futures:
+            future.set_exception(exc)
+
+    def _seal_once(self) -> bool:
+        try:
+            block = self.blockchain.mine_block(max_transactions=self.max_transactions)
+        except Exception as exc:
+            # mine_block puts the batch back; retry on the next tick
+            self.last_error = exc
+            time.sleep(self.max_wait)
+            return False
+        if "error" in block:
+            with self._cond:
+                self._oldest = None
+                self._flush_requested = False
+            return True
+
+        receipts = []
+        with self._cond:
+            for position, tx in enumerate(block["transactions"]):
+                futures = self._waiters.get(tx["hash"])
+                if not futures:
+                    continue  # added directly to the chain, not through the sealer
+                receipts.append((futures.popleft(), {
+                    "tx_hash": tx["hash"],
+                    "block_index": block["index"],
+                    "block_hash": block["hash"],
+                    "position": position
+                }))
+                if not futures:
+                    del self._waiters[tx["hash"]]
+            self._waiting -= len(receipts)
+            if not self.blockchain.pending_transactions:
+                self._oldest = None
+                self._flush_requested = False
+            else:
+                self._oldest = time.monotonic()
+            self.blocks_sealed += 1
+        for future, receipt in receipts:
+            future.set_result(receipt)
+        return True
+
+    def flush(self, timeout: Optional[float] = None):
+        """Seal everything pending now instead of waiting for the batching policy"""
+        with self._cond:
+            futures = [f for queue in self._waiters.values() for f in queue]
+            if futures:
+                self._flush_requested = True
+                self._cond.notify()
+        try:
+            for future in futures:
+                future.result(timeout)
+        finally:
+            with self._cond:
+                self._flush_requested = False
+
+    def close(self, timeout: Optional[float] = None):
+        """Seal remaining transactions and stop the worker"""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify()
+        self._thread.join(timeout)
+
+    def stats(self) -> Dict:
+        with self._cond:
+            return {
+                "pending": len(self.blockchain.pending_transactions),
+                "awaiting_receipt": self._waiting,
+                "blocks_sealed": self.blocks_sealed
+            }
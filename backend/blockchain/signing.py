@@ -0,0 +1,99 @@
+"""Batch Ed25519 signing and verification of HR transactions
+
+A transaction is signed over its raw SHA-256 hash, so signatures stay valid
+wherever the transaction is stored. Small batches are signed inline; large
+ones (a month-end payroll run) are split into chunks across a process pool.
+Workers receive raw key bytes since key objects don't pickle.
+"""
+
+import base64
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional, Tuple
+from cryptography.exceptions import InvalidSignature
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey, Ed25519PublicKey
+
+def _raw_public(key: Ed25519PublicKey) -> bytes:
+    return key.public_bytes(serialization.Encoding.Raw, serialization.PublicFormat.Raw)
+
+def _sign_chunk(private_bytes: bytes, digests: List[bytes]) -> List[bytes]:
+    key = Ed25519PrivateKey.from_private_bytes(private_bytes)
+    return [key.sign(digest) for digest in digests]
+
+def _verify_chunk(public_bytes: bytes, pairs: List[Tuple[bytes, bytes]]) -> List[bool]:
+    key = Ed25519PublicKey.from_public_bytes(public_bytes)
+    results = []
+    for digest, signature in pairs:
+        try:
+            key.verify(signature, digest)
+            results.append(True)
+        except InvalidSignature:
+            results.append(False)
+    return results
+
+class TransactionSigner:
+    def __init__(self, private_key: Optional[Ed25519PrivateKey] = None, workers: Optional[int] = None,
+                 chunk_size: int = 2048, parallel_from: int = 4096):
+        if private_key is None and os.getenv("HRMS_TX_SIGNING_KEY"):
+            with open(os.getenv("HRMS_TX_SIGNING_KEY"), "rb") as f:
+                private_key = serialization.load_pem_private_key(f.read(), password=None)
+        self.private_key = private_key
+        self.workers = workers or os.cpu_count() or 1
+        self.chunk_size = chunk_size
+        # Below this, pool start-up and pickling cost more than signing inline
+        self.parallel_from = parallel_from
+        self._pool: Optional[ProcessPoolExecutor] = None
+
+    @property
+    def public_key_bytes(self) -> bytes:
+        return _raw_public(self.private_key.public_key())
+
+    def _map_chunks(self, func, key_bytes: bytes, items: List) -> List:
+        if len(items) < self.parallel_from or self.workers == 1:
+            return func(key_bytes, items)
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        chunks = [items[i:i + self.chunk_size] for i in range(0, len(items), self.chunk_size)]
+        results = []
+        for chunk_result in self._pool.map(func, [key_bytes] * len(chunks), chunks):
+            results.extend(chunk_result)
+        return results
+
+    def sign_batch(self, transactions: List) -> List:
+        """Set digital_signature on each hashed HRTransaction, in place"""
+        if self.private_key is None:
+            raise ValueError("Transaction signing requires a key (HRMS_TX_SIGNING_KEY)")
+        if any(tx.hash is None for tx in transactions):
+            raise ValueError("Transactions must be hashed before signing")
+        private_bytes = self.private_key.private_bytes(
+            serialization.Encoding.Raw, serialization.PrivateFormat.Raw, serialization.NoEncryption()
+        )
+        signatures = self._map_chunks(_sign_chunk, private_bytes, [bytes.fromhex(tx.hash) for tx in transactions])
+        for tx, signature in zip(transactions, signatures):
+            tx.digital_signature = base64.b64encode(signature).decode()
+        return transactions
+
+    def verify_batch(self, records: Iterable[Dict], public_key: Optional[bytes] = None) -> List[bool]:
+        """Check recorded transactions (dicts with hash and digital_signature)
+
+        Defaults to this signer's own public key. Unsigned or malformed
+        records verify as False.
+        """
+        public_key = public_key or self.public_key_bytes
+        pairs, positions, results = [], [], []
+        for i, record in enumerate(records):
+            results.append(False)
+            try:
+                pairs.append((bytes.fromhex(record["hash"]), base64.b64decode(record["digital_signature"])))
+                positions.append(i)
+            except (KeyError, TypeError, ValueError):
+                continue
+        for i, valid in zip(positions, self._map_chunks(_verify_chunk, public_key, pairs)):
+            results[i] = valid
+        return results
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
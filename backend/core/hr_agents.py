@@ -1,12 +1,12 @@
 from langchain.agents import AgentExecutor, Tool
-from langchain.chat_models import ChatOpenAI
 from langchain.agents import initialize_agent
 from .malaysian_compliance import MalaysianCompliance
 from .models import EPFCalculation, HRDFCourse
+from .llm_backends import get_chat_model
 
 class HRAgents:
     def __init__(self):
-        self.llm = ChatOpenAI(model="gpt-3.5-turbo", temperature=0)
+        self.llm = get_chat_model(model="gpt-3.5-turbo", temperature=0)
     
     def create_hr_agent(self):
         """Creates LangChain HR agent with Malaysian compliance tools"""
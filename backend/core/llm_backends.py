@@ -0,0 +1,48 @@
+"""Pluggable LLM backends for HR agents
+
+Every agent resolves its chat model through get_chat_model() instead of
+constructing ChatOpenAI directly. The backend is picked per call or via the
+HRMS_LLM_BACKEND environment variable:
+
+- openai: hosted OpenAI chat-completions (default)
+- local:  the deterministic stand-in server in agents/local_llm.py, for
+          offline load tests and latency benchmarks
+"""
+
+import os
+from typing import Callable, Dict, Optional
+from langchain_openai import ChatOpenAI
+
+DEFAULT_BACKEND = "openai"
+LOCAL_BASE_URL = "http://localhost:8081/v1"
+
+BackendFactory = Callable[..., ChatOpenAI]
+
+_backends: Dict[str, BackendFactory] = {}
+
+def register_backend(name: str, factory: BackendFactory):
+    """Register a chat model factory under a backend name"""
+    _backends[name] = factory
+
+def available_backends() -> list:
+    return sorted(_backends)
+
+def _openai_backend(model: str, **kwargs) -> ChatOpenAI:
+    return ChatOpenAI(model=model, **kwargs)
+
+def _local_backend(model: str, **kwargs) -> ChatOpenAI:
+    # The stand-in speaks the same protocol, so only the endpoint changes
+    kwargs.setdefault("base_url", os.getenv("HRMS_LLM_BASE_URL", LOCAL_BASE_URL))
+    kwargs.setdefault("api_key", os.getenv("HRMS_LLM_API_KEY", "local-stand-in"))
+    kwargs.setdefault("max_retries", 0)
+    return ChatOpenAI(model=model, **kwargs)
+
+register_backend("openai", _openai_backend)
+register_backend("local", _local_backend)
+
+def get_chat_model(model: str, backend: Optional[str] = None, **kwargs) -> ChatOpenAI:
+    """Resolve a chat model for an agent from the configured backend"""
+    backend = backend or os.getenv("HRMS_LLM_BACKEND", DEFAULT_BACKEND)
+    if backend not in _backends:
+        raise ValueError(f"Unknown LLM backend: {backend}. Available: {', '.join(available_backends())}")
+    return _backends[backend](model, **kwargs)
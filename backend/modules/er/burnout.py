@@ -0,0 +1,107 @@
+"""Workforce-wide burnout scoring
+
+Features are held as one NumPy column per input, so the risk formula runs
+once over the whole workforce instead of once per employee. The same
+burnout_risk function scores a single employee from plain floats, so the
+per-employee endpoint and the nightly job can't drift apart. Only employees
+at or above the alert threshold are persisted, for the dashboard's
+burnout_alerts.
+"""
+
+from dataclasses import dataclass
+from datetime import date
+from typing import Any, Dict, Iterable, List, Optional
+import numpy as np
+from sqlalchemy import func, insert
+from .models import BurnoutScore
+
+MEDIUM_RISK = 4.0
+HIGH_RISK = 7.0
+MAX_RISK = 10.0
+
+def burnout_risk(overtime_hours, leave_taken, workload_score, is_muslim, is_chinese):
+    """Unclipped risk; arguments may be scalars or equal-length arrays"""
+    # Malaysian-specific factors
+    ramadan_factor = 0.2 * is_muslim
+    cny_factor = 0.15 * is_chinese
+    risk = (overtime_hours * 0.1) + (10 - leave_taken) * 0.05 + (workload_score * 0.1)
+    return risk - (ramadan_factor + cny_factor)  # Cultural adjustment
+
+def risk_level(risk: float) -> str:
+    return "high" if risk > HIGH_RISK else "medium" if risk > MEDIUM_RISK else "low"
+
+@dataclass
+class WorkforceFeatures:
+    employee_ids: np.ndarray
+    overtime_hours: np.ndarray
+    leave_taken: np.ndarray
+    workload_score: np.ndarray
+    is_muslim: np.ndarray
+    is_chinese: np.ndarray
+    departments: List[Optional[str]]
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[Dict[str, Any]]) -> "WorkforceFeatures":
+        """Columns from employee feature rows, e.g. session.execute(...).mappings()"""
+        rows = list(rows)
+
+        def column(name, default, dtype=np.float64):
+            values = (row.get(name) for row in rows)
+            return np.fromiter((default if v is None else v for v in values), dtype=dtype, count=len(rows))
+
+        return cls(
+            employee_ids=column("employee_id", 0, np.int64),
+            overtime_hours=column("overtime_hours", 0.0),
+            leave_taken=column("leave_taken", 0.0),
+            workload_score=column("workload_score", 5.0),
+            is_muslim=np.fromiter((row.get("religion") == "Islam" for row in rows), dtype=bool, count=len(rows)),
+            is_chinese=np.fromiter((row.get("ethnicity") == "Chinese" for row in rows), dtype=bool, count=len(rows)),
+            departments=[row.get("department") for row in rows]
+        )
+
+    def __len__(self) -> int:
+        return len(self.employee_ids)
+
+def score_workforce(features: WorkforceFeatures) -> np.ndarray:
+    return burnout_risk(features.overtime_hours, features.leave_taken, features.workload_score,
+                        features.is_muslim, features.is_chinese)
+
+def run_burnout_scoring(session, features: WorkforceFeatures, threshold: float = MEDIUM_RISK,
+                        scored_on: Optional[date] = None) -> Dict[str, Any]:
+    """Score everyone, replace the day's stored alerts with those above threshold"""
+    scored_on = scored_on or date.today()
+    risk = score_workforce(features)
+    flagged = np.flatnonzero(risk > threshold)
+    levels = np.where(risk[flagged] > HIGH_RISK, "high", "medium")
+    clipped = np.round(np.minimum(risk[flagged], MAX_RISK), 2)
+
+    # Re-running a night's job overwrites rather than duplicates
+    session.query(BurnoutScore).filter(BurnoutScore.scored_on == scored_on).delete(synchronize_session=False)
+    if len(flagged):
+        session.execute(insert(BurnoutScore), [
+            {"employee_id": int(features.employee_ids[i]), "scored_on": scored_on, "burnout_risk": float(score),
+             "risk_level": str(level), "department": features.departments[i]}
+            for i, score, level in zip(flagged, clipped, levels)
+        ])
+    session.commit()
+    return {
+        "scored_on": scored_on.isoformat(),
+        "employees_scored": len(features),
+        "alerts": int(len(flagged)),
+        "high_risk": int(np.count_nonzero(levels == "high"))
+    }
+
+def latest_burnout_alerts(session, limit: Optional[int] = None) -> List[BurnoutScore]:
+    """Alerts from the most recent scoring run, highest risk first"""
+    latest = session.query(func.max(BurnoutScore.scored_on)).scalar()
+    if latest is None:
+        return []
+    query = (session.query(BurnoutScore).filter(BurnoutScore.scored_on == latest)
+             .order_by(BurnoutScore.burnout_risk.desc()))
+    return query.limit(limit).all() if limit else query.all()
+
+def burnout_alert_count(session) -> int:
+    latest = session.query(func.max(BurnoutScore.scored_on)).scalar()
+    if latest is None:
+        return 0
+    return session.query(func.count(BurnoutScore.id)).filter(BurnoutScore.scored_on == latest).scalar()
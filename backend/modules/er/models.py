@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Float, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Date, DateTime, Text, Float, Boolean, ForeignKey
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
@@ -13,8 +13,30 @@ class PulseSurvey(Base):
     sentiment_score = Column(Float)  # AI-analyzed sentiment
     feedback_text = Column(Text)
     department = Column(String(50))
+    ethnicity = Column(String(20), nullable=True)
+    age_group = Column(String(10), nullable=True)
     is_anonymous = Column(Boolean, default=True)
 
+class PulseRollup(Base):
+    """Running engagement and sentiment sums per dimension value (overall, department, ethnicity, age_group)"""
+    __tablename__ = "pulse_rollups"
+    
+    dimension = Column(String(20), primary_key=True)
+    value = Column(String(50), primary_key=True)
+    responses = Column(Integer, default=0)
+    engagement_sum = Column(Float, default=0.0)
+    engagement_sumsq = Column(Float, default=0.0)
+    sentiment_sum = Column(Float, default=0.0)
+
+class PulseScoreBin(Base):
+    """Engagement histogram in 0.1 steps, the percentile sketch for each rollup"""
+    __tablename__ = "pulse_score_bins"
+    
+    dimension = Column(String(20), primary_key=True)
+    value = Column(String(50), primary_key=True)
+    bin = Column(Integer, primary_key=True)
+    count = Column(Integer, default=0)
+
 class MisconductCase(Base):
     __tablename__ = "misconduct_cases"
     
@@ -32,6 +54,19 @@ class WhistleblowReport(Base):
     id = Column(Integer, primary_key=True)
     report_id = Column(String(20), unique=True)  # Anonymous ID
     category = Column(String(50))  # harassment, corruption, safety
-    description = Column(Text)
+    description = Column(Text)  # Fernet-encrypted
     status = Column(String(20))  # submitted, investigating, closed
-    created_at = Column(DateTime)
\ No newline at end of file
+    routed_to = Column(String(50))
+    tracking_hash = Column(String(64), index=True)  # sha256 of the reporter's tracking code
+    created_at = Column(DateTime)
+
+class BurnoutScore(Base):
+    """Employees above the alert threshold in a nightly workforce scoring run"""
+    __tablename__ = "burnout_scores"
+    
+    id = Column(Integer, primary_key=True)
+    employee_id = Column(Integer, ForeignKey("employees.id"))
+    scored_on = Column(Date, index=True)
+    burnout_risk = Column(Float)
+    risk_level = Column(String(10))  # medium, high
+    department = Column(String(50))
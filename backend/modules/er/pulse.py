@@ -0,0 +1,134 @@
+"""Streaming rollups for pulse survey responses
+
+Each response updates, for every group it belongs to (overall, department,
+ethnicity, age group), a running count, sum and sum of squares of the
+engagement score plus a sentiment sum, and bumps one bucket of a fixed
+0.1-wide engagement histogram. Means and standard deviations come straight
+from the sums and percentiles from the histogram, so results read a few
+hundred rows however many responses a campaign collects.
+"""
+
+import math
+from collections import defaultdict
+from typing import Dict, List
+from sqlalchemy import Integer, cast, func
+from backend.core.database import increment_counters
+from .models import PulseRollup, PulseScoreBin, PulseSurvey
+
+MAX_SCORE = 10.0
+BINS_PER_POINT = 10
+OVERALL = "all"
+UNKNOWN = "Unknown"
+PERCENTILES = (25, 50, 75, 90)
+
+def score_bin(score: float) -> int:
+    # Round half up, matching the FLOOR in rebuild_pulse_rollups
+    return int(min(max(score, 0.0), MAX_SCORE) * BINS_PER_POINT + 0.5)
+
+def _score_bin_sql(score):
+    # PostgreSQL rounds when casting to integer, so floor first to round half up exactly once
+    return cast(func.floor(score * BINS_PER_POINT + 0.5), Integer)
+
+def _groups(survey: PulseSurvey) -> List[tuple]:
+    return [
+        ("overall", OVERALL),
+        ("department", survey.department or UNKNOWN),
+        ("ethnicity", survey.ethnicity or UNKNOWN),
+        ("age_group", survey.age_group or UNKNOWN)
+    ]
+
+def record_response(session, survey: PulseSurvey):
+    """Fold one stored response into the rollups"""
+    engagement = float(survey.engagement_score)
+    sentiment = float(survey.sentiment_score or 0.0)
+    bucket = score_bin(engagement)
+    for dimension, value in _groups(survey):
+        # Upserts with x = x + delta: concurrent submissions neither lose increments
+        # nor collide inserting a group's first row
+        increment_counters(session, PulseRollup, {"dimension": dimension, "value": value}, {
+            "responses": 1,
+            "engagement_sum": engagement,
+            "engagement_sumsq": engagement * engagement,
+            "sentiment_sum": sentiment
+        })
+        increment_counters(session, PulseScoreBin, {"dimension": dimension, "value": value, "bin": bucket},
+                           {"count": 1})
+
+def rebuild_pulse_rollups(session):
+    """Recompute all rollups from stored responses with GROUP BY"""
+    session.query(PulseRollup).delete()
+    session.query(PulseScoreBin).delete()
+
+    score = PulseSurvey.engagement_score
+    sentiment = func.coalesce(PulseSurvey.sentiment_score, 0.0)
+    bucket = _score_bin_sql(score)
+    columns = {"overall": None, "department": PulseSurvey.department,
+               "ethnicity": PulseSurvey.ethnicity, "age_group": PulseSurvey.age_group}
+    for dimension, column in columns.items():
+        group = [column] if column is not None else []
+        query = session.query(*group, func.count(), func.sum(score), func.sum(score * score), func.sum(sentiment))
+        for row in query.filter(score.isnot(None)).group_by(*group):
+            value = (row[0] or UNKNOWN) if column is not None else OVERALL
+            responses, total, total_sq, sentiment_total = row[-4:]
+            session.add(PulseRollup(dimension=dimension, value=value, responses=responses, engagement_sum=total,
+                                    engagement_sumsq=total_sq, sentiment_sum=sentiment_total))
+        bins: Dict = defaultdict(int)
+        for row in session.query(*group, bucket, func.count()).filter(score.isnot(None)).group_by(*group, bucket):
+            value = (row[0] or UNKNOWN) if column is not None else OVERALL
+            bins[(value, min(max(int(row[-2]), 0), int(MAX_SCORE * BINS_PER_POINT)))] += row[-1]
+        for (value, bin_index), count in bins.items():
+            session.add(PulseScoreBin(dimension=dimension, value=value, bin=bin_index, count=count))
+    session.flush()
+
+def _percentiles(histogram: Dict[int, int], responses: int) -> Dict[str, float]:
+    result = {}
+    ordered = sorted(histogram.items())
+    for pct in PERCENTILES:
+        rank = max(math.ceil(pct / 100 * responses), 1)
+        seen = 0
+        for bin_index, count in ordered:
+            seen += count
+            if seen >= rank:
+                result[f"p{pct}"] = bin_index / BINS_PER_POINT
+                break
+    return result
+
+def _statistics(rollup: PulseRollup, histogram: Dict[int, int]) -> Dict[str, float]:
+    n = rollup.responses
+    mean = rollup.engagement_sum / n
+    variance = max(rollup.engagement_sumsq / n - mean * mean, 0.0)
+    stats = {
+        "responses": n,
+        "mean": round(mean, 2),
+        "stddev": round(math.sqrt(variance), 2),
+        "average_sentiment": round(rollup.sentiment_sum / n, 3)
+    }
+    stats.update(_percentiles(histogram, n))
+    return stats
+
+def pulse_results(session) -> Dict:
+    """Survey statistics per dimension value, read from the rollups"""
+    histograms: Dict = defaultdict(dict)
+    for dimension, value, bin_index, count in session.query(
+        PulseScoreBin.dimension, PulseScoreBin.value, PulseScoreBin.bin, PulseScoreBin.count
+    ):
+        histograms[(dimension, value)][bin_index] = count
+
+    stats: Dict[str, Dict[str, Dict]] = defaultdict(dict)
+    for rollup in session.query(PulseRollup).filter(PulseRollup.responses > 0):
+        stats[rollup.dimension][rollup.value] = _statistics(rollup, histograms[(rollup.dimension, rollup.value)])
+
+    def means(dimension):
+        return {value: s["mean"] for value, s in sorted(stats.get(dimension, {}).items())}
+
+    overall = stats.get("overall", {}).get(OVERALL)
+    return {
+        "total_responses": overall["responses"] if overall else 0,
+        "overall_satisfaction": overall["mean"] if overall else None,
+        "department_breakdown": means("department"),
+        "demographic_insights": {
+            "by_ethnicity": means("ethnicity"),
+            "by_age_group": means("age_group")
+        },
+        "statistics": {dimension: dict(sorted(values.items())) for dimension, values in stats.items()}
+    }
@@ -0,0 +1,143 @@
+"""Trending topics over pulse survey comments
+
+Comments are embedded once, when they are ingested, and assigned to the
+nearest topic centroid by cosine similarity; a comment unlike every existing
+topic starts a new one (up to max_topics). Centroids move by mini-batch
+k-means updates with a per-topic learning rate of batch size over topic size,
+so topics drift with the conversation without ever reclustering. Each topic
+keeps hourly (mentions, sentiment sum) buckets, and trending() reports the
+topics most mentioned within the sliding window along with their sentiment
+over that window.
+"""
+
+import re
+import threading
+from collections import Counter, deque
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Sequence
+import numpy as np
+
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have i in is it its my no not of on or our so that the their
+they this to too very was we were with you your
+ada akan dan dengan di ini itu kami kita ke pun saya sangat tak tidak untuk yang je la lah
+""".split())
+
+def content_words(text: str) -> List[str]:
+    return [w for w in re.findall(r"[^\W\d_]+", (text or "").lower()) if w not in STOPWORDS and len(w) > 2]
+
+class Topic:
+    __slots__ = ("id", "centroid", "size", "terms", "buckets")
+
+    def __init__(self, topic_id: int, centroid: np.ndarray):
+        self.id = topic_id
+        self.centroid = centroid
+        self.size = 0
+        self.terms: Counter = Counter()
+        # [hour, mentions, sentiment sum], oldest first
+        self.buckets: deque = deque()
+
+    def label(self, words: int = 2) -> str:
+        return " ".join(term for term, _ in self.terms.most_common(words)) or f"topic {self.id}"
+
+    def record(self, hour: int, sentiment: float):
+        if self.buckets and self.buckets[-1][0] == hour:
+            self.buckets[-1][1] += 1
+            self.buckets[-1][2] += sentiment
+        else:
+            self.buckets.append([hour, 1, sentiment])
+
+    def expire(self, oldest_hour: int):
+        while self.buckets and self.buckets[0][0] < oldest_hour:
+            self.buckets.popleft()
+
+class TopicModel:
+    def __init__(self, embed_fn: Optional[Callable[[str], np.ndarray]] = None, max_topics: int = 20,
+                 new_topic_similarity: float = 0.15, window: timedelta = timedelta(days=7)):
+        if embed_fn is None:
+            from backend.agents.router import HashingEmbedder
+            embed_fn = HashingEmbedder()
+        self.embed = embed_fn
+        self.max_topics = max_topics
+        self.new_topic_similarity = new_topic_similarity
+        self.window_hours = int(window.total_seconds() // 3600)
+        self.topics: List[Topic] = []
+        self._centroids = np.zeros((0, 0), dtype=np.float32)
+        self._lock = threading.Lock()
+
+    def _assign(self, vector: np.ndarray) -> Topic:
+        if self.topics:
+            similarities = self._centroids @ vector
+            best = int(np.argmax(similarities))
+            if similarities[best] >= self.new_topic_similarity or len(self.topics) >= self.max_topics:
+                return self.topics[best]
+        topic = Topic(len(self.topics), vector.copy())
+        self.topics.append(topic)
+        self._centroids = np.vstack([t.centroid for t in self.topics])
+        return topic
+
+    def ingest_many(self, texts: Sequence[str], sentiments: Sequence[float],
+                    timestamps: Optional[Sequence[datetime]] = None) -> List[int]:
+        """Assign a mini-batch of comments to topics, then move the touched centroids"""
+        now = datetime.now()
+        # Stopwords would otherwise pull unrelated comments together ("too", "tak")
+        words = [content_words(text) for text in texts]
+        vectors = [self.embed(" ".join(w)) for w in words]
+        with self._lock:
+            batch: Dict[int, List[np.ndarray]] = {}
+            assigned = []
+            for i, vector in enumerate(vectors):
+                if not np.any(vector):
+                    assigned.append(None)
+                    continue
+                topic = self._assign(vector)
+                batch.setdefault(topic.id, []).append(vector)
+                topic.terms.update(words[i])
+                when = timestamps[i] if timestamps else now
+                topic.record(int(when.timestamp() // 3600), float(sentiments[i] or 0.0))
+                assigned.append(topic.id)
+
+            for topic_id, members in batch.items():
+                topic = self.topics[topic_id]
+                topic.size += len(members)
+                rate = len(members) / topic.size
+                centroid = (1 - rate) * topic.centroid + rate * np.mean(members, axis=0)
+                topic.centroid = centroid / (np.linalg.norm(centroid) or 1.0)
+            if batch:
+                self._centroids = np.vstack([t.centroid for t in self.topics])
+        return assigned
+
+    def ingest(self, text: str, sentiment: float, when: Optional[datetime] = None) -> Optional[int]:
+        return self.ingest_many([text], [sentiment], [when] if when else None)[0]
+
+    def trending(self, limit: int = 5, now: Optional[datetime] = None) -> List[Dict]:
+        """Most-mentioned topics in the sliding window, with their windowed sentiment"""
+        oldest_hour = int((now or datetime.now()).timestamp() // 3600) - self.window_hours
+        results = []
+        with self._lock:
+            for topic in self.topics:
+                topic.expire(oldest_hour)
+                mentions = sum(bucket[1] for bucket in topic.buckets)
+                if mentions:
+                    sentiment = sum(bucket[2] for bucket in topic.buckets) / mentions
+                    results.append({"topic": topic.label(), "sentiment": round(sentiment, 2), "mentions": mentions})
+        results.sort(key=lambda r: r["mentions"], reverse=True)
+        return results[:limit]
+
+def warm_start(session, model: TopicModel, now: Optional[datetime] = None, batch_size: int = 500):
+    """Feed the window's stored comments to a fresh model, oldest first"""
+    from .models import PulseSurvey
+
+    since = (now or datetime.now()) - timedelta(hours=model.window_hours)
+    rows = (session.query(PulseSurvey.feedback_text, PulseSurvey.sentiment_score, PulseSurvey.survey_date)
+            .filter(PulseSurvey.feedback_text.isnot(None), PulseSurvey.survey_date >= since)
+            .order_by(PulseSurvey.survey_date)
+            .yield_per(batch_size))
+    batch = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == batch_size:
+            model.ingest_many(*zip(*batch))
+            batch = []
+    if batch:
+        model.ingest_many(*zip(*batch))
@@ -0,0 +1,280 @@
+"""Durable intake for whistleblowing reports
+
+Submission only appends the report to an fsynced intake journal, framed like
+the block store's segment records:
+
+    [u32 payload length][u32 crc32 of payload][JSON payload]
+
+and hands it to an asyncio worker. The description is Fernet-encrypted before
+it is journaled, so plaintext never reaches the disk. The worker classifies
+the report, routes it to the responsible team and writes the WhistleblowReport
+row, retrying with exponential backoff; a report that still fails is re-queued
+after a delay rather than dropped. A checkpoint file holds the journal offset
+up to which every report is stored, so reports accepted before a crash are
+replayed on start. Once every record is stored the journal is truncated.
+"""
+
+import asyncio
+import collections
+import hashlib
+import json
+import logging
+import os
+import re
+import secrets
+import struct
+import threading
+import zlib
+from datetime import datetime
+from typing import Callable, Deque, Dict, Iterator, Optional, Set, Tuple
+from cryptography.fernet import Fernet
+from .models import WhistleblowReport
+
+logger = logging.getLogger(__name__)
+
+RECORD_HEADER = struct.Struct(">II")
+
+CATEGORY_KEYWORDS = {
+    "harassment": ["harass", "gangguan seksual", "bully", "buli", "intimidat", "abuse"],
+    "corruption": ["bribe", "rasuah", "kickback", "fraud", "embezzl", "duit kopi", "conflict of interest"],
+    "safety": ["unsafe", "keselamatan", "accident", "kemalangan", "injur", "hazard", "fire exit"],
+    "discrimination": ["discriminat", "diskriminasi", "racis", "perkauman", "unfair treatment"]
+}
+ROUTES = {
+    "harassment": "er_investigations",
+    "corruption": "audit_committee",
+    "safety": "osh_committee",
+    "discrimination": "er_investigations",
+    "other": "hr_compliance"
+}
+
+def classify_report(text: str) -> str:
+    lowered = text.lower()
+    for category, keywords in CATEGORY_KEYWORDS.items():
+        if any(re.search(r"(?<!\w)" + re.escape(keyword), lowered) for keyword in keywords):
+            return category
+    return "other"
+
+def new_report_id(now: Optional[datetime] = None) -> str:
+    # WB-YYYYMMDD-XXXXXXXX fits the 20-character report_id column
+    return f"WB-{(now or datetime.now()).strftime('%Y%m%d')}-{secrets.token_hex(4).upper()}"
+
+def tracking_hash(tracking_code: str) -> str:
+    return hashlib.sha256(tracking_code.encode()).hexdigest()
+
+class IntakeJournal:
+    """Append-only, fsynced record log with a processed-offset checkpoint"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.checkpoint_path = path + ".checkpoint"
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT | os.O_APPEND, 0o600)
+        self._file = os.fdopen(fd, "ab")
+        self._lock = threading.Lock()
+        self._truncate_torn_tail()
+
+    def _truncate_torn_tail(self):
+        # Later appends would otherwise sit behind unreadable bytes
+        end = self.checkpoint()
+        for _, end in self.pending():
+            pass
+        if os.path.getsize(self.path) > end:
+            logger.warning("Truncating torn whistleblowing journal tail at %s", end)
+            self._file.truncate(end)
+            self._file.seek(end)
+
+    def append(self, record: Dict) -> int:
+        """Durably write a record; returns the offset just past it"""
+        payload = json.dumps(record, separators=(",", ":")).encode()
+        with self._lock:
+            self._file.write(RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            return self._file.tell()
+
+    def checkpoint(self) -> int:
+        try:
+            with open(self.checkpoint_path) as f:
+                return int(f.read().strip() or 0)
+        except FileNotFoundError:
+            return 0
+
+    def commit(self, offset: int):
+        tmp = self.checkpoint_path + ".tmp"
+        with open(tmp, "w") as f:
+            f.write(str(offset))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.checkpoint_path)
+
+    def pending(self) -> Iterator[Tuple[Dict, int]]:
+        """Records after the checkpoint, with the offset past each; stops at a torn tail"""
+        with open(self.path, "rb") as f:
+            f.seek(self.checkpoint())
+            while True:
+                header = f.read(RECORD_HEADER.size)
+                if len(header) < RECORD_HEADER.size:
+                    return
+                length, checksum = RECORD_HEADER.unpack(header)
+                payload = f.read(length)
+                if len(payload) < length or zlib.crc32(payload) != checksum:
+                    return
+                yield json.loads(payload), f.tell()
+
+    def truncate_if_drained(self, offset: int) -> bool:
+        """Empty the journal once everything in it has been stored"""
+        with self._lock:
+            if self._file.tell() != offset:
+                return False
+            self._file.truncate(0)
+            self._file.seek(0)
+            self.commit(0)
+            return True
+
+    def close(self):
+        self._file.close()
+
+class WhistleblowIntake:
+    def __init__(self, journal_path: str, encryption_key: str, session_factory: Optional[Callable] = None,
+                 max_attempts: int = 5, retry_base_seconds: float = 0.5, requeue_seconds: float = 30.0):
+        self.journal = IntakeJournal(journal_path)
+        self.fernet = Fernet(encryption_key)
+        if session_factory is None:
+            from backend.core.database import SessionLocal, get_engine
+            get_engine()
+            session_factory = SessionLocal
+        self.session_factory = session_factory
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.requeue_seconds = requeue_seconds
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._enqueue_lock = threading.Lock()
+        # Journal offsets of records not yet checkpointed, in journal order
+        self._in_flight: Deque[int] = collections.deque()
+        self._stored: Set[int] = set()
+        self._requeues: Set[asyncio.Task] = set()
+        self.requeued = 0
+
+    def start(self):
+        """Start the worker on the running loop, replaying anything not yet stored"""
+        if self._worker is not None:
+            return
+        self._queue = asyncio.Queue()
+        for record, offset in self.journal.pending():
+            self._enqueue(record, offset)
+        self._worker = asyncio.get_running_loop().create_task(self._run())
+
+    async def submit(self, report: Dict) -> Dict:
+        """Append to the journal and acknowledge; processing happens in the background"""
+        self.start()
+        now = datetime.now()
+        tracking_code = f"TRACK-{secrets.token_urlsafe(9)}"
+        record = {
+            "report_id": new_report_id(now),
+            "tracking_hash": tracking_hash(tracking_code),
+            "category": report.get("category"),
+            "description": self.fernet.encrypt(report.get("description", "").encode()).decode(),
+            "received_at": now.isoformat()
+        }
+        # fsync off the event loop
+        await asyncio.to_thread(self._append, record, asyncio.get_running_loop())
+        return {"report_id": record["report_id"], "tracking_code": tracking_code, "received_at": record["received_at"]}
+
+    def _append(self, record: Dict, loop: asyncio.AbstractEventLoop):
+        # Queue in journal order, or a checkpoint could pass a record not yet stored
+        with self._enqueue_lock:
+            offset = self.journal.append(record)
+            loop.call_soon_threadsafe(self._enqueue, record, offset)
+
+    def _enqueue(self, record: Dict, offset: int):
+        self._in_flight.append(offset)
+        self._queue.put_nowait((record, offset))
+
+    def _store(self, record: Dict):
+        category = record.get("category")
+        if category not in ROUTES:
+            category = classify_report(self.fernet.decrypt(record["description"].encode()).decode())
+        session = self.session_factory()
+        try:
+            # A replay after a crash between commit and checkpoint must not insert twice
+            if session.query(WhistleblowReport.id).filter(WhistleblowReport.report_id == record["report_id"]).first():
+                return
+            session.add(WhistleblowReport(
+                report_id=record["report_id"],
+                category=category,
+                description=record["description"],
+                status="submitted",
+                routed_to=ROUTES.get(category, ROUTES["other"]),
+                tracking_hash=record["tracking_hash"],
+                created_at=datetime.fromisoformat(record["received_at"])
+            ))
+            session.commit()
+        finally:
+            session.close()
+
+    async def _process(self, record: Dict):
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                await asyncio.to_thread(self._store, record)
+                return
+            except Exception:
+                if attempt == self.max_attempts:
+                    raise
+                logger.warning("Storing whistleblowing report %s failed (attempt %d), retrying",
+                               record["report_id"], attempt, exc_info=True)
+                await asyncio.sleep(self.retry_base_seconds * 2 ** (attempt - 1))
+
+    async def _requeue(self, item: Tuple[Dict, int]):
+        await asyncio.sleep(self.requeue_seconds)
+        # Put before marking the failed attempt done, so drain() keeps waiting for it
+        self._queue.put_nowait(item)
+        self._queue.task_done()
+
+    def _mark_stored(self, offset: int):
+        # Records can finish out of order after a re-queue; the checkpoint only
+        # moves past a contiguous run of stored records
+        self._stored.add(offset)
+        checkpoint = None
+        while self._in_flight and self._in_flight[0] in self._stored:
+            checkpoint = self._in_flight.popleft()
+            self._stored.discard(checkpoint)
+        if checkpoint is not None:
+            self.journal.commit(checkpoint)
+            if not self._in_flight:
+                self.journal.truncate_if_drained(checkpoint)
+
+    async def _run(self):
+        while True:
+            record, offset = await self._queue.get()
+            try:
+                await self._process(record)
+            except Exception:
+                # Still journaled and ahead of the checkpoint; try again later
+                self.requeued += 1
+                logger.exception("Whistleblowing report %s not stored after %d attempts, re-queued in %ss",
+                                 record["report_id"], self.max_attempts, self.requeue_seconds)
+                task = asyncio.get_running_loop().create_task(self._requeue((record, offset)))
+                self._requeues.add(task)
+                task.add_done_callback(self._requeues.discard)
+                continue
+            self._mark_stored(offset)
+            self._queue.task_done()
+
+    async def drain(self):
+        """Wait until every queued report has been processed"""
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def close(self):
+        for task in list(self._requeues):
+            task.cancel()
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        self.journal.close()
@@ -1,112 +1,230 @@
 """Employee Relations (ER) Module - Workplace Harmony & Engagement"""
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException
 from datetime import datetime
-from typing import Dict, List, Any
+from functools import lru_cache
+from typing import Dict, List, Any, Optional, Tuple
+import asyncio
 import json
+import os
+import re
+from backend.core.database import get_db
 
 router = APIRouter(prefix="/api/er", tags=["employee-relations"])
 
+LEXICON_PATH = os.getenv("HRMS_SENTIMENT_LEXICON",
+                         os.path.join(os.path.dirname(__file__), "er", "sentiment_lexicon.json"))
+MAX_BATCH_TEXTS = 50000
+MAX_SCORED_EMPLOYEES = 200000
+
+@lru_cache(maxsize=None)
+def load_lexicon(path: str = LEXICON_PATH) -> Tuple[Dict[str, float], Tuple[str, ...]]:
+    """Read the sentiment lexicon (term weights and negators) once per process"""
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    terms = {" ".join(term.lower().split()): float(weight) for term, weight in data["terms"].items()}
+    return terms, tuple(word.lower() for word in data.get("negators", ()))
+
+def _phrase_pattern(words: List[str]) -> str:
+    # Longest first so "tak puas hati" wins over "puas hati"; any whitespace between words
+    phrases = sorted(words, key=len, reverse=True)
+    return "|".join(r"\s+".join(re.escape(w) for w in phrase.split()) for phrase in phrases)
+
 class MalaysianSentimentAnalyzer:
-    def __init__(self):
-        self.lexicon = {
-            'tak adil': -0.8, 'diskriminasi': -0.9, 'stress': -0.7,
-            'gembira': 0.8, 'puas hati': 0.7, 'seronok': 0.6,
-            'kantoi': -0.7, 'sabo': -0.6, 'backstab': -0.8
-        }
+    def __init__(self, lexicon: Optional[Dict[str, float]] = None, negators: Optional[List[str]] = None):
+        if lexicon is None:
+            lexicon, default_negators = load_lexicon()
+            negators = default_negators if negators is None else negators
+        self.lexicon = {" ".join(term.lower().split()): weight for term, weight in lexicon.items()}
+        self.negators = tuple(negators or ())
+        self._terms = re.compile(r"(?<!\w)(?:" + _phrase_pattern(list(self.lexicon)) + r")(?!\w)", re.IGNORECASE)
+        # A negator directly before a match flips it ("tak seronok")
+        self._negated = (re.compile(r"(?<!\w)(?:" + _phrase_pattern(list(self.negators)) + r")\s+$", re.IGNORECASE)
+                         if self.negators else None)
         
     def analyze(self, text: str) -> Dict[str, Any]:
         """Analyze sentiment with Malaysian context"""
-        words = text.lower().split()
         sentiment_score = 0
         detected_terms = []
         
-        for word in words:
-            if word in self.lexicon:
-                sentiment_score += self.lexicon[word]
-                detected_terms.append(word)
+        for match in self._terms.finditer(text):
+            term = " ".join(match.group().lower().split())
+            weight = self.lexicon[term]
+            if self._negated and self._negated.search(text, max(match.start() - 16, 0), match.start()):
+                weight = -weight
+                term = "not " + term
+            sentiment_score += weight
+            detected_terms.append(term)
                 
         return {
             "sentiment_score": round(sentiment_score, 2),
             "sentiment": "positive" if sentiment_score > 0 else "negative" if sentiment_score < 0 else "neutral",
             "detected_terms": detected_terms,
-            "language": "mixed" if any(term in self.lexicon for term in words) else "english"
+            "language": "mixed" if detected_terms else "english"
         }
 
+    def analyze_many(self, texts: List[str]) -> List[Dict[str, Any]]:
+        return [self.analyze(text or "") for text in texts]
+
 class BurnoutPredictor:
     def predict(self, employee_data: Dict[str, Any]) -> Dict[str, Any]:
         """Predict burnout with Malaysian work culture factors"""
-        overtime_hours = employee_data.get('overtime_hours', 0)
-        leave_taken = employee_data.get('leave_taken', 0)
-        workload_score = employee_data.get('workload_score', 5)
-        
-        # Malaysian-specific factors
-        ramadan_factor = 0.2 if employee_data.get('religion') == 'Islam' else 0
-        cny_factor = 0.15 if employee_data.get('ethnicity') == 'Chinese' else 0
+        from backend.modules.er.burnout import MAX_RISK, burnout_risk, risk_level
         
-        burnout_risk = (overtime_hours * 0.1) + (10 - leave_taken) * 0.05 + (workload_score * 0.1)
-        burnout_risk -= (ramadan_factor + cny_factor)  # Cultural adjustment
+        is_muslim = employee_data.get('religion') == 'Islam'
+        risk = burnout_risk(
+            employee_data.get('overtime_hours', 0),
+            employee_data.get('leave_taken', 0),
+            employee_data.get('workload_score', 5),
+            is_muslim,
+            employee_data.get('ethnicity') == 'Chinese'
+        )
+        recommendations = ["Consider flexible working hours during Ramadan"] if is_muslim else []
+        recommendations += ["Schedule wellness check-in", "Review workload distribution"]
         
         return {
-            "burnout_risk": round(min(burnout_risk, 10), 2),
-            "risk_level": "high" if burnout_risk > 7 else "medium" if burnout_risk > 4 else "low",
-            "recommendations": [
-                "Consider flexible working hours during Ramadan" if ramadan_factor > 0 else None,
-                "Schedule wellness check-in",
-                "Review workload distribution"
-            ]
+            "burnout_risk": round(min(risk, MAX_RISK), 2),
+            "risk_level": risk_level(risk),
+            "recommendations": recommendations
         }
 
+_sentiment_analyzer = MalaysianSentimentAnalyzer()
+
 @router.post("/sentiment/analyze")
 async def analyze_sentiment(text: str):
-    analyzer = MalaysianSentimentAnalyzer()
-    return analyzer.analyze(text)
+    return _sentiment_analyzer.analyze(text)
+
+@router.post("/sentiment/analyze:batch")
+async def analyze_sentiment_batch(payload: Dict[str, Any]):
+    """Score a whole pulse-survey export in one call"""
+    texts = payload.get("texts", [])
+    if len(texts) > MAX_BATCH_TEXTS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_TEXTS} texts per batch")
+    results = await asyncio.to_thread(_sentiment_analyzer.analyze_many, texts)
+    counts = {"positive": 0, "negative": 0, "neutral": 0}
+    for result in results:
+        counts[result["sentiment"]] += 1
+    return {
+        "total_analyzed": len(results),
+        "average_score": round(sum(r["sentiment_score"] for r in results) / len(results), 3) if results else 0.0,
+        "sentiment_counts": counts,
+        "results": results
+    }
 
 @router.post("/burnout/predict")
 async def predict_burnout(employee_data: Dict[str, Any]):
     predictor = BurnoutPredictor()
     return predictor.predict(employee_data)
 
+@router.post("/burnout/score-workforce")
+async def score_workforce_burnout(payload: Dict[str, Any], db=Depends(get_db)):
+    """Nightly batch: score every employee's feature row and store the alerts"""
+    from backend.modules.er.burnout import MEDIUM_RISK, WorkforceFeatures, run_burnout_scoring
+    
+    employees = payload.get("employees", [])
+    if len(employees) > MAX_SCORED_EMPLOYEES:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_SCORED_EMPLOYEES} employees per run")
+    if any(row.get("employee_id") is None for row in employees):
+        raise HTTPException(status_code=422, detail="Every row needs an employee_id")
+    features = WorkforceFeatures.from_rows(employees)
+    return await asyncio.to_thread(run_burnout_scoring, db, features, payload.get("threshold", MEDIUM_RISK))
+
+@router.get("/burnout/alerts")
+async def get_burnout_alerts(limit: int = 100, db=Depends(get_db)):
+    """Employees flagged by the latest nightly workforce scoring run"""
+    from backend.modules.er.burnout import latest_burnout_alerts
+    
+    alerts = latest_burnout_alerts(db, limit)
+    return {
+        "scored_on": alerts[0].scored_on.isoformat() if alerts else None,
+        "alerts": [
+            {"employee_id": a.employee_id, "department": a.department,
+             "burnout_risk": a.burnout_risk, "risk_level": a.risk_level}
+            for a in alerts
+        ]
+    }
+
+_whistleblow_intake = None
+
+def _get_whistleblow_intake():
+    global _whistleblow_intake
+    from backend.modules.er.whistleblowing import WhistleblowIntake
+    
+    if _whistleblow_intake is None:
+        key = os.getenv("HRMS_WHISTLEBLOW_KEY")
+        if not key:
+            raise HTTPException(status_code=503, detail="Whistleblowing intake is not configured (HRMS_WHISTLEBLOW_KEY)")
+        journal = os.getenv("HRMS_WHISTLEBLOW_JOURNAL", os.path.join("data", "whistleblowing", "intake.log"))
+        _whistleblow_intake = WhistleblowIntake(journal, key)
+    return _whistleblow_intake
+
 @router.post("/whistleblowing/submit")
 async def submit_whistleblowing_report(report: Dict[str, Any]):
-    """Anonymous whistleblowing portal with PDPA compliance"""
+    """Anonymous whistleblowing portal with PDPA compliance
+    
+    Acknowledged once durably journaled; classification, routing and
+    encrypted storage run in the background.
+    """
+    if not (report.get("description") or "").strip():
+        raise HTTPException(status_code=422, detail="description is required")
+    receipt = await _get_whistleblow_intake().submit(report)
     return {
-        "report_id": f"WB-{datetime.now().strftime('%Y%m%d')}-{random.randint(1000, 9999)}",
+        "report_id": receipt["report_id"],
         "status": "received",
         "anonymity_level": "high",
         "estimated_review": "5-7 business days",
         "pdpa_compliant": True,
-        "tracking_code": f"TRACK-{random.randint(100000, 999999)}"
+        "tracking_code": receipt["tracking_code"]
     }
 
+_topic_model = None
+
+def _get_topic_model(db):
+    """Process-wide topic model, warm-started from the window's stored comments on first use"""
+    global _topic_model
+    from backend.modules.er.topics import TopicModel, warm_start
+    
+    if _topic_model is None:
+        model = TopicModel()
+        warm_start(db, model)
+        _topic_model = model
+    return _topic_model
+
+@router.post("/pulse-survey/submit")
+async def submit_pulse_survey(response: Dict[str, Any], db=Depends(get_db)):
+    """Store one survey response and fold it into the live rollups"""
+    from backend.modules.er.models import PulseSurvey
+    from backend.modules.er.pulse import MAX_SCORE, record_response
+    from backend.modules.ta.analytics import age_group
+    
+    engagement = response.get("engagement_score")
+    if not isinstance(engagement, (int, float)) or not 0 <= engagement <= MAX_SCORE:
+        raise HTTPException(status_code=422, detail=f"engagement_score must be between 0 and {MAX_SCORE:g}")
+    feedback = response.get("feedback_text") or ""
+    anonymous = response.get("is_anonymous", True)
+    survey = PulseSurvey(
+        employee_id=None if anonymous else response.get("employee_id"),
+        survey_date=datetime.now(),
+        engagement_score=float(engagement),
+        sentiment_score=_sentiment_analyzer.analyze(feedback)["sentiment_score"] if feedback else None,
+        feedback_text=feedback or None,
+        department=response.get("department"),
+        ethnicity=response.get("ethnicity"),
+        age_group=response.get("age_group") or (age_group(response["age"]) if response.get("age") else None),
+        is_anonymous=anonymous
+    )
+    db.add(survey)
+    record_response(db, survey)
+    db.commit()
+    if feedback and _topic_model is not None:
+        _topic_model.ingest(feedback, survey.sentiment_score, survey.survey_date)
+    return {"status": "received", "sentiment_score": survey.sentiment_score}
+
 @router.get("/pulse-survey/results")
-async def get_pulse_survey_results():
-    """Real-time employee pulse survey results with demographic insights"""
-    return {
-        "overall_satisfaction": 7.2,
-        "department_breakdown": {
-            "IT": 8.1,
-            "HR": 7.5,
-            "Finance": 6.8,
-            "Operations": 7.0
-        },
-        "demographic_insights": {
-            "by_ethnicity": {
-                "Malay": 7.3,
-                "Chinese": 7.1,
-                "Indian": 7.0,
-                "Others": 7.2
-            },
-            "by_age_group": {
-                "20-30": 7.5,
-                "31-40": 7.0,
-                "41-50": 6.8,
-                "50+": 7.2
-            }
-        },
-        "trending_topics": [
-            {"topic": "work-life balance", "sentiment": 0.3},
-            {"topic": "career development", "sentiment": 0.6},
-            {"topic": "compensation", "sentiment": -0.2}
-        ]
-    }
\ No newline at end of file
+async def get_pulse_survey_results(db=Depends(get_db)):
+    """Real-time employee pulse survey results with demographic insights, from running rollups"""
+    from backend.modules.er.pulse import pulse_results
+    
+    results = pulse_results(db)
+    results["trending_topics"] = _get_topic_model(db).trending()
+    return results
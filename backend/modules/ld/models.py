@@ -26,6 +26,18 @@ class TrainingCourse(Base):
     is_hrdf_claimable = Column(Boolean, default=False)
     category = Column(String(50))  # safety, leadership, technical
     language = Column(String(10))  # BM, EN, ZH
+    skills = Column(Text, nullable=True)  # comma-separated skill tags
+    roles = Column(Text, nullable=True)  # comma-separated target roles
+
+class LearningPath(Base):
+    """Nightly precomputed top-N path per employee, served as a keyed lookup"""
+    __tablename__ = "learning_paths"
+    
+    employee_id = Column(Integer, ForeignKey("employees.id"), primary_key=True)
+    path = Column(Text)  # JSON list of recommended courses
+    skill_gaps = Column(Text)  # JSON list
+    total_hours = Column(Float)
+    generated_at = Column(DateTime)
 
 class Certification(Base):
     __tablename__ = "certifications"
@@ -0,0 +1,170 @@
+"""Learning-path recommendations from skill gaps
+
+The course catalogue is held in an inverted index: skill, role, language and
+HRDF category each map to the set of course ids carrying that tag, so finding
+courses for a gap intersects a few small sets rather than scanning the
+catalogue. An employee's path is a greedy cover of their skill gaps (the
+skills their role needs that they don't hold), preferring courses in their
+language. precompute_learning_paths runs that for the whole workforce
+nightly and stores each path, so the endpoint is a primary-key read.
+"""
+
+import json
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set
+from .models import LearningPath, TrainingCourse
+
+# Skills every employee needs, plus those each role adds
+MANDATORY_SKILLS = ("employment act", "workplace safety")
+ROLE_SKILLS = {
+    "general": [],
+    "supervisor": ["communication", "conflict resolution"],
+    "manager": ["leadership", "communication", "conflict resolution", "performance management", "cultural sensitivity"],
+    "engineer": ["python", "cloud", "data analysis"],
+    "hr": ["epf socso", "industrial relations", "pdpa"],
+    "finance": ["excel", "data analysis", "mfrs"]
+}
+DEFAULT_LANGUAGE = "EN"
+
+def _tags(value: Optional[str]) -> List[str]:
+    return [" ".join(tag.lower().split()) for tag in (value or "").split(",") if tag.strip()]
+
+def course_record(course: TrainingCourse) -> Dict[str, Any]:
+    return {
+        "id": course.id,
+        "title": course.course_name,
+        "provider": course.provider,
+        "duration_hours": course.duration_hours or 0,
+        "cost": course.cost,
+        "hrdf_claimable": bool(course.is_hrdf_claimable),
+        "category": course.category,
+        "language": (course.language or DEFAULT_LANGUAGE).upper(),
+        "skills": _tags(course.skills),
+        "roles": _tags(course.roles)
+    }
+
+def skill_gaps(profile: Dict[str, Any]) -> List[str]:
+    role = (profile.get("role") or "general").lower()
+    held = {" ".join(s.lower().split()) for s in profile.get("skills", [])}
+    required = list(dict.fromkeys(list(MANDATORY_SKILLS) + ROLE_SKILLS.get(role, [])))
+    return [skill for skill in required if skill not in held]
+
+class CourseIndex:
+    def __init__(self, courses: Iterable[Dict[str, Any]]):
+        self.courses: Dict[int, Dict[str, Any]] = {}
+        self.by_skill: Dict[str, Set[int]] = defaultdict(set)
+        self.by_role: Dict[str, Set[int]] = defaultdict(set)
+        self.by_language: Dict[str, Set[int]] = defaultdict(set)
+        self.by_category: Dict[str, Set[int]] = defaultdict(set)
+        for course in courses:
+            course_id = course["id"]
+            self.courses[course_id] = course
+            for skill in course["skills"]:
+                self.by_skill[skill].add(course_id)
+            for role in course["roles"]:
+                self.by_role[role].add(course_id)
+            self.by_language[course["language"]].add(course_id)
+            if course.get("category"):
+                self.by_category[course["category"].lower()].add(course_id)
+
+    @classmethod
+    def from_session(cls, session) -> "CourseIndex":
+        return cls(course_record(course) for course in session.query(TrainingCourse))
+
+    def __len__(self) -> int:
+        return len(self.courses)
+
+    def lookup(self, skill: Optional[str] = None, role: Optional[str] = None,
+               language: Optional[str] = None, category: Optional[str] = None) -> Set[int]:
+        """Course ids carrying every given tag"""
+        postings = [index.get(" ".join(key.lower().split()), set())
+                    for index, key in ((self.by_skill, skill), (self.by_role, role), (self.by_category, category))
+                    if key is not None]
+        if language is not None:
+            postings.append(self.by_language.get(language.upper(), set()))
+        if not postings:
+            return set(self.courses)
+        # Smallest posting first keeps the intersection cheap
+        return set.intersection(*sorted(postings, key=len))
+
+    def _candidates(self, gaps: List[str], language: str) -> Set[int]:
+        found: Set[int] = set()
+        preferred = self.by_language.get(language, set())
+        for gap in gaps:
+            courses = self.by_skill.get(gap, set())
+            # Fall back to any language only when nothing covers the gap in the preferred one
+            found |= (courses & preferred) or courses
+        return found
+
+    def recommend(self, profile: Dict[str, Any], top_n: int = 5) -> Dict[str, Any]:
+        """Greedy cover of the profile's skill gaps, most gaps per course first"""
+        gaps = skill_gaps(profile)
+        role = (profile.get("role") or "general").lower()
+        language = (profile.get("language_preference") or DEFAULT_LANGUAGE).upper()
+        candidates = self._candidates(gaps, language)
+        role_courses = self.by_role.get(role, set())
+
+        uncovered = set(gaps)
+        path = []
+        while uncovered and candidates and len(path) < top_n:
+            def rank(course_id):
+                course = self.courses[course_id]
+                return (len(uncovered.intersection(course["skills"])), course["language"] == language,
+                        course_id in role_courses, course["hrdf_claimable"], -course["duration_hours"], -course_id)
+            best = max(candidates, key=rank)
+            covered = uncovered.intersection(self.courses[best]["skills"])
+            if not covered:
+                break
+            candidates.discard(best)
+            uncovered -= covered
+            mandatory = covered & set(MANDATORY_SKILLS)
+            path.append(dict(self.courses[best],
+                             priority="high" if mandatory else "medium",
+                             reason=("Mandatory compliance training: " if mandatory else "Skill gap: ")
+                             + ", ".join(sorted(covered))))
+        return {
+            "employee_id": profile.get("id"),
+            "skill_gaps": gaps,
+            "uncovered_gaps": sorted(uncovered),
+            "learning_path": path,
+            "total_duration_hours": sum(c["duration_hours"] for c in path),
+            "hrdf_claimable": any(c["hrdf_claimable"] for c in path)
+        }
+
+def precompute_learning_paths(session, index: CourseIndex, profiles: Iterable[Dict[str, Any]],
+                              top_n: int = 5) -> int:
+    """Nightly batch: recompute and store every given employee's path"""
+    now = datetime.now()
+    rows = []
+    for profile in profiles:
+        result = index.recommend(profile, top_n)
+        rows.append({
+            "employee_id": profile["id"],
+            "path": json.dumps(result["learning_path"]),
+            "skill_gaps": json.dumps(result["skill_gaps"]),
+            "total_hours": result["total_duration_hours"],
+            "generated_at": now
+        })
+    ids = [row["employee_id"] for row in rows]
+    for start in range(0, len(ids), 500):
+        session.query(LearningPath).filter(LearningPath.employee_id.in_(ids[start:start + 500])).delete(
+            synchronize_session=False)
+    if rows:
+        session.bulk_insert_mappings(LearningPath, rows)
+    session.commit()
+    return len(rows)
+
+def stored_learning_path(session, employee_id: int) -> Optional[Dict[str, Any]]:
+    row = session.get(LearningPath, employee_id)
+    if row is None:
+        return None
+    path = json.loads(row.path)
+    return {
+        "employee_id": employee_id,
+        "skill_gaps": json.loads(row.skill_gaps),
+        "learning_path": path,
+        "total_duration_hours": row.total_hours,
+        "hrdf_claimable": any(c["hrdf_claimable"] for c in path),
+        "generated_at": row.generated_at.isoformat()
+    }
@@ -1,9 +1,12 @@
 """Learning & Development (L&D) Module - HRDF-Claimable Training"""
 
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends, HTTPException
 from datetime import datetime
 from typing import Dict, List, Any
+import asyncio
+import math
 import random
+from backend.core.database import get_db
 
 router = APIRouter(prefix="/api/ld", tags=["learning-development"])
 
@@ -43,60 +46,29 @@ class HRDFClaimAssistant:
             ]
         }
 
+LEARNING_HOURS_PER_WEEK = 2
+MAX_PRECOMPUTE_PROFILES = 100000
+
 class MicrolearningEngine:
-    def __init__(self):
-        self.content_library = {
-            "safety": {
-                "title": "Workplace Safety Basics",
-                "duration_minutes": 15,
-                "languages": ["BM", "EN", "ZH"],
-                "modules": ["Fire Safety", "First Aid", "PPE Usage"]
-            },
-            "compliance": {
-                "title": "Malaysian Labor Laws",
-                "duration_minutes": 20,
-                "languages": ["BM", "EN"],
-                "modules": ["Employment Act", "SOCSO", "EPF"]
-            },
-            "leadership": {
-                "title": "Leading Diverse Teams",
-                "duration_minutes": 25,
-                "languages": ["BM", "EN", "ZH"],
-                "modules": ["Cultural Sensitivity", "Communication", "Conflict Resolution"]
-            }
-        }
+    def __init__(self, index):
+        self.index = index
         
-    def get_personalized_path(self, employee_profile: Dict[str, Any]) -> Dict[str, Any]:
+    def get_personalized_path(self, employee_profile: Dict[str, Any], top_n: int = 5) -> Dict[str, Any]:
         """Generate personalized learning path"""
-        role = employee_profile.get('role', 'general')
-        department = employee_profile.get('department', 'general')
-        language_pref = employee_profile.get('language_preference', 'EN')
-        
-        recommended_courses = []
-        
-        # Mandatory compliance training
-        if 'compliance' in self.content_library:
-            course = self.content_library['compliance'].copy()
-            if language_pref in course['languages']:
-                course['priority'] = 'high'
-                course['reason'] = 'Mandatory compliance training'
-                recommended_courses.append(course)
-                
-        # Role-specific recommendations
-        if role in ['manager', 'supervisor']:
-            if 'leadership' in self.content_library:
-                course = self.content_library['leadership'].copy()
-                course['priority'] = 'medium'
-                course['reason'] = 'Leadership development'
-                recommended_courses.append(course)
-                
-        return {
-            "employee_id": employee_profile.get('id'),
-            "learning_path": recommended_courses,
-            "total_duration_hours": sum(c.get('duration_minutes', 0) for c in recommended_courses) / 60,
-            "hrdf_claimable": True,
-            "estimated_completion": "4 weeks"
-        }
+        result = self.index.recommend(employee_profile, top_n)
+        result["estimated_completion"] = f"{max(1, math.ceil(result['total_duration_hours'] / LEARNING_HOURS_PER_WEEK))} weeks"
+        return result
+
+_course_index = None
+
+def _get_course_index(db, refresh: bool = False):
+    """Process-wide catalogue index, loaded on first use and after each nightly run"""
+    global _course_index
+    from backend.modules.ld.recommendations import CourseIndex
+    
+    if _course_index is None or refresh:
+        _course_index = CourseIndex.from_session(db)
+    return _course_index
 
 @router.post("/hrdf/claim")
 async def process_hrdf_claim(training_data: Dict[str, Any]):
@@ -104,10 +76,41 @@ async def process_hrdf_claim(training_data: Dict[str, Any]):
     return assistant.process_claim(training_data)
 
 @router.post("/learning-path/generate")
-async def generate_learning_path(employee_profile: Dict[str, Any]):
-    engine = MicrolearningEngine()
+async def generate_learning_path(employee_profile: Dict[str, Any], db=Depends(get_db)):
+    """Precomputed path for known employees; computed from the catalogue index otherwise"""
+    from backend.modules.ld.recommendations import stored_learning_path
+    
+    if employee_profile.get("id") is not None:
+        stored = stored_learning_path(db, employee_profile["id"])
+        if stored is not None:
+            return stored
+    engine = MicrolearningEngine(_get_course_index(db))
     return engine.get_personalized_path(employee_profile)
 
+@router.get("/learning-path/{employee_id}")
+async def get_learning_path(employee_id: int, db=Depends(get_db)):
+    """Keyed lookup of the nightly precomputed path"""
+    from backend.modules.ld.recommendations import stored_learning_path
+    
+    stored = stored_learning_path(db, employee_id)
+    if stored is None:
+        raise HTTPException(status_code=404, detail="No precomputed learning path for this employee")
+    return stored
+
+@router.post("/learning-path/precompute")
+async def precompute_paths(payload: Dict[str, Any], db=Depends(get_db)):
+    """Nightly batch: rebuild the catalogue index and store every given employee's top-N path"""
+    from backend.modules.ld.recommendations import precompute_learning_paths
+    
+    profiles = payload.get("profiles", [])
+    if len(profiles) > MAX_PRECOMPUTE_PROFILES:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_PRECOMPUTE_PROFILES} profiles per run")
+    if any(profile.get("id") is None for profile in profiles):
+        raise HTTPException(status_code=422, detail="Every profile needs an id")
+    index = _get_course_index(db, refresh=True)
+    stored = await asyncio.to_thread(precompute_learning_paths, db, index, profiles, payload.get("top_n", 5))
+    return {"employees": stored, "courses_indexed": len(index)}
+
 @router.get("/courses/library")
 async def get_course_library():
     """Get available microlearning courses"""
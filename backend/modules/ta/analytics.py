@@ -0,0 +1,147 @@
+"""Diversity and hiring-funnel rollups for talent acquisition
+
+Counts are kept pre-aggregated per day and as all-time totals, and updated as
+candidates apply and move through the funnel, so the diversity report reads a
+fixed handful of rows however many candidates are stored. rebuild_rollups
+recomputes everything with database-side GROUP BY, for the initial backfill
+or a nightly reconciliation.
+"""
+
+from collections import defaultdict
+from datetime import date, datetime
+from typing import Dict, Optional
+from sqlalchemy import case, func
+from backend.core.database import increment_counters
+from .models import Candidate, CandidateDailyRollup, CandidateRollupTotal
+
+FUNNEL_STAGES = ("applied", "screened", "interviewed", "hired")
+FUNNEL_LABELS = {"applied": "applications", "screened": "screened", "interviewed": "interviewed", "hired": "hired"}
+UNKNOWN = "Unknown"
+
+def age_group(age: Optional[int]) -> str:
+    if age is None:
+        return UNKNOWN
+    if age <= 30:
+        return "20-30"
+    if age <= 40:
+        return "31-40"
+    if age <= 50:
+        return "41-50"
+    return "50+"
+
+def _age_group_sql():
+    return case(
+        (Candidate.age.is_(None), UNKNOWN),
+        (Candidate.age <= 30, "20-30"),
+        (Candidate.age <= 40, "31-40"),
+        (Candidate.age <= 50, "41-50"),
+        else_="50+"
+    )
+
+def _bump(session, day: date, dimension: str, value: Optional[str], delta: int = 1):
+    value = value or UNKNOWN
+    # count = count + delta in the upsert keeps concurrent writers from losing increments
+    increment_counters(session, CandidateDailyRollup, {"day": day, "dimension": dimension, "value": value},
+                       {"count": delta})
+    increment_counters(session, CandidateRollupTotal, {"dimension": dimension, "value": value}, {"count": delta})
+
+def record_application(session, candidate: Candidate):
+    """Count a new candidate in the diversity and funnel rollups"""
+    candidate.applied_at = candidate.applied_at or datetime.now()
+    candidate.status = candidate.status or "applied"
+    day = candidate.applied_at.date()
+    _bump(session, day, "ethnicity", candidate.ethnicity)
+    _bump(session, day, "gender", candidate.gender)
+    _bump(session, day, "age_group", age_group(candidate.age))
+    _advance_funnel(session, day, None, candidate.status)
+
+def _advance_funnel(session, day: date, old_stage: Optional[str], new_stage: str):
+    # Funnel counts are "reached at least this stage": moving applied -> interviewed
+    # also counts as screened. Rejections and moves backwards don't un-count.
+    if new_stage not in FUNNEL_STAGES:
+        return
+    if old_stage is None:
+        start = 0
+    elif old_stage in FUNNEL_STAGES:
+        start = FUNNEL_STAGES.index(old_stage) + 1
+    else:
+        # Reinstated after rejection: earlier stages were counted the first time
+        start = FUNNEL_STAGES.index(new_stage)
+    for stage in FUNNEL_STAGES[start:FUNNEL_STAGES.index(new_stage) + 1]:
+        _bump(session, day, "funnel", stage)
+
+def record_stage_change(session, candidate: Candidate, new_stage: str, when: Optional[datetime] = None):
+    """Move a candidate through the funnel, updating counts incrementally"""
+    if candidate.applied_at is None:
+        # Stored without record_application, so never counted as applied
+        record_application(session, candidate)
+    old_stage = candidate.status
+    candidate.status = new_stage
+    _advance_funnel(session, (when or datetime.now()).date(), old_stage, new_stage)
+
+def advance_to(session, candidate: Candidate, stage: str, when: Optional[datetime] = None):
+    """Move a candidate forward to stage; later, rejected or unknown statuses are left alone"""
+    current = candidate.status or "applied"
+    if current in FUNNEL_STAGES and FUNNEL_STAGES.index(current) < FUNNEL_STAGES.index(stage):
+        record_stage_change(session, candidate, stage, when)
+    elif candidate.applied_at is None:
+        record_application(session, candidate)
+
+def rebuild_rollups(session):
+    """Recompute all rollups from stored candidates with GROUP BY"""
+    session.query(CandidateDailyRollup).delete()
+    session.query(CandidateRollupTotal).delete()
+
+    day = func.date(Candidate.applied_at)
+    columns = {"ethnicity": Candidate.ethnicity, "gender": Candidate.gender, "age_group": _age_group_sql()}
+    daily: Dict = defaultdict(int)
+    for dimension, column in columns.items():
+        for row_day, value, count in session.query(day, column, func.count()).group_by(day, column):
+            daily[(row_day, dimension, value or UNKNOWN)] += count
+
+    # Stage reached is only known for the current status; attribute it to the application day
+    for row_day, status, count in session.query(day, Candidate.status, func.count()).group_by(day, Candidate.status):
+        reached = FUNNEL_STAGES[:FUNNEL_STAGES.index(status) + 1] if status in FUNNEL_STAGES else FUNNEL_STAGES[:1]
+        for stage in reached:
+            daily[(row_day, "funnel", stage)] += count
+
+    totals: Dict = defaultdict(int)
+    for (row_day, dimension, value), count in daily.items():
+        if isinstance(row_day, str):
+            row_day = date.fromisoformat(row_day)  # SQLite returns DATE() as text
+        session.add(CandidateDailyRollup(day=row_day, dimension=dimension, value=value, count=count))
+        totals[(dimension, value)] += count
+    for (dimension, value), count in totals.items():
+        session.add(CandidateRollupTotal(dimension=dimension, value=value, count=count))
+    session.flush()
+
+def _report_from_counts(counts: Dict) -> Dict:
+    funnel = counts.get("funnel", {})
+    return {
+        "total_candidates": funnel.get("applied", 0),
+        "diversity_breakdown": {
+            "ethnicity": counts.get("ethnicity", {}),
+            "gender": counts.get("gender", {}),
+            "age_groups": counts.get("age_group", {})
+        },
+        "hiring_funnel": {FUNNEL_LABELS[stage]: funnel.get(stage, 0) for stage in FUNNEL_STAGES}
+    }
+
+def diversity_report(session, start: Optional[date] = None, end: Optional[date] = None) -> Dict:
+    """Report from the totals table, or summed daily rollups for a date range"""
+    counts: Dict[str, Dict[str, int]] = defaultdict(dict)
+    if start is None and end is None:
+        rows = session.query(CandidateRollupTotal.dimension, CandidateRollupTotal.value, CandidateRollupTotal.count)
+    else:
+        query = session.query(CandidateDailyRollup.dimension, CandidateDailyRollup.value,
+                              func.sum(CandidateDailyRollup.count))
+        if start is not None:
+            query = query.filter(CandidateDailyRollup.day >= start)
+        if end is not None:
+            query = query.filter(CandidateDailyRollup.day <= end)
+        rows = query.group_by(CandidateDailyRollup.dimension, CandidateDailyRollup.value)
+    for dimension, value, count in rows:
+        counts[dimension][value] = int(count)
+    report = _report_from_counts(counts)
+    report["period"] = {"start": start.isoformat() if start else None, "end": end.isoformat() if end else None}
+    return report
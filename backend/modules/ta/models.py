@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Float, Boolean, ForeignKey
+from sqlalchemy import Column, Integer, String, Date, DateTime, Text, Float, Boolean, ForeignKey, UniqueConstraint
 from sqlalchemy.ext.declarative import declarative_base
 
 Base = declarative_base()
@@ -8,6 +8,7 @@ class JobPosting(Base):
     
     id = Column(Integer, primary_key=True)
     job_title = Column(String(100))
+    description = Column(Text)
     department = Column(String(50))
     location = Column(String(50))  # Klang Valley, Johor, Penang
     salary_min = Column(Float)
@@ -30,6 +31,10 @@ class Candidate(Base):
     cultural_fit_score = Column(Float)
     bahasa_proficiency = Column(String(20))  # native, fluent, basic
     ethnicity = Column(String(20))  # For diversity tracking
+    gender = Column(String(10))
+    age = Column(Integer)  # at application
+    status = Column(String(20), default="applied")  # applied, screened, interviewed, hired, rejected
+    applied_at = Column(DateTime)
     resume_path = Column(String(500))
 
 class Interview(Base):
@@ -39,7 +44,27 @@ class Interview(Base):
     candidate_id = Column(Integer, ForeignKey("candidates.id"))
     job_posting_id = Column(Integer, ForeignKey("job_postings.id"))
     interview_date = Column(DateTime)
+    duration_minutes = Column(Integer, nullable=True)  # NULL for bookings made before it was stored
     interview_type = Column(String(20))  # video, face_to_face
     interviewer_id = Column(Integer, ForeignKey("employees.id"))
     status = Column(String(20))  # scheduled, completed, cancelled
-    recording_path = Column(String(500), nullable=True)
\ No newline at end of file
+    recording_path = Column(String(500), nullable=True)
+
+class CandidateDailyRollup(Base):
+    """Candidates per day per dimension value (ethnicity, gender, age_group, funnel)"""
+    __tablename__ = "candidate_daily_rollups"
+    __table_args__ = (UniqueConstraint("day", "dimension", "value"),)
+    
+    id = Column(Integer, primary_key=True)
+    day = Column(Date, index=True)
+    dimension = Column(String(20))
+    value = Column(String(30))
+    count = Column(Integer, default=0)
+
+class CandidateRollupTotal(Base):
+    """All-time totals, so the diversity report reads a handful of rows"""
+    __tablename__ = "candidate_rollup_totals"
+    
+    dimension = Column(String(20), primary_key=True)
+    value = Column(String(30), primary_key=True)
+    count = Column(Integer, default=0)
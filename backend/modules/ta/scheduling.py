@@ -0,0 +1,236 @@
+"""Interview scheduling around prayer times, public holidays and busy interviewers
+
+Blocked time is held as sorted, merged (start, end) intervals in minutes since
+the scheduling window opens: one list per zone for working hours, prayer times
+and holidays (precomputed for the whole window), and one per interviewer from
+their booked interviews. Finding the earliest free slot is a bisect into each
+list plus a short sweep forward, alternating between the zone and interviewer
+lists until both agree, so a campus-hiring batch books each candidate in well
+under a millisecond and later candidates see earlier bookings.
+"""
+
+import bisect
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import or_
+from .models import Interview
+
+DEFAULT_INTERVIEW_MINUTES = 60
+WORKING_HOURS = (time(9, 0), time(18, 0))
+
+# Approximate business-hour prayer windows (start, minutes) per JAKIM zone.
+# Actual times drift through the year; pass prayer_windows loaded from e-Solat
+# for exact daily times.
+PRAYER_WINDOWS = {
+    "WLY01": [(time(13, 10), 40), (time(16, 25), 30)],  # Kuala Lumpur, Putrajaya
+    "SGR01": [(time(13, 10), 40), (time(16, 25), 30)],  # Selangor (Petaling, Gombak, ...)
+    "JHR02": [(time(13, 0), 40), (time(16, 15), 30)],   # Johor Bahru
+    "PNG01": [(time(13, 20), 40), (time(16, 40), 30)],  # Penang
+    "SBH07": [(time(12, 15), 40), (time(15, 35), 30)],  # Kota Kinabalu
+    "SWK08": [(time(12, 30), 40), (time(15, 50), 30)]   # Kuching
+}
+# Friday prayers replace the midday window
+FRIDAY_PRAYER = (time(12, 15), 150)
+
+# National public holidays by year; lunar dates follow the gazetted calendar.
+# Pass holidays= for state holidays or years not listed here. Slots in a year
+# without holiday data are still offered but flagged as unchecked.
+PUBLIC_HOLIDAYS = {
+    2025: {
+        date(2025, 1, 1): "New Year's Day",
+        date(2025, 1, 29): "Chinese New Year",
+        date(2025, 1, 30): "Chinese New Year (second day)",
+        date(2025, 3, 31): "Hari Raya Aidilfitri",
+        date(2025, 4, 1): "Hari Raya Aidilfitri (second day)",
+        date(2025, 5, 1): "Labour Day",
+        date(2025, 5, 12): "Wesak Day",
+        date(2025, 6, 2): "Agong's Birthday",
+        date(2025, 6, 7): "Hari Raya Haji",
+        date(2025, 6, 27): "Awal Muharram",
+        date(2025, 8, 31): "National Day",
+        date(2025, 9, 5): "Maulidur Rasul",
+        date(2025, 9, 16): "Malaysia Day",
+        date(2025, 10, 20): "Deepavali",
+        date(2025, 12, 25): "Christmas Day"
+    },
+    2026: {
+        date(2026, 1, 1): "New Year's Day",
+        date(2026, 2, 17): "Chinese New Year",
+        date(2026, 2, 18): "Chinese New Year (second day)",
+        date(2026, 3, 21): "Hari Raya Aidilfitri",
+        date(2026, 3, 22): "Hari Raya Aidilfitri (second day)",
+        date(2026, 5, 1): "Labour Day",
+        date(2026, 5, 27): "Hari Raya Haji",
+        date(2026, 5, 31): "Wesak Day",
+        date(2026, 6, 1): "Agong's Birthday",
+        date(2026, 6, 17): "Awal Muharram",
+        date(2026, 8, 25): "Maulidur Rasul",
+        date(2026, 8, 31): "National Day",
+        date(2026, 9, 16): "Malaysia Day",
+        date(2026, 11, 8): "Deepavali",
+        date(2026, 12, 25): "Christmas Day"
+    }
+}
+
+Interval = Tuple[int, int]
+
+class IntervalIndex:
+    """Sorted, non-overlapping blocked intervals with earliest-free-slot queries"""
+
+    def __init__(self, intervals: Iterable[Interval] = ()):
+        self._starts: List[int] = []
+        self._ends: List[int] = []
+        for start, end in sorted(intervals):
+            self._append_merged(start, end)
+
+    def _append_merged(self, start: int, end: int):
+        if self._ends and start <= self._ends[-1]:
+            self._ends[-1] = max(self._ends[-1], end)
+        else:
+            self._starts.append(start)
+            self._ends.append(end)
+
+    def __len__(self) -> int:
+        return len(self._starts)
+
+    def earliest_free(self, t: int, duration: int) -> int:
+        """Earliest start >= t such that [start, start + duration) overlaps nothing"""
+        # Last interval starting at or before t may still cover t
+        i = max(bisect.bisect_right(self._starts, t) - 1, 0)
+        while i < len(self._starts):
+            if self._ends[i] <= t:
+                i += 1
+                continue
+            if self._starts[i] >= t + duration:
+                break
+            t = self._ends[i]
+            i += 1
+        return t
+
+    def add(self, start: int, end: int):
+        """Block [start, end), merging with neighbours"""
+        i = bisect.bisect_left(self._starts, start)
+        if i > 0 and self._ends[i - 1] >= start:
+            i -= 1
+            start = self._starts[i]
+        j = i
+        while j < len(self._starts) and self._starts[j] <= end:
+            end = max(end, self._ends[j])
+            j += 1
+        self._starts[i:j] = [start]
+        self._ends[i:j] = [end]
+
+class InterviewScheduler:
+    def __init__(self, window_start: datetime, days: int = 30,
+                 holidays: Optional[Dict[int, Dict[date, str]]] = None,
+                 prayer_windows: Optional[Dict[str, List[Tuple[time, int]]]] = None,
+                 working_hours: Tuple[time, time] = WORKING_HOURS):
+        self.origin = window_start.replace(second=0, microsecond=0)
+        self.days = days
+        self.horizon = days * 24 * 60
+        self.holidays = PUBLIC_HOLIDAYS if holidays is None else holidays
+        self.prayer_windows = prayer_windows or PRAYER_WINDOWS
+        self.working_hours = working_hours
+        self._zones: Dict[str, IntervalIndex] = {}
+        self._interviewers: Dict[int, IntervalIndex] = {}
+
+    @property
+    def unchecked_holiday_years(self) -> List[int]:
+        """Years in the window with no holiday calendar loaded"""
+        last = self.origin + timedelta(days=self.days)
+        return [year for year in range(self.origin.year, last.year + 1) if year not in self.holidays]
+
+    def _minutes(self, when: datetime) -> int:
+        return int((when - self.origin).total_seconds() // 60)
+
+    def _datetime(self, minutes: int) -> datetime:
+        return self.origin + timedelta(minutes=minutes)
+
+    def _zone_index(self, zone: str) -> IntervalIndex:
+        index = self._zones.get(zone)
+        if index is None:
+            index = IntervalIndex(self._zone_blocks(zone))
+            self._zones[zone] = index
+        return index
+
+    def _zone_blocks(self, zone: str) -> Iterable[Interval]:
+        if zone not in self.prayer_windows:
+            raise ValueError(f"Unknown prayer zone: {zone}")
+        open_at, close_at = self.working_hours
+        for offset in range(self.days + 1):
+            day = self.origin.date() + timedelta(days=offset)
+            midnight = self._minutes(datetime.combine(day, time(0, 0)))
+            if day.weekday() >= 5 or day in self.holidays.get(day.year, ()):
+                yield midnight, midnight + 24 * 60
+                continue
+            yield midnight, midnight + open_at.hour * 60 + open_at.minute
+            yield midnight + close_at.hour * 60 + close_at.minute, midnight + 24 * 60
+            windows = list(self.prayer_windows[zone])
+            if day.weekday() == 4:
+                windows[0] = FRIDAY_PRAYER
+            for start, minutes in windows:
+                begin = midnight + start.hour * 60 + start.minute
+                yield begin, begin + minutes
+
+    def add_busy(self, interviewer_id: int, start: datetime, minutes: int = DEFAULT_INTERVIEW_MINUTES):
+        """Load an existing booking into the interviewer's calendar"""
+        begin = self._minutes(start)
+        index = self._interviewers.setdefault(interviewer_id, IntervalIndex())
+        index.add(begin, begin + minutes)
+
+    def _earliest_for(self, zone_index: IntervalIndex, interviewer_id: int, t: int, duration: int) -> int:
+        calendar = self._interviewers.setdefault(interviewer_id, IntervalIndex())
+        while t < self.horizon:
+            t = zone_index.earliest_free(t, duration)
+            candidate = calendar.earliest_free(t, duration)
+            if candidate == t:
+                return t
+            t = candidate
+        return t
+
+    def schedule(self, interviewer_ids: List[int], earliest: Optional[datetime] = None,
+                 minutes: int = DEFAULT_INTERVIEW_MINUTES, zone: str = "WLY01") -> Optional[Dict]:
+        """Book the earliest feasible slot with whichever interviewer frees up first"""
+        zone_index = self._zone_index(zone)
+        t = max(self._minutes(earliest), 0) if earliest else 0
+        best: Optional[Tuple[int, int]] = None
+        for interviewer_id in interviewer_ids:
+            start = self._earliest_for(zone_index, interviewer_id, t, minutes)
+            if start + minutes <= self.horizon and (best is None or start < best[0]):
+                best = (start, interviewer_id)
+        if best is None:
+            return None
+        start, interviewer_id = best
+        self._interviewers[interviewer_id].add(start, start + minutes)
+        return {
+            "interviewer_id": interviewer_id,
+            "start": self._datetime(start),
+            "end": self._datetime(start + minutes),
+            "zone": zone,
+            "holidays_checked": self._datetime(start).year in self.holidays
+        }
+
+    def schedule_many(self, requests: List[Dict]) -> List[Optional[Dict]]:
+        """Schedule candidates in order; each booking blocks its interviewer for later ones"""
+        return [
+            self.schedule(
+                request["interviewer_ids"],
+                earliest=request.get("earliest"),
+                minutes=request.get("minutes", DEFAULT_INTERVIEW_MINUTES),
+                zone=request.get("zone", "WLY01")
+            )
+            for request in requests
+        ]
+
+def load_interviewer_calendars(session, scheduler: InterviewScheduler, interviewer_ids: Iterable[int]):
+    """Block every non-cancelled interview already booked in the scheduler's window"""
+    end = scheduler.origin + timedelta(days=scheduler.days)
+    rows = session.query(Interview.interviewer_id, Interview.interview_date, Interview.duration_minutes).filter(
+        Interview.interviewer_id.in_(list(interviewer_ids)),
+        # Interviews starting the day before may still run into the window
+        Interview.interview_date >= scheduler.origin - timedelta(days=1),
+        Interview.interview_date < end,
+        or_(Interview.status.is_(None), Interview.status != "cancelled")
+    )
+    for interviewer_id, start, minutes in rows:
+        scheduler.add_busy(interviewer_id, start, minutes or DEFAULT_INTERVIEW_MINUTES)
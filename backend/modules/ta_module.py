@@ -1,12 +1,31 @@
 """Talent Acquisition (TA) Module - AI-Driven Recruitment"""
 
-from fastapi import APIRouter
-from datetime import datetime
-from typing import Dict, List, Any
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
+from datetime import date, datetime
+from typing import Dict, Iterator, List, Any, Optional
+import asyncio
+import json
 import re
+from backend.core.database import get_db
 
 router = APIRouter(prefix="/api/ta", tags=["talent-acquisition"])
 
+MAX_BATCH_RESUMES = 20000
+
+def _term_regex(term: str) -> str:
+    # Any run of whitespace between words of a phrase still matches
+    return r"\s+".join(re.escape(word) for word in term.split())
+
+def _normalize_term(text: str) -> str:
+    # Matches may differ from the listed term in case and whitespace
+    return " ".join(text.lower().split())
+
+def _compile_terms(terms: List[str]) -> "re.Pattern":
+    # Longest first so "Public Bank" wins over any shorter overlapping name
+    alternation = "|".join(_term_regex(t) for t in sorted(terms, key=len, reverse=True))
+    return re.compile(r"(?<!\w)(?:" + alternation + r")(?!\w)", re.IGNORECASE)
+
 class MalaysianResumeScorer:
     def __init__(self):
         self.local_universities = {
@@ -18,24 +37,24 @@ class MalaysianResumeScorer:
             "Maybank", "CIMB", "Public Bank", "Genting",
             "Sime Darby", "IOI", "Axiata", "Digi"
         ]
+        # One pass per field instead of one lowercase + substring scan per name
+        self._university_pattern = _compile_terms(list(self.local_universities))
+        self._university_rank = {_normalize_term(uni): (i, score) for i, (uni, score) in enumerate(self.local_universities.items())}
+        self._glc_pattern = _compile_terms(self.glc_companies)
         
     def score_resume(self, resume_data: Dict[str, Any]) -> Dict[str, Any]:
         """Score resume with Malaysian context"""
         base_score = 5.0
         
-        # Education scoring
-        education = resume_data.get('education', '')
-        for uni, score in self.local_universities.items():
-            if uni.lower() in education.lower():
-                base_score += (score - 5.0) * 0.3
-                break
+        # Education scoring: the first-listed university mentioned counts
+        education = resume_data.get('education', '') or ''
+        mentioned = [self._university_rank[_normalize_term(m)] for m in self._university_pattern.findall(education)]
+        if mentioned:
+            base_score += (min(mentioned)[1] - 5.0) * 0.3
                 
         # Experience scoring
-        experience = resume_data.get('experience', '')
-        glc_bonus = 0
-        for company in self.glc_companies:
-            if company.lower() in experience.lower():
-                glc_bonus += 0.5
+        experience = resume_data.get('experience', '') or ''
+        glc_bonus = 0.5 * len({_normalize_term(m) for m in self._glc_pattern.findall(experience)})
                 
         # Language skills
         languages = resume_data.get('languages', [])
@@ -65,21 +84,24 @@ class BiasDetector:
             'age': ['young and energetic', 'fresh graduate only', 'below 30'],
             'religious': ['non-muslim', 'christian preferred', 'muslim only']
         }
+        # All phrases in one pattern: each posting is scanned once
+        self._pattern = _compile_terms([t for terms in self.bias_terms.values() for t in terms])
+        self._violations = [
+            (term, {
+                "category": category,
+                "term": term,
+                "severity": "high",
+                "suggestion": f"Remove '{term}' and focus on job-relevant skills"
+            })
+            for category, terms in self.bias_terms.items()
+            for term in terms
+        ]
         
     def detect_bias(self, job_description: str) -> Dict[str, Any]:
         """Detect discriminatory language in job postings"""
-        detected_bias = []
-        text_lower = job_description.lower()
-        
-        for category, terms in self.bias_terms.items():
-            for term in terms:
-                if term in text_lower:
-                    detected_bias.append({
-                        "category": category,
-                        "term": term,
-                        "severity": "high",
-                        "suggestion": f"Remove '{term}' and focus on job-relevant skills"
-                    })
+        found = {" ".join(m.lower().split()) for m in self._pattern.findall(job_description or "")}
+        # A term can belong to several categories (e.g. non-muslim); report each
+        detected_bias = [dict(violation) for term, violation in self._violations if term in found]
                     
         return {
             "bias_detected": len(detected_bias) > 0,
@@ -88,66 +110,217 @@ class BiasDetector:
             "compliance_score": max(0, 100 - (len(detected_bias) * 20))
         }
 
+_resume_scorer = MalaysianResumeScorer()
+
+def score_resumes(resumes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Score and rank a batch, best first"""
+    results = [
+        {"index": i, "candidate_id": resume.get("candidate_id"), **_resume_scorer.score_resume(resume)}
+        for i, resume in enumerate(resumes)
+    ]
+    # Stable sort: equal scores keep submission order
+    results.sort(key=lambda r: r["overall_score"], reverse=True)
+    for rank, result in enumerate(results, start=1):
+        result["rank"] = rank
+    return results
+
 @router.post("/resume/score")
 async def score_resume(resume_data: Dict[str, Any]):
-    scorer = MalaysianResumeScorer()
-    return scorer.score_resume(resume_data)
+    return _resume_scorer.score_resume(resume_data)
+
+@router.post("/resume/score:batch")
+async def score_resume_batch(payload: Dict[str, Any]):
+    """Score a job's applicant pool in one call and return it ranked"""
+    resumes = payload.get("resumes", [])
+    if len(resumes) > MAX_BATCH_RESUMES:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_RESUMES} resumes per batch")
+    # In the worker thread pool so scoring doesn't stall the event loop
+    results = await asyncio.to_thread(score_resumes, resumes)
+    top_k = payload.get("top_k")
+    return {
+        "total_scored": len(results),
+        "results": results[:top_k] if top_k else results
+    }
+
+_bias_detector = BiasDetector()
+
+def audit_job_postings(session, batch_size: int = 1000) -> Iterator[Dict[str, Any]]:
+    """Stream stored job postings and yield a report for each one with violations
+    
+    Only the text columns are loaded, in server-side batches, so memory stays
+    flat across tens of thousands of postings.
+    """
+    from backend.modules.ta.models import JobPosting
+    
+    rows = (session.query(JobPosting.id, JobPosting.job_title, JobPosting.description)
+            .order_by(JobPosting.id)
+            .execution_options(yield_per=batch_size))
+    for posting_id, job_title, description in rows:
+        result = _bias_detector.detect_bias(f"{job_title or ''}\n{description or ''}")
+        if result["bias_detected"]:
+            yield {"job_posting_id": posting_id, "job_title": job_title, **result}
+
+def _audit_stream(session, batch_size: int) -> Iterator[str]:
+    flagged = 0
+    for report in audit_job_postings(session, batch_size):
+        flagged += 1
+        yield json.dumps(report) + "\n"
+    yield json.dumps({"summary": {"flagged_postings": flagged, "audited_at": datetime.now().isoformat()}}) + "\n"
 
 @router.post("/job-posting/bias-check")
 async def check_job_bias(job_description: str):
-    detector = BiasDetector()
-    return detector.detect_bias(job_description)
+    return _bias_detector.detect_bias(job_description)
+
+@router.get("/job-posting/bias-audit")
+async def bias_audit(batch_size: int = 1000, db=Depends(get_db)):
+    """Nightly compliance sweep: one NDJSON line per flagged posting, then a summary"""
+    return StreamingResponse(_audit_stream(db, batch_size), media_type="application/x-ndjson")
+
+INTERVIEW_KIT = {
+    "languages_available": ["English", "Bahasa Malaysia", "Mandarin"],
+    "cultural_sensitivity_notes": "Prepared",
+    "bias_free_questions": True
+}
+MAX_BATCH_INTERVIEWS = 5000
+
+def _parse_time(value: Optional[str]) -> datetime:
+    if not value:
+        return datetime.now()
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise HTTPException(status_code=422, detail=f"Invalid time: {value}")
+
+def _interviewer_ids(item: Dict[str, Any]) -> List[int]:
+    ids = item.get("interviewer_ids") or ([item["interviewer_id"]] if item.get("interviewer_id") else [])
+    if not ids:
+        raise HTTPException(status_code=422, detail="interviewer_ids is required")
+    return ids
+
+def _book_interviews(db, items: List[Dict[str, Any]], zone: str, days: int) -> List[Dict[str, Any]]:
+    from backend.modules.ta.analytics import advance_to
+    from backend.modules.ta.models import Candidate, Interview
+    from backend.modules.ta.scheduling import InterviewScheduler, load_interviewer_calendars
+    
+    requests = [{
+        "interviewer_ids": _interviewer_ids(item),
+        "earliest": _parse_time(item.get("preferred_time")),
+        "minutes": item.get("duration_minutes", 60),
+        "zone": item.get("zone", zone)
+    } for item in items]
+    scheduler = InterviewScheduler(min(r["earliest"] for r in requests), days=days)
+    load_interviewer_calendars(db, scheduler, {i for r in requests for i in r["interviewer_ids"]})
+    try:
+        slots = scheduler.schedule_many(requests)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    
+    candidate_ids = {item.get("candidate_id") for item, slot in zip(items, slots) if slot is not None}
+    candidates = {c.id: c for c in db.query(Candidate).filter(Candidate.id.in_(candidate_ids - {None}))}
+    results, booked = [], []
+    for item, slot in zip(items, slots):
+        if slot is None:
+            results.append({"candidate_id": item.get("candidate_id"), "scheduled": False,
+                            "reason": f"No free slot within {days} days"})
+            continue
+        interview = Interview(candidate_id=item.get("candidate_id"), job_posting_id=item.get("job_posting_id"),
+                              interview_date=slot["start"],
+                              duration_minutes=int((slot["end"] - slot["start"]).total_seconds() // 60),
+                              interview_type=item.get("interview_type", "video"),
+                              interviewer_id=slot["interviewer_id"], status="scheduled")
+        db.add(interview)
+        booked.append(interview)
+        if item.get("candidate_id") in candidates:
+            advance_to(db, candidates[item["candidate_id"]], "interviewed")
+        results.append({
+            "candidate_id": item.get("candidate_id"),
+            "scheduled": True,
+            "interviewer_id": slot["interviewer_id"],
+            "scheduled_time": slot["start"].isoformat(),
+            "end_time": slot["end"].isoformat(),
+            "cultural_considerations": {
+                "prayer_zone": slot["zone"],
+                "prayer_times_avoided": True,
+                "public_holidays_checked": slot["holidays_checked"]
+            }
+        })
+    db.commit()
+    booked_iter = iter(booked)
+    for result in results:
+        if result["scheduled"]:
+            result["interview_id"] = next(booked_iter).id
+    return results
 
 @router.post("/interview/schedule")
-async def schedule_interview(interview_data: Dict[str, Any]):
-    """Schedule interview avoiding prayer times and cultural holidays"""
-    return {
-        "interview_id": f"INT-{datetime.now().strftime('%Y%m%d')}-{random.randint(1000, 9999)}",
-        "scheduled_time": interview_data.get('preferred_time'),
-        "cultural_considerations": {
-            "prayer_times_avoided": True,
-            "ramadan_adjustment": False,
-            "public_holidays_checked": True
-        },
-        "interview_kit": {
-            "languages_available": ["English", "Bahasa Malaysia", "Mandarin"],
-            "cultural_sensitivity_notes": "Prepared",
-            "bias_free_questions": True
-        }
-    }
+async def schedule_interview(interview_data: Dict[str, Any], db=Depends(get_db)):
+    """Book the earliest slot from preferred_time avoiding prayer times, public holidays and clashes"""
+    result = _book_interviews(db, [interview_data], interview_data.get("zone", "WLY01"),
+                              interview_data.get("search_days", 30))[0]
+    if not result["scheduled"]:
+        raise HTTPException(status_code=409, detail=result["reason"])
+    result["interview_kit"] = INTERVIEW_KIT
+    return result
+
+@router.post("/interview/schedule:batch")
+async def schedule_interviews(payload: Dict[str, Any], db=Depends(get_db)):
+    """Campus-hiring day: book many candidates at once, in submission order"""
+    candidates = payload.get("candidates", [])
+    if len(candidates) > MAX_BATCH_INTERVIEWS:
+        raise HTTPException(status_code=413, detail=f"At most {MAX_BATCH_INTERVIEWS} candidates per batch")
+    if not candidates:
+        return {"scheduled": 0, "unscheduled": 0, "results": []}
+    results = await asyncio.to_thread(_book_interviews, db, candidates, payload.get("zone", "WLY01"),
+                                      payload.get("search_days", 30))
+    scheduled = sum(1 for r in results if r["scheduled"])
+    return {"scheduled": scheduled, "unscheduled": len(results) - scheduled, "results": results}
 
 @router.get("/candidates/diversity-report")
-async def get_diversity_report():
-    """Generate diversity and inclusion report"""
-    return {
-        "total_candidates": 150,
-        "diversity_breakdown": {
-            "ethnicity": {
-                "Malay": 45,
-                "Chinese": 38,
-                "Indian": 22,
-                "Others": 45
-            },
-            "gender": {
-                "Male": 78,
-                "Female": 72
-            },
-            "age_groups": {
-                "20-30": 85,
-                "31-40": 45,
-                "41-50": 15,
-                "50+": 5
-            }
-        },
-        "hiring_funnel": {
-            "applications": 150,
-            "screened": 75,
-            "interviewed": 30,
-            "hired": 8
-        },
-        "bias_metrics": {
-            "bias_incidents": 2,
-            "corrective_actions": 2,
-            "compliance_score": 96
-        }
-    }
\ No newline at end of file
+async def get_diversity_report(start: Optional[date] = None, end: Optional[date] = None, db=Depends(get_db)):
+    """Diversity and funnel report served from pre-aggregated rollups"""
+    from backend.modules.ta.analytics import diversity_report
+    
+    report = diversity_report(db, start, end)
+    report["generated_at"] = datetime.now().isoformat()
+    return report
+
+CANDIDATE_FIELDS = ("full_name", "email", "phone", "university", "bahasa_proficiency",
+                    "ethnicity", "gender", "age", "resume_path")
+
+@router.post("/candidates")
+async def create_candidate(candidate_data: Dict[str, Any], db=Depends(get_db)):
+    """Register an application and count it in the diversity and funnel rollups"""
+    from backend.modules.ta.analytics import record_application
+    from backend.modules.ta.models import Candidate
+    
+    candidate = Candidate(**{field: candidate_data[field] for field in CANDIDATE_FIELDS if field in candidate_data})
+    db.add(candidate)
+    record_application(db, candidate)
+    db.commit()
+    return {"candidate_id": candidate.id, "status": candidate.status, "applied_at": candidate.applied_at.isoformat()}
+
+@router.post("/candidates/diversity-report/rebuild")
+async def rebuild_diversity_report(db=Depends(get_db)):
+    """Backfill or reconcile the rollups from stored candidates"""
+    from backend.modules.ta.analytics import rebuild_rollups
+    
+    def rebuild():
+        rebuild_rollups(db)
+        db.commit()
+    await asyncio.to_thread(rebuild)
+    return {"rebuilt": True, "generated_at": datetime.now().isoformat()}
+
+@router.post("/candidates/{candidate_id}/stage")
+async def update_candidate_stage(candidate_id: int, payload: Dict[str, Any], db=Depends(get_db)):
+    """Move a candidate through the hiring funnel and update the rollups"""
+    from backend.modules.ta.analytics import FUNNEL_STAGES, record_stage_change
+    from backend.modules.ta.models import Candidate
+    
+    stage = payload.get("stage")
+    if stage not in FUNNEL_STAGES + ("rejected",):
+        raise HTTPException(status_code=422, detail=f"Unknown stage: {stage}")
+    candidate = db.get(Candidate, candidate_id)
+    if candidate is None:
+        raise HTTPException(status_code=404, detail="Candidate not found")
+    record_stage_change(db, candidate, stage)
+    db.commit()
+    return {"candidate_id": candidate_id, "status": candidate.status}
@@ -1,12 +1,20 @@
-from prometheus_client import Counter, Histogram, generate_latest
+from prometheus_client import Counter, Gauge, Histogram, generate_latest
 import time
 
 # Metrics
 REQUEST_COUNT = Counter('http_requests_total', 'Total HTTP requests', ['method', 'endpoint'])
 REQUEST_DURATION = Histogram('http_request_duration_seconds', 'HTTP request duration')
+AGENT_QUEUE_DEPTH = Gauge('agent_queue_depth', 'Agent LLM calls waiting for a slot', ['agent'])
+AGENT_QUEUE_WAIT = Histogram('agent_queue_wait_seconds', 'Time agent LLM calls spend queued', ['agent'])
 
 def track_metrics(method: str, endpoint: str):
     REQUEST_COUNT.labels(method=method, endpoint=endpoint).inc()
 
+def track_agent_queue_depth(agent: str, depth: int):
+    AGENT_QUEUE_DEPTH.labels(agent=agent).set(depth)
+
+def track_agent_queue_wait(agent: str, wait_seconds: float):
+    AGENT_QUEUE_WAIT.labels(agent=agent).observe(wait_seconds)
+
 def get_metrics():
-    return generate_latest()
\ No newline at end of file
+    return generate_latest()
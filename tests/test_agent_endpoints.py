@@ -0,0 +1,85 @@
+import json
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from backend.agents.local_llm import LocalLLMConfig, generate_tokens
+import backend.api.agent_endpoints as endpoints
+
+class LocalChatAgent:
+    """Streams completions from the local LLM stand-in and records session ids"""
+
+    def __init__(self):
+        self.sessions = []
+
+    async def stream_chat(self, message, context=None, session_id=None):
+        self.sessions.append(session_id)
+        config = LocalLLMConfig(latency_ms=0, tokens_per_second=0, completion_tokens=6)
+        for token in generate_tokens("gpt-4o-mini", [{"role": "user", "content": message}], 6, config):
+            yield token
+
+def _client(monkeypatch, chat_agent=None, agent_system=None):
+    monkeypatch.setattr(endpoints, "_chat_agent", chat_agent)
+    monkeypatch.setattr(endpoints, "_agent_system", agent_system)
+    app = FastAPI()
+    app.include_router(endpoints.router)
+    return TestClient(app)
+
+def _parse_sse(body):
+    events = []
+    for frame in body.strip().split("\n\n"):
+        name, data = frame.split("\n")
+        assert name.startswith("event: ") and data.startswith("data: ")
+        event = json.loads(data[len("data: "):])
+        assert event["event"] == name[len("event: "):]
+        events.append(event)
+    return events
+
+def test_chat_stream_passes_session_id(monkeypatch):
+    agent = LocalChatAgent()
+    client = _client(monkeypatch, chat_agent=agent)
+
+    body = client.post("/api/agents/chat/stream", json={"message": "Kira EPF", "session_id": "abc"}).text
+    events = _parse_sse(body)
+    assert agent.sessions == ["abc"]
+    assert events[0] == {"event": "session", "session_id": "abc"}
+    assert events[-1]["session_id"] == "abc"
+
+def test_chat_stream_starts_a_session_when_none_given(monkeypatch):
+    agent = LocalChatAgent()
+    client = _client(monkeypatch, chat_agent=agent)
+
+    events = _parse_sse(client.post("/api/agents/chat/stream", json={"message": "Hi"}).text)
+    assert agent.sessions[0]
+    assert events[0]["session_id"] == agent.sessions[0]
+
+class ScriptedAgentSystem:
+    def __init__(self, events):
+        self.events = events
+
+    async def stream_hr_request(self, request, agent_type="auto", use_cache=True):
+        for event in self.events:
+            yield event
+
+def test_request_stream_sse_framing(monkeypatch):
+    script = [
+        {"event": "agent", "agent": "payroll"},
+        {"event": "tool_start", "tool": "calculate_salary", "input": "EMP001"},
+        {"event": "tool_end", "tool": "calculate_salary", "output": "RM5000"},
+        {"event": "token", "content": "Gaji "},
+        {"event": "token", "content": "RM5000"},
+        {"event": "done", "agent": "payroll", "response": "Gaji RM5000", "cached": False}
+    ]
+    client = _client(monkeypatch, agent_system=ScriptedAgentSystem(script))
+
+    response = client.post("/api/agents/request/stream", json={"request": "Kira gaji EMP001"})
+    assert response.headers["content-type"].startswith("text/event-stream")
+    assert _parse_sse(response.text) == script
+
+def test_chat_stream_tokens_reassemble_local_completion(monkeypatch):
+    client = _client(monkeypatch, chat_agent=LocalChatAgent())
+
+    events = _parse_sse(client.post("/api/agents/chat/stream", json={"message": "Kira SOCSO", "session_id": "s1"}).text)
+    config = LocalLLMConfig(latency_ms=0, tokens_per_second=0, completion_tokens=6)
+    expected = generate_tokens("gpt-4o-mini", [{"role": "user", "content": "Kira SOCSO"}], 6, config)
+    assert [e["event"] for e in events] == ["session"] + ["token"] * len(expected) + ["done"]
+    assert [e["content"] for e in events[1:-1]] == expected
+    assert events[-1]["response"] == "".join(expected)
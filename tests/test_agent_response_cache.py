@@ -0,0 +1,91 @@
+import asyncio
+from backend.agents.response_cache import AgentResponseCache
+
+def test_key_ignores_case_and_whitespace():
+    cache = AgentResponseCache()
+    a = cache.make_key("payroll", "What is my  EPF rate?", "v1")
+    b = cache.make_key("payroll", "what is my epf rate", "v1")
+    assert a == b
+    assert a != cache.make_key("payroll", "what is my epf rate", "v2")
+    assert a != cache.make_key("recruitment", "what is my epf rate", "v1")
+
+def test_concurrent_misses_share_one_call():
+    """Identical in-flight requests coalesce into a single computation"""
+    cache = AgentResponseCache()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "EPF: 11% employee"
+
+    async def run():
+        key = cache.make_key("payroll", "epf rate", "v1")
+        results = await asyncio.gather(*[cache.get_or_compute(key, compute) for _ in range(10)])
+        again = await cache.get_or_compute(key, compute)
+        return results, again
+
+    results, again = asyncio.run(run())
+
+    assert len(calls) == 1
+    assert all(value == "EPF: 11% employee" for value, _ in results)
+    assert again == ("EPF: 11% employee", True)
+
+def test_lru_evicts_oldest_entry():
+    cache = AgentResponseCache(max_entries=2)
+
+    async def run():
+        await cache.set("a", 1)
+        await cache.set("b", 2)
+        await cache.get("a")
+        await cache.set("c", 3)
+        return await cache.get("a"), await cache.get("b")
+
+    assert asyncio.run(run()) == (1, None)
+
+def test_failures_are_not_cached():
+    cache = AgentResponseCache()
+
+    async def fail():
+        raise RuntimeError("rate limited")
+
+    async def run():
+        try:
+            await cache.get_or_compute("k", fail)
+        except RuntimeError:
+            pass
+        return await cache.get("k")
+
+    assert asyncio.run(run()) is None
+
+def test_cancelled_first_caller_does_not_cancel_waiters():
+    cache = AgentResponseCache()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return "SOCSO: 0.5%"
+
+    async def run():
+        leader = asyncio.ensure_future(cache.get_or_compute("k", compute))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(cache.get_or_compute("k", compute))
+        await asyncio.sleep(0.005)
+        leader.cancel()
+        return await waiter, await cache.get("k")
+
+    assert asyncio.run(run()) == (("SOCSO: 0.5%", True), "SOCSO: 0.5%")
+    assert len(calls) == 1
+
+def test_values_rejected_by_cacheable_are_not_stored():
+    cache = AgentResponseCache()
+
+    async def compute():
+        return "Payslip generated for Ali"
+
+    async def run():
+        value = await cache.get_or_compute("k", compute, cacheable=lambda _: False)
+        return value, await cache.get("k")
+
+    assert asyncio.run(run()) == (("Payslip generated for Ali", False), None)
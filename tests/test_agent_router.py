@@ -0,0 +1,29 @@
+from backend.agents.router import AgentRouter
+
+router = AgentRouter()
+
+def test_keyword_fast_path_uses_whole_words():
+    decision = router.route("Please calculate my EPF for March")
+    assert decision.agent == "payroll"
+    assert decision.method == "keyword"
+
+    # "company" used to hit the old "pay" keyword; it must not take the fast path
+    assert router.route("The company policy on dress code").method != "keyword"
+
+def test_keyword_inside_another_word_is_not_matched():
+    custom = AgentRouter(keywords={"payroll": ["pay"], "recruitment": ["hire"]})
+    assert custom.route("When is pay day?").method == "keyword"
+    assert custom.route("How do I repay my staff loan?").method != "keyword"
+    assert router.route("Can we rehire a former intern?").method != "keyword"
+
+def test_embedding_routes_without_keywords():
+    decision = router.route("How much will I be paid in December?")
+    assert decision.agent == "payroll"
+    assert decision.method == "embedding"
+
+    assert router.route("What is the company policy on remote work?").agent == "employee_relations"
+
+def test_low_confidence_falls_back_to_default():
+    decision = AgentRouter(threshold=0.99).route("xyzzy plugh")
+    assert decision.agent == "employee_relations"
+    assert decision.method == "fallback"
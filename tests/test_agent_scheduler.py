@@ -0,0 +1,141 @@
+import asyncio
+from backend.agents.scheduler import AgentScheduler, PRIORITY_CHAT, PRIORITY_PAYROLL
+
+class RateLimitError(Exception):
+    status_code = 429
+
+def test_concurrency_is_bounded():
+    scheduler = AgentScheduler(max_concurrency=2)
+    running = []
+    peak = []
+
+    async def call():
+        running.append(1)
+        peak.append(len(running))
+        await asyncio.sleep(0.01)
+        running.pop()
+        return "ok"
+
+    async def run():
+        return await asyncio.gather(*[scheduler.submit(call) for _ in range(6)])
+
+    assert asyncio.run(run()) == ["ok"] * 6
+    assert max(peak) == 2
+
+def test_payroll_runs_before_chat():
+    """Queued payroll calls jump ahead of queued chit-chat"""
+    scheduler = AgentScheduler(max_concurrency=1)
+    order = []
+
+    def make_call(name):
+        async def call():
+            order.append(name)
+            await asyncio.sleep(0.001)
+        return call
+
+    async def run():
+        blocker = asyncio.create_task(scheduler.submit(make_call("first")))
+        await asyncio.sleep(0)
+        chat = asyncio.create_task(scheduler.submit(make_call("chat"), priority=PRIORITY_CHAT))
+        payroll = asyncio.create_task(scheduler.submit(make_call("payroll"), priority=PRIORITY_PAYROLL))
+        await asyncio.gather(blocker, chat, payroll)
+
+    asyncio.run(run())
+    assert order == ["first", "payroll", "chat"]
+
+def test_identical_requests_are_coalesced():
+    scheduler = AgentScheduler()
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "answer"
+
+    async def run():
+        return await asyncio.gather(*[scheduler.submit(call, key="same") for _ in range(5)])
+
+    assert asyncio.run(run()) == ["answer"] * 5
+    assert len(calls) == 1
+    assert scheduler.metrics["coalesced"] == 4
+
+def test_cancelling_first_caller_keeps_coalesced_call_running():
+    scheduler = AgentScheduler()
+    calls = []
+
+    async def call():
+        calls.append(1)
+        await asyncio.sleep(0.02)
+        return "answer"
+
+    async def run():
+        first = asyncio.ensure_future(scheduler.submit(call, key="same"))
+        await asyncio.sleep(0)
+        second = asyncio.ensure_future(scheduler.submit(call, key="same"))
+        await asyncio.sleep(0.005)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(run()) == "answer"
+    assert len(calls) == 1
+
+def test_rate_limit_backs_off_and_shrinks_limit():
+    scheduler = AgentScheduler(max_concurrency=4, base_backoff=0.001)
+    attempts = []
+
+    async def call():
+        attempts.append(1)
+        if len(attempts) < 3:
+            raise RateLimitError("429 Too Many Requests")
+        return "ok"
+
+    assert asyncio.run(scheduler.submit(call)) == "ok"
+    assert len(attempts) == 3
+    assert scheduler.limit < scheduler.max_concurrency
+    assert scheduler.metrics["rate_limited"] == 2
+
+def test_queue_depth_is_reported_per_agent_while_queued():
+    depths = []
+    scheduler = AgentScheduler(max_concurrency=1, on_queue_change=lambda agent, depth: depths.append((agent, depth)))
+
+    async def call():
+        await asyncio.sleep(0.01)
+
+    async def run():
+        await asyncio.gather(
+            scheduler.submit(call, agent="payroll"),
+            scheduler.submit(call, agent="payroll"),
+            scheduler.submit(call, agent="payroll"),
+            scheduler.submit(call, agent="conversational")
+        )
+
+    asyncio.run(run())
+    # The gauge rises as the burst queues up, then drains back to zero
+    payroll = [depth for agent, depth in depths if agent == "payroll"]
+    assert max(payroll) == 2
+    assert payroll[-1] == 0
+    assert ("conversational", 1) in depths
+    assert scheduler.stats()["queued_by_agent"] == {}
+
+def test_slot_is_released_when_stream_is_closed_early():
+    scheduler = AgentScheduler(max_concurrency=1)
+
+    async def stream():
+        async with scheduler.slot(PRIORITY_CHAT, "conversational"):
+            while True:
+                yield "token"
+                await asyncio.sleep(0)
+
+    async def run():
+        tokens = stream()
+        assert await tokens.__anext__() == "token"
+        assert scheduler.stats()["active"] == 1
+        # Client disconnect: the consumer closes the generator mid-stream
+        await tokens.aclose()
+        assert scheduler.stats()["active"] == 0
+
+        async def call():
+            return "ok"
+        return await asyncio.wait_for(scheduler.submit(call), timeout=1)
+
+    assert asyncio.run(run()) == "ok"
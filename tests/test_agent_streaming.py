@@ -0,0 +1,66 @@
+import asyncio
+import contextlib
+import os
+import pytest
+from types import SimpleNamespace
+
+pytest.importorskip("langchain")
+
+class ScriptedExecutor:
+    """Emits astream_events v2 events like an AgentExecutor that calls one tool"""
+
+    def __init__(self, endless=False):
+        self.endless = endless
+        self.closed = False
+
+    async def astream_events(self, inputs, version):
+        try:
+            yield {"event": "on_tool_start", "name": "calculate_salary", "data": {"input": "EMP001"}}
+            yield {"event": "on_tool_end", "name": "calculate_salary", "data": {"output": "RM5000"}}
+            for content in ["Gaji ", "RM5000"]:
+                yield {"event": "on_chat_model_stream", "name": "ChatOpenAI", "data": {"chunk": SimpleNamespace(content=content)}}
+            while self.endless:
+                yield {"event": "on_chat_model_stream", "name": "ChatOpenAI", "data": {"chunk": SimpleNamespace(content=".")}}
+                await asyncio.sleep(0)
+            yield {"event": "on_chain_end", "name": "AgentExecutor", "data": {"output": {"output": "Gaji RM5000"}}}
+        finally:
+            self.closed = True
+
+def _system(monkeypatch, executor):
+    monkeypatch.syspath_prepend(os.path.join(os.path.dirname(__file__), "..", "backend"))
+    from agents.multi_agent_system import HRMultiAgentSystem
+    from agents.response_cache import AgentResponseCache
+    from agents.scheduler import AgentScheduler
+
+    system = HRMultiAgentSystem.__new__(HRMultiAgentSystem)
+    system.agents = {"payroll": executor}
+    system.agent_versions = {"payroll": "test"}
+    system.response_cache = AgentResponseCache()
+    system.scheduler = AgentScheduler(max_concurrency=1)
+    return system
+
+def test_stream_event_order(monkeypatch):
+    system = _system(monkeypatch, ScriptedExecutor())
+
+    async def collect():
+        return [event async for event in system.stream_hr_request("Kira gaji", agent_type="payroll")]
+
+    events = asyncio.run(collect())
+    assert [e["event"] for e in events] == ["agent", "tool_start", "tool_end", "token", "token", "done"]
+    assert events[-1]["response"] == "Gaji RM5000"
+    assert not events[-1]["cached"]
+
+def test_closing_stream_early_releases_slot(monkeypatch):
+    executor = ScriptedExecutor(endless=True)
+    system = _system(monkeypatch, executor)
+
+    async def run():
+        events = system.stream_hr_request("Kira gaji", agent_type="payroll")
+        async with contextlib.aclosing(events):
+            async for event in events:
+                if event["event"] == "token":
+                    break
+        return system.scheduler.stats()["active"]
+
+    assert asyncio.run(run()) == 0
+    assert executor.closed
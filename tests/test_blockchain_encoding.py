@@ -0,0 +1,77 @@
+import json
+import pytest
+from datetime import datetime
+from decimal import Decimal
+from backend.blockchain.block_store import BlockStore, decode_block, encode_block
+from backend.blockchain.encoding import decode_value, encode_value
+from backend.blockchain.hrms_blockchain import (
+    HRMSBlockchain, HRMSSmartContract, HRTransaction, compute_header_hash, compute_transaction_hash
+)
+from backend.blockchain.merkle import merkle_root
+
+def test_encoding_is_canonical_and_round_trips():
+    a = {"basic_salary": 5500, "epf": {"employee": 605.0, "employer": 715}, "month": "2024-12"}
+    b = {"month": "2024-12", "epf": {"employer": 715, "employee": 605.0}, "basic_salary": 5500}
+    assert encode_value(a) == encode_value(b)
+    assert encode_value(-0.0) == encode_value(0.0)
+
+    value = {"n": -(2 ** 70), "flags": [True, None, "EPF"], "amount": Decimal("4867.50"), "raw": b"\x00\xff"}
+    assert decode_value(encode_value(value)) == value
+
+def test_non_string_dict_keys_are_rejected():
+    with pytest.raises(TypeError):
+        encode_value({1: "a"})
+    with pytest.raises(TypeError):
+        encode_value({"ok": {None: "b"}})
+
+def test_transaction_hash_ignores_key_order():
+    when = datetime(2024, 12, 31, 9, 0)
+    a = HRTransaction("EMP001", "payroll", {"basic_salary": 5500, "month": "2024-12"}, when)
+    b = HRTransaction("EMP001", "payroll", {"month": "2024-12", "basic_salary": 5500}, when)
+    assert a.compute_hash() == b.compute_hash()
+    assert not hasattr(a, "__dict__")
+
+def test_binary_blocks_are_smaller_than_json():
+    blockchain = HRMSBlockchain()
+    contract = HRMSSmartContract(blockchain)
+    contract.record_payroll_batch({f"EMP{i:04d}": {"basic_salary": 3000 + i, "epf_employee": 330.0 + i} for i in range(200)})
+    block = blockchain.mine_block()
+
+    assert decode_block(encode_block(block)) == block
+    assert len(encode_block(block)) < len(json.dumps(block, separators=(",", ":")))
+
+def test_export_import_round_trip():
+    blockchain = HRMSBlockchain()
+    HRMSSmartContract(blockchain).record_payroll("EMP001", {"basic_salary": 5000})
+    blockchain.mine_block()
+
+    assert HRMSBlockchain.import_blocks(blockchain.export_blocks()) == list(blockchain.chain)
+
+def test_legacy_json_chain_still_verifies(tmp_path):
+    """Blocks hashed with json.dumps before version 2 stay valid next to new blocks"""
+    store = BlockStore(str(tmp_path))
+    genesis_ts = "2024-01-01T00:00:00"
+    genesis = {"index": 0, "timestamp": genesis_ts, "transactions": [], "merkle_root": merkle_root([]),
+               "previous_hash": "0", "nonce": 0}
+    genesis["hash"] = compute_header_hash(0, genesis_ts, genesis["merkle_root"], "0", 0)
+    store.append(genesis)
+
+    tx_time = datetime(2024, 1, 31, 9, 0)
+    tx = {"employee_id": "EMP001", "type": "payroll", "data": {"month": "2024-01", "basic_salary": 5000},
+          "timestamp": tx_time.isoformat()}
+    tx["hash"] = compute_transaction_hash("EMP001", "payroll", tx["data"], str(tx_time))
+    legacy = {"index": 1, "timestamp": "2024-01-31T10:00:00", "transactions": [tx],
+              "merkle_root": merkle_root([tx["hash"]]), "previous_hash": genesis["hash"]}
+    nonce = 0
+    while not compute_header_hash(1, legacy["timestamp"], legacy["merkle_root"], genesis["hash"], nonce).startswith("00"):
+        nonce += 1
+    legacy.update(nonce=nonce, hash=compute_header_hash(1, legacy["timestamp"], legacy["merkle_root"], genesis["hash"], nonce))
+    store.append(legacy)
+    store.close()
+
+    blockchain = HRMSBlockchain(storage_dir=str(tmp_path))
+    assert blockchain.get_block(1) == legacy
+    HRMSSmartContract(blockchain).record_payroll("EMP001", {"month": "2024-02"})
+    assert blockchain.mine_block()["version"] == 2
+    assert blockchain.verify_chain(full_audit=True)
+    blockchain.close()
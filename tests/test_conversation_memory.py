@@ -0,0 +1,57 @@
+import asyncio
+from backend.agents.conversation_memory import ConversationMemoryManager, InMemorySessionStore
+
+def test_sessions_are_isolated():
+    memory = ConversationMemoryManager()
+
+    async def run():
+        await memory.append("alice", "What is my EPF rate?", "11% of your salary.")
+        return await memory.history("alice"), await memory.history("bob")
+
+    alice, bob = asyncio.run(run())
+    assert [m["role"] for m in alice] == ["user", "assistant"]
+    assert bob == []
+
+def test_old_turns_fold_into_summary():
+    """Prompt history stays within budget over a long chat"""
+    summaries = []
+
+    async def summarize(summary, turns):
+        summaries.append(len(turns))
+        return f"{summary} +{len(turns)} turns".strip()
+
+    memory = ConversationMemoryManager(summarize_fn=summarize, prompt_token_budget=50, keep_recent_turns=2)
+
+    async def run():
+        for i in range(20):
+            await memory.append("s1", f"question {i} " * 10, f"answer {i} " * 10)
+            await memory.wait_idle("s1")
+        return await memory.history("s1")
+
+    history = asyncio.run(run())
+    assert history[0]["role"] == "system"
+    assert "turns" in history[0]["content"]
+    assert len(history) <= 1 + 2 + 2
+    assert summaries
+
+def test_hard_cap_trims_without_summarizer():
+    memory = ConversationMemoryManager(max_session_tokens=100)
+
+    async def run():
+        for i in range(50):
+            await memory.append("s1", "x" * 80, "y" * 80)
+        return await memory.history("s1")
+
+    history = asyncio.run(run())
+    assert sum(len(m["content"]) for m in history) // 4 <= 100
+
+def test_idle_sessions_expire():
+    store = InMemorySessionStore(idle_ttl=0)
+    memory = ConversationMemoryManager(store)
+
+    async def run():
+        await memory.append("s1", "hi", "hello")
+        await asyncio.sleep(0.01)
+        return await memory.history("s1")
+
+    assert asyncio.run(run()) == []
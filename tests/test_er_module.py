@@ -0,0 +1,361 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from backend.modules.er_module import MalaysianSentimentAnalyzer, load_lexicon, router
+
+def _client():
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+def test_lexicon_is_loaded_once():
+    assert load_lexicon() is load_lexicon()
+    assert load_lexicon()[0]["puas hati"] == 0.7
+
+def test_phrases_and_negation_match():
+    analyzer = MalaysianSentimentAnalyzer()
+    result = analyzer.analyze("Bos tak adil, saya TAK PUAS   HATI. Kerja pun tak seronok")
+    assert result["detected_terms"] == ["tak adil", "tak puas hati", "not seronok"]
+    assert result["sentiment_score"] == -2.1
+    assert result["sentiment"] == "negative"
+
+    assert analyzer.analyze("Puas hati dengan team, gembira!")["sentiment_score"] == 1.5
+    # No partial-word matches ("best" in "bestari", "sabo" in "sabotaj")
+    assert analyzer.analyze("Sekolah bestari, sabotaj")["detected_terms"] == []
+
+def test_batch_endpoint_scores_export():
+    texts = ["puas hati", "stress gila", "ok je"] * 1000
+    body = _client().post("/api/er/sentiment/analyze:batch", json={"texts": texts}).json()
+    assert body["total_analyzed"] == 3000
+    assert body["sentiment_counts"] == {"positive": 1000, "negative": 1000, "neutral": 1000}
+    assert body["average_score"] == 0.0
+    assert body["results"][0]["detected_terms"] == ["puas hati"]
+
+def _er_session():
+    from sqlalchemy import Column, Integer, Table, create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+    from backend.modules.er.models import Base
+
+    if "employees" not in Base.metadata.tables:
+        Table("employees", Base.metadata, Column("id", Integer, primary_key=True))
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    for table in ("employees", "burnout_scores", "pulse_surveys", "pulse_rollups", "pulse_score_bins",
+                  "whistleblow_reports"):
+        Base.metadata.tables[table].create(engine)
+    return sessionmaker(bind=engine)()
+
+def _workforce_rows(n):
+    religions = ["Islam", "Buddhism", "Hinduism", "Christianity"]
+    ethnicities = ["Malay", "Chinese", "Indian", "Others"]
+    return [{
+        "employee_id": i,
+        "overtime_hours": (i * 7) % 60,
+        "leave_taken": i % 12,
+        "workload_score": None if i % 97 == 0 else (i * 3) % 11,
+        "religion": religions[i % 4],
+        "ethnicity": ethnicities[(i // 4) % 4],
+        "department": ["IT", "HR", "Finance"][i % 3]
+    } for i in range(n)]
+
+def test_predict_has_no_empty_recommendations_and_matches_workforce_scores():
+    from backend.modules.er.burnout import WorkforceFeatures, score_workforce
+    from backend.modules.er_module import BurnoutPredictor
+
+    predictor = BurnoutPredictor()
+    assert predictor.predict({"religion": "Buddhism"})["recommendations"] == [
+        "Schedule wellness check-in", "Review workload distribution"
+    ]
+    rows = _workforce_rows(400)
+    scores = score_workforce(WorkforceFeatures.from_rows(rows))
+    for row, score in zip(rows, scores):
+        single = {k: v for k, v in row.items() if v is not None}
+        assert predictor.predict(single)["burnout_risk"] == round(min(score, 10), 2)
+
+def test_nightly_scoring_persists_alerts_for_dashboard(monkeypatch):
+    import time
+    from datetime import date
+    from fastapi import FastAPI
+    from sqlalchemy.orm import sessionmaker
+    from backend.api.dashboard import router as dashboard_router
+    from backend.core import database
+    from backend.modules.er.burnout import WorkforceFeatures, run_burnout_scoring
+    from backend.modules.er.models import BurnoutScore
+    from backend.modules.er_module import get_db
+
+    session = _er_session()
+    features = WorkforceFeatures.from_rows(_workforce_rows(50000))
+    started = time.perf_counter()
+    summary = run_burnout_scoring(session, features, threshold=6.5, scored_on=date(2025, 9, 1))
+    assert time.perf_counter() - started < 5
+    assert summary["employees_scored"] == 50000
+    assert 0 < summary["high_risk"] < summary["alerts"] < 50000
+    assert session.query(BurnoutScore).count() == summary["alerts"]
+    assert session.query(BurnoutScore).filter(BurnoutScore.burnout_risk < 6.5).count() == 0
+
+    # Re-running replaces that night's alerts; the dashboard reads the latest night only
+    run_burnout_scoring(session, features, threshold=6.5, scored_on=date(2025, 9, 1))
+    later = run_burnout_scoring(session, features, threshold=7.0, scored_on=date(2025, 9, 2))
+    assert session.query(BurnoutScore).count() == summary["alerts"] + later["alerts"]
+
+    app = FastAPI()
+    app.include_router(router)
+    app.include_router(dashboard_router)
+    app.dependency_overrides[get_db] = lambda: session
+    monkeypatch.setattr(database, "_engine", session.get_bind())
+    monkeypatch.setattr(database, "SessionLocal", sessionmaker(bind=session.get_bind()))
+    client = TestClient(app)
+    assert client.get("/api/dashboard").json()["er"]["burnout_alerts"] == later["alerts"]
+    alerts = client.get("/api/er/burnout/alerts", params={"limit": 5}).json()
+    assert alerts["scored_on"] == "2025-09-02"
+    assert [a["risk_level"] for a in alerts["alerts"]] == ["high"] * 5
+    assert alerts["alerts"][0]["burnout_risk"] >= alerts["alerts"][-1]["burnout_risk"]
+
+    # The nightly entry point scores tonight's export; the dashboard follows it
+    tonight = client.post("/api/er/burnout/score-workforce",
+                          json={"employees": _workforce_rows(1000), "threshold": 7.0}).json()
+    assert tonight["scored_on"] == date.today().isoformat() and tonight["employees_scored"] == 1000
+    assert client.get("/api/dashboard/er").json()["er"]["burnout_alerts"] == tonight["alerts"]
+    assert client.post("/api/er/burnout/score-workforce", json={"employees": [{"overtime_hours": 3}]}).status_code == 422
+
+def test_dashboard_survives_missing_database(monkeypatch):
+    from sqlalchemy.orm import sessionmaker
+    from backend.core import database
+    from backend.main import app
+
+    monkeypatch.setattr(database, "DATABASE_URL", "postgresql://hrms@127.0.0.1:1/none")
+    monkeypatch.setattr(database, "_engine", None)
+    monkeypatch.setattr(database, "SessionLocal", sessionmaker())
+    client = TestClient(app)
+    assert client.get("/api/dashboard").json()["er"]["burnout_alerts"] is None
+    assert client.get("/api/dashboard/ta").json()["ta"]["funnel"]["hired"] == 8
+
+def test_pulse_results_come_from_running_rollups(monkeypatch):
+    import statistics
+    from backend.modules import er_module
+    from fastapi import FastAPI
+    from backend.modules.er.pulse import pulse_results, rebuild_pulse_rollups
+    from backend.modules.er_module import get_db
+
+    monkeypatch.setattr(er_module, "_topic_model", None)
+    session = _er_session()
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: session
+    client = TestClient(app)
+
+    departments = ["IT", "HR", "Finance"]
+    scores = {d: [] for d in departments}
+    for i in range(300):
+        department = departments[i % 3]
+        score = round((i * 37 % 101) / 10, 1)
+        scores[department].append(score)
+        body = {"engagement_score": score, "department": department, "age": 25 + i % 30,
+                "ethnicity": ["Malay", "Chinese"][i % 2], "feedback_text": "puas hati" if i % 4 else "stress"}
+        assert client.post("/api/er/pulse-survey/submit", json=body).status_code == 200
+    assert client.post("/api/er/pulse-survey/submit", json={"engagement_score": 11}).status_code == 422
+
+    results = client.get("/api/er/pulse-survey/results").json()
+    everything = [s for values in scores.values() for s in values]
+    assert results["total_responses"] == 300
+    assert results["overall_satisfaction"] == round(statistics.fmean(everything), 2)
+    assert results["department_breakdown"] == {d: round(statistics.fmean(v), 2) for d, v in sorted(scores.items())}
+    it = results["statistics"]["department"]["IT"]
+    assert it["stddev"] == round(statistics.pstdev(scores["IT"]), 2)
+    assert it["p50"] == sorted(scores["IT"])[49]
+    assert it["average_sentiment"] == round((75 * 0.7 - 25 * 0.7) / 100, 3)
+    assert set(results["demographic_insights"]["by_age_group"]) == {"20-30", "31-40", "41-50", "50+"}
+
+    # A GROUP BY rebuild lands on the same figures
+    rebuild_pulse_rollups(session)
+    rebuilt = pulse_results(session)
+    assert rebuilt["statistics"] == results["statistics"]
+
+def test_pulse_rebuild_bins_round_half_up_on_postgresql():
+    from sqlalchemy import literal, select
+    from sqlalchemy.dialects import postgresql
+    from backend.modules.er.models import PulseSurvey
+    from backend.modules.er.pulse import _score_bin_sql, score_bin
+
+    # A bare CAST rounds on PostgreSQL: 7.3 * 10 + 0.5 = 73.5 would land in bin 74, not 73
+    compiled = str(_score_bin_sql(PulseSurvey.engagement_score).compile(dialect=postgresql.dialect()))
+    assert compiled.startswith("CAST(floor(")
+    session = _er_session()
+    for score in (7.24, 7.25, 7.3, 0.0, 10.0):
+        assert session.execute(select(_score_bin_sql(literal(score)))).scalar() == score_bin(score)
+
+PAY = ["salary is too low for the cost of living", "gaji rendah, salary increment too small",
+       "our salary increment was too small this year", "low salary compared to other companies"]
+OVERTIME = ["too much overtime every week", "overtime without pay, workload too heavy",
+            "workload is crazy, overtime every night", "heavy workload and overtime"]
+MANAGER = ["my manager never listens", "manager micromanages the team", "the manager shouts at staff",
+           "bad manager, no support"]
+
+def test_topics_form_incrementally_and_sentiment_slides():
+    from datetime import datetime, timedelta
+    from backend.modules.er.topics import TopicModel
+
+    model = TopicModel(window=timedelta(days=7))
+    start = datetime(2025, 9, 1, 9)
+    # Interleaved, one at a time: each comment joins its theme's topic
+    for i, (pay, overtime) in enumerate(zip(PAY, OVERTIME)):
+        assert model.ingest(pay, -0.6, start + timedelta(hours=i)) == 0
+        assert model.ingest(overtime, -0.8, start + timedelta(hours=i)) == 1
+    # A later mini-batch about managers opens a third topic
+    assert model.ingest_many(MANAGER, [0.2] * 4, [start + timedelta(days=5)] * 4) == [2] * 4
+
+    trending = model.trending(now=start + timedelta(days=6))
+    assert [t["topic"] for t in trending] == ["salary low", "overtime workload", "manager never"]
+    assert trending[1] == {"topic": "overtime workload", "sentiment": -0.8, "mentions": 4}
+
+    # Ten days on, only the manager comments are still in the window; labels follow the topic's words
+    model.ingest("salary increment is a joke", 0.4, start + timedelta(days=10))
+    trending = model.trending(now=start + timedelta(days=10))
+    assert trending == [{"topic": "manager never", "sentiment": 0.2, "mentions": 4},
+                        {"topic": "salary increment", "sentiment": 0.4, "mentions": 1}]
+
+def test_results_endpoint_trends_stored_and_new_comments(monkeypatch):
+    from datetime import datetime
+    from fastapi import FastAPI
+    from backend.modules import er_module
+    from backend.modules.er.models import PulseSurvey
+    from backend.modules.er_module import get_db
+
+    monkeypatch.setattr(er_module, "_topic_model", None)
+    session = _er_session()
+    # Comments stored before this process started are replayed once
+    session.add_all([PulseSurvey(engagement_score=5, feedback_text=text, sentiment_score=-0.7,
+                                 survey_date=datetime.now()) for text in OVERTIME])
+    session.commit()
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: session
+    client = TestClient(app)
+
+    assert client.get("/api/er/pulse-survey/results").json()["trending_topics"][0]["topic"] == "overtime workload"
+    for text in PAY + PAY:
+        client.post("/api/er/pulse-survey/submit", json={"engagement_score": 4, "feedback_text": text})
+    topics = client.get("/api/er/pulse-survey/results").json()["trending_topics"]
+    assert [(t["topic"], t["mentions"]) for t in topics] == [("salary low", 8), ("overtime workload", 4)]
+
+def test_whistleblowing_intake_journals_then_stores_encrypted(tmp_path):
+    import asyncio
+    import os
+    from cryptography.fernet import Fernet
+    from sqlalchemy.orm import sessionmaker
+    from backend.modules.er.models import WhistleblowReport
+    from backend.modules.er.whistleblowing import WhistleblowIntake, tracking_hash
+
+    key = Fernet.generate_key().decode()
+    factory = sessionmaker(bind=_er_session().get_bind())
+    journal = str(tmp_path / "intake.log")
+    failures = {"left": 2}
+
+    class FlakyIntake(WhistleblowIntake):
+        def _store(self, record):
+            if failures["left"]:
+                failures["left"] -= 1
+                raise ConnectionError("database unavailable")
+            super()._store(record)
+
+    async def run():
+        intake = FlakyIntake(journal, key, session_factory=factory, retry_base_seconds=0.001)
+        receipts = await asyncio.gather(*[intake.submit({"description": text}) for text in (
+            "Supervisor asked for a bribe to approve overtime claims",
+            "Fire exit blocked by boxes, very unsafe",
+            "Canteen prices went up"
+        )])
+        # Acknowledged before storage: nothing is in the table yet
+        assert factory().query(WhistleblowReport).count() == 0
+        with open(journal, "rb") as f:
+            journaled = f.read()
+        assert journaled and b"bribe" not in journaled
+        await intake.drain()
+        await intake.close()
+        return receipts
+
+    receipts = asyncio.run(run())
+    rows = {r.report_id: r for r in factory().query(WhistleblowReport)}
+    assert [(rows[r["report_id"]].category, rows[r["report_id"]].routed_to) for r in receipts] == [
+        ("corruption", "audit_committee"), ("safety", "osh_committee"), ("other", "hr_compliance")
+    ]
+    first = rows[receipts[0]["report_id"]]
+    assert first.tracking_hash == tracking_hash(receipts[0]["tracking_code"])
+    assert Fernet(key).decrypt(first.description.encode()).decode().startswith("Supervisor asked")
+    # Everything stored, so the journal is emptied
+    assert os.path.getsize(journal) == 0
+
+def test_whistleblowing_intake_requeues_after_exhausting_retries(tmp_path):
+    import asyncio
+    import os
+    from cryptography.fernet import Fernet
+    from sqlalchemy.orm import sessionmaker
+    from backend.modules.er.models import WhistleblowReport
+    from backend.modules.er.whistleblowing import WhistleblowIntake
+
+    key = Fernet.generate_key().decode()
+    factory = sessionmaker(bind=_er_session().get_bind())
+    journal = str(tmp_path / "intake.log")
+    failures = {"left": 3}
+
+    class OutageIntake(WhistleblowIntake):
+        def _store(self, record):
+            if failures["left"]:
+                failures["left"] -= 1
+                raise ConnectionError("database unavailable")
+            super()._store(record)
+
+    async def run():
+        intake = OutageIntake(journal, key, session_factory=factory, max_attempts=2,
+                              retry_base_seconds=0.001, requeue_seconds=0.01)
+        for text in ("Bribe requested by vendor", "Unsafe scaffolding at site B"):
+            await intake.submit({"description": text})
+        await intake.drain()
+        await intake.close()
+        return intake
+
+    intake = asyncio.run(run())
+    # The first report gave up twice and was re-queued, then stored behind the second
+    assert intake.requeued == 1
+    assert factory().query(WhistleblowReport).count() == 2
+    assert os.path.getsize(journal) == 0
+
+def test_whistleblowing_intake_replays_unstored_reports(tmp_path):
+    import asyncio
+    import os
+    from cryptography.fernet import Fernet
+    from sqlalchemy.orm import sessionmaker
+    from backend.modules.er.models import WhistleblowReport
+    from backend.modules.er.whistleblowing import IntakeJournal, WhistleblowIntake
+
+    key = Fernet.generate_key().decode()
+    factory = sessionmaker(bind=_er_session().get_bind())
+    journal_path = str(tmp_path / "intake.log")
+    # Journaled by a process that died before its worker ran, plus a torn tail
+    journal = IntakeJournal(journal_path)
+    description = Fernet(key).encrypt(b"Manager keeps harassing the interns").decode()
+    journal.append({"report_id": "WB-20250901-0000AAAA", "tracking_hash": "0" * 64, "category": None,
+                    "description": description, "received_at": "2025-09-01T10:00:00"})
+    journal.close()
+    with open(journal_path, "ab") as f:
+        f.write(b"\x00\x00\x01")
+
+    async def run():
+        intake = WhistleblowIntake(journal_path, key, session_factory=factory)
+        intake.start()
+        await intake.drain()
+        await intake.close()
+
+    asyncio.run(run())
+    row = factory().query(WhistleblowReport).one()
+    assert (row.report_id, row.category, row.routed_to) == ("WB-20250901-0000AAAA", "harassment", "er_investigations")
+    # The torn tail was cut off, so the drained journal could be emptied
+    assert os.path.getsize(journal_path) == 0
+
+def test_whistleblowing_endpoint_requires_key_and_description(monkeypatch):
+    from backend.modules import er_module
+
+    monkeypatch.setattr(er_module, "_whistleblow_intake", None)
+    monkeypatch.delenv("HRMS_WHISTLEBLOW_KEY", raising=False)
+    client = _client()
+    assert client.post("/api/er/whistleblowing/submit", json={"description": " "}).status_code == 422
+    assert client.post("/api/er/whistleblowing/submit", json={"description": "Kickbacks"}).status_code == 503
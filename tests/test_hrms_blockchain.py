@@ -0,0 +1,260 @@
+import os
+from datetime import datetime
+from backend.blockchain.merkle import merkle_root
+from backend.blockchain.hrms_blockchain import HRMSBlockchain, HRMSSmartContract, HRTransaction, block_hash
+
+def _record_payroll(blockchain, employee_id, month):
+    contract = HRMSSmartContract(blockchain)
+    contract.record_payroll(employee_id, {"basic_salary": 5000, "month": month})
+    return blockchain.mine_block()
+
+def test_blocks_survive_restart(tmp_path):
+    """Persisted chain reloads with the same blocks and still verifies"""
+    blockchain = HRMSBlockchain(storage_dir=str(tmp_path))
+    mined = [_record_payroll(blockchain, "EMP001", f"2024-{m:02d}") for m in range(1, 4)]
+    blockchain.close()
+
+    reopened = HRMSBlockchain(storage_dir=str(tmp_path))
+    assert len(reopened.chain) == 4
+    assert reopened.get_block(2) == mined[1]
+    assert reopened.get_block_by_hash(mined[2]["hash"]) == mined[2]
+    assert reopened.verify_chain()
+    reopened.close()
+
+def test_torn_tail_is_discarded_on_recovery(tmp_path):
+    blockchain = HRMSBlockchain(storage_dir=str(tmp_path), checkpoint_every=1)
+    _record_payroll(blockchain, "EMP001", "2024-01")
+    blockchain.close()
+
+    # Simulate a crash halfway through writing the next record
+    with open(os.path.join(tmp_path, "segment-000000.log"), "ab") as segment:
+        segment.write(b"\x00\x00\x10\x00garbage")
+
+    reopened = HRMSBlockchain(storage_dir=str(tmp_path))
+    assert len(reopened.chain) == 2
+    block = _record_payroll(reopened, "EMP002", "2024-02")
+    assert reopened.get_block(2) == block
+    assert reopened.verify_chain()
+    reopened.close()
+
+def test_uncheckpointed_tail_is_replayed(tmp_path):
+    blockchain = HRMSBlockchain(storage_dir=str(tmp_path), checkpoint_every=1000, sync_every=1)
+    for m in range(1, 6):
+        _record_payroll(blockchain, "EMP001", f"2024-{m:02d}")
+    # No close(): the checkpoint is still at height 0
+    blockchain.store.flush()
+
+    reopened = HRMSBlockchain(storage_dir=str(tmp_path))
+    assert len(reopened.chain) == 6
+    assert reopened.verify_chain()
+
+def test_employee_history_uses_index(tmp_path):
+    blockchain = HRMSBlockchain(storage_dir=str(tmp_path))
+    contract = HRMSSmartContract(blockchain)
+    for m in range(1, 4):
+        contract.record_payroll("EMP001", {"month": f"2024-{m:02d}"})
+        contract.record_payroll("EMP002", {"month": f"2024-{m:02d}"})
+        blockchain.mine_block()
+    blockchain.close()
+
+    reopened = HRMSBlockchain(storage_dir=str(tmp_path))
+    history = reopened.get_employee_history("EMP002")
+    assert [h["transaction"]["data"]["month"] for h in history] == ["2024-01", "2024-02", "2024-03"]
+    assert all(h["transaction"]["employee_id"] == "EMP002" for h in history)
+
+    verification = HRMSSmartContract(reopened).verify_employment("EMP001")
+    assert verification["verified"]
+    assert verification["total_records"] == 3
+    assert not HRMSSmartContract(reopened).verify_employment("EMP999")["verified"]
+
+def test_routine_verification_starts_at_checkpoint(tmp_path, monkeypatch):
+    import backend.blockchain.hrms_blockchain as module
+
+    blockchain = HRMSBlockchain(storage_dir=str(tmp_path))
+    for m in range(1, 6):
+        _record_payroll(blockchain, "EMP001", f"2024-{m:02d}")
+    assert blockchain.verify_chain()
+    assert blockchain.verify_checkpoint.height == 6
+
+    _record_payroll(blockchain, "EMP001", "2024-06")
+    checked = []
+    original = module._verify_block_range
+    monkeypatch.setattr(module, "_verify_block_range",
+                        lambda blocks, prev, *rest: checked.extend(b["index"] for b in blocks) or original(blocks, prev, *rest))
+    assert blockchain.verify_chain()
+    assert checked == [6]
+
+def test_full_audit_detects_tampering_in_parallel():
+    blockchain = HRMSBlockchain()
+    for m in range(1, 10):
+        _record_payroll(blockchain, "EMP001", f"2024-{m:02d}")
+    assert blockchain.verify_chain(full_audit=True, workers=2, chunk_size=3)
+
+    blockchain.chain[4]["transactions"][0]["data"]["basic_salary"] = 9999
+    # Routine verification trusts the checkpoint; the audit does not
+    assert blockchain.verify_chain()
+    assert not blockchain.verify_chain(full_audit=True, workers=2, chunk_size=3)
+
+def test_inclusion_proofs_verify_against_header_only():
+    blockchain = HRMSBlockchain()
+    contract = HRMSSmartContract(blockchain)
+    tx_hashes = [contract.record_payroll(f"EMP{i:03d}", {"basic_salary": 3000 + i}) for i in range(7)]
+    block = blockchain.mine_block()
+
+    for tx_hash in tx_hashes:
+        proof = blockchain.get_inclusion_proof(block["index"], tx_hash)
+        assert len(proof["proof"]) <= 3
+        assert "transactions" not in proof["block_header"]
+        assert HRMSBlockchain.verify_inclusion_proof(proof, blockchain.consensus)
+        assert blockchain.is_header_on_chain(proof["block_header"])
+
+    forged = blockchain.get_inclusion_proof(block["index"], tx_hashes[0])
+    forged["tx_hash"] = tx_hashes[1]
+    assert not HRMSBlockchain.verify_inclusion_proof(forged, blockchain.consensus)
+
+    # A self-consistent header that was never sealed is rejected
+    fake_root = merkle_root([tx_hashes[0]])
+    nonce = 0
+    while True:
+        fake_hash = block_hash(dict(block, merkle_root=fake_root, nonce=nonce))
+        if not fake_hash.startswith("00"):
+            break
+        nonce += 1
+    fake_header = HRMSBlockchain.block_header(dict(block, merkle_root=fake_root, nonce=nonce, hash=fake_hash))
+    fake = {"tx_hash": tx_hashes[0], "proof": [], "block_header": fake_header}
+    assert not HRMSBlockchain.verify_inclusion_proof(fake, blockchain.consensus)
+    assert not blockchain.is_header_on_chain(fake_header)
+
+def test_tampered_transaction_fails_verification():
+    blockchain = HRMSBlockchain()
+    _record_payroll(blockchain, "EMP001", "2024-01")
+    blockchain.chain[1]["transactions"][0]["data"]["basic_salary"] = 1
+    assert not blockchain.verify_chain(full_audit=True)
+
+def test_permissioned_mode_seals_without_proof_of_work():
+    from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+    from backend.blockchain.consensus import PermissionedConsensus
+
+    blockchain = HRMSBlockchain(consensus=PermissionedConsensus(Ed25519PrivateKey.generate()))
+    block = _record_payroll(blockchain, "EMP001", "2024-01")
+    assert block["nonce"] == 0
+    assert blockchain.verify_chain(full_audit=True)
+
+    # A seal from a key that is not an authority is rejected
+    outsider = HRMSBlockchain(consensus=PermissionedConsensus(Ed25519PrivateKey.generate()))
+    forged = _record_payroll(outsider, "EMP001", "2024-01")
+    blockchain.chain[1].update(sealer=forged["sealer"], seal_signature=forged["seal_signature"])
+    assert not blockchain.verify_chain(full_audit=True)
+
+def test_parallel_proof_of_work_finds_valid_nonce():
+    from backend.blockchain.consensus import ProofOfWorkConsensus
+
+    consensus = ProofOfWorkConsensus(difficulty=4, workers=2, batch_size=20000, parallel_from_difficulty=3)
+    blockchain = HRMSBlockchain(consensus=consensus)
+    block = _record_payroll(blockchain, "EMP001", "2024-01")
+    assert block["hash"].startswith("0000")
+    assert blockchain.verify_chain(full_audit=True)
+    blockchain.close()
+
+def test_sealer_batches_and_returns_receipts():
+    import asyncio
+    from backend.blockchain.sealer import BlockSealer
+
+    blockchain = HRMSBlockchain()
+    sealer = BlockSealer(blockchain, max_transactions=4, max_wait_ms=50)
+    contract = HRMSSmartContract(blockchain, sealer=sealer)
+    for i in range(10):
+        contract.record_payroll(f"EMP{i:03d}", {"month": "2024-01"})
+    sealer.flush(timeout=5)
+
+    # Bounded blocks: 4 + 4 + 2
+    assert [len(b["transactions"]) for b in blockchain.chain[1:]] == [4, 4, 2]
+
+    async def record():
+        return await contract.record_payroll_async("EMP100", {"month": "2024-02"})
+
+    receipt = asyncio.run(record())
+    block = blockchain.get_block(receipt["block_index"])
+    assert block["transactions"][receipt["position"]]["hash"] == receipt["tx_hash"]
+    sealer.close(timeout=5)
+    assert blockchain.verify_chain(full_audit=True)
+
+def test_sealer_seals_single_transaction_after_max_wait():
+    import time
+    from backend.blockchain.sealer import BlockSealer
+
+    blockchain = HRMSBlockchain()
+    sealer = BlockSealer(blockchain, max_transactions=100, max_wait_ms=50)
+    started = time.monotonic()
+    future = sealer.submit(HRTransaction("EMP001", "payroll", {"month": "2024-01"}, datetime.now()))
+    receipt = future.result(timeout=2)
+    # Fewer than max_transactions still seal once the oldest has waited max_wait_ms
+    assert time.monotonic() - started < 1
+    assert receipt["block_index"] == 1
+    assert len(blockchain.chain) == 2
+    sealer.close(timeout=5)
+
+def test_permissioned_mode_rejects_unsigned_blocks_after_migration():
+    from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+    from backend.blockchain.consensus import PermissionedConsensus, ProofOfWorkConsensus
+
+    # Two proof-of-work blocks mined before the switch stay valid
+    blockchain = HRMSBlockchain()
+    _record_payroll(blockchain, "EMP001", "2024-01")
+    blockchain.consensus = PermissionedConsensus(Ed25519PrivateKey.generate(), migration_height=2)
+    _record_payroll(blockchain, "EMP001", "2024-02")
+    assert blockchain.verify_chain(full_audit=True)
+
+    # An unsigned block with a trivial proof of work is a forgery past the migration height
+    blockchain.consensus, permissioned = ProofOfWorkConsensus(difficulty=2), blockchain.consensus
+    _record_payroll(blockchain, "EMP002", "2024-02")
+    blockchain.consensus = permissioned
+    assert not blockchain.verify_chain(full_audit=True)
+
+def test_payroll_run_is_signed_and_verified_in_batches():
+    from cryptography.hazmat.primitives.asymmetric.ed25519 import Ed25519PrivateKey
+    from backend.blockchain.signing import TransactionSigner
+
+    # Low thresholds push the run through the process pool in several chunks
+    signer = TransactionSigner(Ed25519PrivateKey.generate(), workers=2, chunk_size=16, parallel_from=32)
+    blockchain = HRMSBlockchain()
+    contract = HRMSSmartContract(blockchain, signer=signer)
+    contract.record_payroll_batch({f"EMP{i:03d}": {"basic_salary": 3000 + i} for i in range(64)})
+    contract.record_payroll("EMP999", {"basic_salary": 9000})
+    block = blockchain.mine_block()
+
+    assert all("digital_signature" in tx for tx in block["transactions"])
+    assert blockchain.verify_signatures(signer) == []
+    assert blockchain.verify_chain(full_audit=True)
+
+    # A signature from another key is reported at its position
+    other = TransactionSigner(Ed25519PrivateKey.generate())
+    assert len(blockchain.verify_signatures(other)) == 65
+    block["transactions"][3]["digital_signature"] = block["transactions"][4]["digital_signature"]
+    assert blockchain.verify_signatures(signer) == [(1, 3)]
+    signer.close()
+
+def test_payroll_run_is_anchored_once_with_payslip_proofs():
+    blockchain = HRMSBlockchain()
+    contract = HRMSSmartContract(blockchain)
+    payslips = {f"EMP{i:03d}": {"net_salary": 4000 + i, "month": "2024-12"} for i in range(37)}
+    anchored = contract.anchor_payroll_run("RUN-2024-12", "2024-12", payslips)
+    block = blockchain.mine_block()
+
+    # One transaction for the whole run
+    assert len(block["transactions"]) == 1
+    assert block["transactions"][0]["data"]["merkle_root"] == anchored["merkle_root"]
+
+    proof = anchored["proofs"]["EMP007"]
+    assert len(proof["proof"]) <= 6
+    result = contract.verify_payslip(payslips["EMP007"], proof)
+    assert result["verified"] and result["block_index"] == block["index"]
+
+    tampered = dict(payslips["EMP007"], net_salary=9999)
+    assert not contract.verify_payslip(tampered, proof)["verified"]
+    assert not contract.verify_payslip(payslips["EMP008"], proof)["verified"]
+
+    # A self-consistent proof for a run that was never anchored is rejected
+    from backend.blockchain.payroll_anchor import PayrollRunAnchor
+    unanchored = PayrollRunAnchor.build("RUN-2025-01", "2025-01", payslips).payslip_proofs("00" * 32)["EMP007"]
+    assert contract.verify_payslip(payslips["EMP007"], unanchored)["message"] == "Payroll run is not anchored on chain"
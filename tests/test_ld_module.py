@@ -0,0 +1,94 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from backend.modules.ld_module import get_db, router
+
+def _ld_session():
+    from sqlalchemy import Column, Integer, Table, create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+    from backend.modules.ld.models import Base
+
+    if "employees" not in Base.metadata.tables:
+        Table("employees", Base.metadata, Column("id", Integer, primary_key=True))
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    for table in ("employees", "training_courses", "learning_paths"):
+        Base.metadata.tables[table].create(engine)
+    return sessionmaker(bind=engine)()
+
+def _catalogue(session, filler=0):
+    from backend.modules.ld.models import TrainingCourse
+
+    courses = [
+        TrainingCourse(id=1, course_name="Akta Kerja 1955", duration_hours=3, language="BM", category="safety",
+                       is_hrdf_claimable=True, skills="employment act"),
+        TrainingCourse(id=2, course_name="Employment Act and OSHA", duration_hours=4, language="EN", category="safety",
+                       is_hrdf_claimable=True, skills="employment act, workplace safety"),
+        TrainingCourse(id=3, course_name="Leading Diverse Teams", duration_hours=6, language="EN", category="management",
+                       is_hrdf_claimable=True, skills="leadership, cultural sensitivity, communication", roles="manager"),
+        TrainingCourse(id=4, course_name="Difficult Conversations", duration_hours=2, language="EN",
+                       category="management", skills="conflict resolution, communication", roles="manager, supervisor"),
+        TrainingCourse(id=5, course_name="Performance Reviews", duration_hours=3, language="ZH", category="management",
+                       skills="performance management", roles="manager")
+    ]
+    # Unrelated catalogue bulk the index has to skip over
+    courses += [TrainingCourse(id=100 + i, course_name=f"Elective {i}", duration_hours=1 + i % 8,
+                               language=["EN", "BM", "ZH", "TA"][i % 4], category="digital",
+                               skills=f"elective skill {i % 400}, excel" if i % 10 else f"elective skill {i % 400}")
+                for i in range(filler)]
+    session.add_all(courses)
+    session.commit()
+
+def test_index_lookup_and_gap_cover():
+    from backend.modules.ld.recommendations import CourseIndex
+
+    session = _ld_session()
+    _catalogue(session, filler=50)
+    index = CourseIndex.from_session(session)
+    assert index.lookup(skill="Employment  Act") == {1, 2}
+    assert index.lookup(skill="employment act", language="bm") == {1}
+    assert index.lookup(role="manager", category="management") == {3, 4, 5}
+
+    # One EN course covers both mandatory gaps; ZH performance management is the only course for that gap
+    path = index.recommend({"id": 7, "role": "Manager", "language_preference": "EN", "skills": ["Communication"]})
+    assert path["skill_gaps"] == ["employment act", "workplace safety", "leadership", "conflict resolution",
+                                  "performance management", "cultural sensitivity"]
+    assert [c["id"] for c in path["learning_path"]] == [3, 2, 4, 5]
+    assert path["learning_path"][1]["priority"] == "high"
+    assert path["uncovered_gaps"] == []
+
+    # Covering more gaps beats language; between equal covers the preferred language wins
+    assert [c["id"] for c in index.recommend({"language_preference": "BM"})["learning_path"]] == [2]
+    path = index.recommend({"language_preference": "BM", "skills": ["workplace safety"]})
+    assert [c["id"] for c in path["learning_path"]] == [1]
+
+def test_nightly_precompute_serves_keyed_lookups(monkeypatch):
+    import time
+    from backend.modules import ld_module
+
+    monkeypatch.setattr(ld_module, "_course_index", None)
+    session = _ld_session()
+    _catalogue(session, filler=5000)
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: session
+    client = TestClient(app)
+
+    roles = ["general", "manager", "supervisor", "finance"]
+    profiles = [{"id": i, "role": roles[i % 4], "language_preference": "EN",
+                 "skills": ["workplace safety"] if i % 3 == 0 else []} for i in range(1, 2001)]
+    started = time.perf_counter()
+    body = client.post("/api/ld/learning-path/precompute", json={"profiles": profiles, "top_n": 3}).json()
+    assert time.perf_counter() - started < 10
+    assert body == {"employees": 2000, "courses_indexed": 5005}
+
+    started = time.perf_counter()
+    stored = client.get("/api/ld/learning-path/1").json()
+    assert time.perf_counter() - started < 0.1
+    assert [c["id"] for c in stored["learning_path"]] == [3, 2, 4]
+    assert client.post("/api/ld/learning-path/generate", json={"id": 1}).json()["generated_at"] == stored["generated_at"]
+    assert client.get("/api/ld/learning-path/9999").status_code == 404
+
+    # Unknown employees are computed from the cached index on the spot
+    adhoc = client.post("/api/ld/learning-path/generate", json={"role": "finance"}).json()
+    assert "excel" not in adhoc["uncovered_gaps"]
+    assert adhoc["estimated_completion"].endswith("weeks")
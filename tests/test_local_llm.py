@@ -0,0 +1,39 @@
+import json
+from fastapi.testclient import TestClient
+from backend.agents.local_llm import LocalLLMConfig, create_app, generate_tokens
+
+def _client():
+    return TestClient(create_app(LocalLLMConfig(latency_ms=0, tokens_per_second=0, completion_tokens=8)))
+
+def test_completion_is_deterministic():
+    """Same request always yields the same completion"""
+    client = _client()
+    body = {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": "What is my EPF rate?"}]}
+
+    first = client.post("/v1/chat/completions", json=body).json()
+    second = client.post("/v1/chat/completions", json=body).json()
+
+    assert first["choices"][0]["message"]["content"] == second["choices"][0]["message"]["content"]
+    assert first["usage"]["completion_tokens"] == 8
+
+def test_max_tokens_caps_completion():
+    config = LocalLLMConfig(completion_tokens=64)
+    tokens = generate_tokens("gpt-4o-mini", [{"role": "user", "content": "hi"}], 5, config)
+    assert len(tokens) == 5
+
+def test_streaming_matches_non_streaming():
+    """Streamed deltas reassemble into the non-streamed completion"""
+    client = _client()
+    body = {"model": "gpt-4o-mini", "messages": [{"role": "user", "content": "Kira SOCSO"}]}
+
+    full = client.post("/v1/chat/completions", json=body).json()["choices"][0]["message"]["content"]
+
+    streamed = []
+    with client.stream("POST", "/v1/chat/completions", json={**body, "stream": True}) as response:
+        for line in response.iter_lines():
+            if not line.startswith("data: ") or line == "data: [DONE]":
+                continue
+            delta = json.loads(line[len("data: "):])["choices"][0]["delta"]
+            streamed.append(delta.get("content", ""))
+
+    assert "".join(streamed) == full
@@ -0,0 +1,276 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from backend.modules.ta_module import BiasDetector, MalaysianResumeScorer, router
+
+def _client():
+    app = FastAPI()
+    app.include_router(router)
+    return TestClient(app)
+
+def test_compiled_scorer_matches_whole_names():
+    scorer = MalaysianResumeScorer()
+    result = scorer.score_resume({
+        "education": "BSc, Universiti Sains Malaysia (USM); MSc UM",
+        "experience": "Analyst at maybank, then CIMB; back to Maybank",
+        "languages": ["Bahasa Malaysia", "Mandarin"]
+    })
+    # UM is listed before USM, so it sets the education score; Maybank counts once
+    assert result["education_score"] == 6.2
+    assert result["experience_bonus"] == 1.0
+    assert result["overall_score"] == 7.7
+
+    # "um" inside "Summit" and "digi" inside "digital" are not matches
+    plain = scorer.score_resume({"education": "Summit College", "experience": "Digital agency"})
+    assert plain["overall_score"] == 5.0
+
+    # A line-wrapped "Public\nBank" is the same employer as "public bank"
+    wrapped = scorer.score_resume({"experience": "Public\nBank teller, later public  bank manager"})
+    assert wrapped["experience_bonus"] == 0.5
+
+def test_batch_endpoint_ranks_applicant_pool():
+    resumes = [
+        {"candidate_id": f"C{i}", "education": ["INTI", "UM", "UTAR"][i % 3], "experience": "Axiata" if i % 2 else ""}
+        for i in range(3000)
+    ]
+    body = _client().post("/api/ta/resume/score:batch", json={"resumes": resumes, "top_k": 10}).json()
+
+    assert body["total_scored"] == 3000
+    top = body["results"]
+    assert [r["rank"] for r in top] == list(range(1, 11))
+    assert all(r["overall_score"] == top[0]["overall_score"] for r in top)
+    # Ties keep submission order
+    assert [r["index"] for r in top] == sorted(r["index"] for r in top)
+    assert top[0]["candidate_id"] == "C1"
+
+def test_bias_matcher_respects_word_boundaries():
+    detector = BiasDetector()
+    result = detector.detect_bias("Looking for a Young  and energetic sales rep, NON-MUSLIM welcome")
+    assert {(v["category"], v["term"]) for v in result["violations"]} == {
+        ("age", "young and energetic"), ("racial", "non-muslim"), ("religious", "non-muslim")
+    }
+    assert result["compliance_score"] == 40
+
+    # "below 30" must not fire on a salary figure
+    assert not detector.detect_bias("Team size below 300 people")["bias_detected"]
+
+def test_bulk_audit_streams_flagged_postings():
+    import json
+    from fastapi import FastAPI
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+    from backend.modules.ta.models import JobPosting
+    from backend.modules.ta_module import audit_job_postings, get_db
+
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    JobPosting.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    session.add_all([
+        JobPosting(id=i, job_title="Driver" if i % 50 else "Male driver", description="Chinese only" if i == 7 else "Valid licence")
+        for i in range(1, 201)
+    ])
+    session.commit()
+
+    reports = list(audit_job_postings(session, batch_size=16))
+    assert [r["job_posting_id"] for r in reports] == [7, 50, 100, 150, 200]
+    assert reports[0]["violations"][0]["term"] == "chinese only"
+
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: session
+    lines = [json.loads(line) for line in TestClient(app).get("/api/ta/job-posting/bias-audit").text.splitlines()]
+    assert [line.get("job_posting_id") for line in lines[:-1]] == [7, 50, 100, 150, 200]
+    assert lines[-1]["summary"]["flagged_postings"] == 5
+
+def _candidate_session():
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+    from backend.modules.ta.models import Candidate, CandidateDailyRollup, CandidateRollupTotal
+
+    # One shared in-memory database, usable from the test client's worker thread
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    for model in (Candidate, CandidateDailyRollup, CandidateRollupTotal):
+        model.__table__.create(engine)
+    return sessionmaker(bind=engine)()
+
+def test_diversity_rollups_are_incremental_and_match_rebuild():
+    from datetime import datetime
+    from backend.modules.ta.analytics import diversity_report, rebuild_rollups, record_application, record_stage_change
+    from backend.modules.ta.models import Candidate
+
+    session = _candidate_session()
+    ethnicities = ["Malay", "Chinese", "Indian", None]
+    candidates = []
+    for i in range(40):
+        candidate = Candidate(id=i + 1, ethnicity=ethnicities[i % 4], gender="Female" if i % 2 else "Male",
+                              age=22 + i, applied_at=datetime(2024, 12, 1 + i % 3, 9))
+        session.add(candidate)
+        record_application(session, candidate)
+        candidates.append(candidate)
+    # Skipping straight to interviewed also counts as screened
+    for candidate in candidates[:10]:
+        record_stage_change(session, candidate, "interviewed", when=candidate.applied_at)
+    record_stage_change(session, candidates[0], "hired", when=candidates[0].applied_at)
+    record_stage_change(session, candidates[1], "rejected", when=candidates[1].applied_at)
+    session.commit()
+
+    report = diversity_report(session)
+    assert report["total_candidates"] == 40
+    assert report["diversity_breakdown"]["ethnicity"] == {"Malay": 10, "Chinese": 10, "Indian": 10, "Unknown": 10}
+    assert report["diversity_breakdown"]["age_groups"]["20-30"] == 9
+    assert report["hiring_funnel"] == {"applications": 40, "screened": 10, "interviewed": 10, "hired": 1}
+
+    first_day = diversity_report(session, start=datetime(2024, 12, 1).date(), end=datetime(2024, 12, 1).date())
+    assert first_day["total_candidates"] == 14
+
+    # A full GROUP BY rebuild agrees, except the rejected candidate whose progress is no longer visible
+    rebuild_rollups(session)
+    rebuilt = diversity_report(session)
+    assert rebuilt["diversity_breakdown"] == report["diversity_breakdown"]
+    assert rebuilt["hiring_funnel"] == {"applications": 40, "screened": 9, "interviewed": 9, "hired": 1}
+
+def test_stage_endpoint_updates_report():
+    from fastapi import FastAPI
+    from backend.modules.ta.models import Candidate
+    from backend.modules.ta_module import get_db
+
+    session = _candidate_session()
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: session
+    client = TestClient(app)
+
+    created = client.post("/api/ta/candidates", json={"full_name": "Nur Aisyah", "ethnicity": "Malay",
+                                                      "gender": "Female", "age": 28}).json()
+    assert created["status"] == "applied"
+    candidate_id = created["candidate_id"]
+    assert client.post(f"/api/ta/candidates/{candidate_id}/stage", json={"stage": "screened"}).json()["status"] == "screened"
+    assert client.post(f"/api/ta/candidates/{candidate_id}/stage", json={"stage": "onboarded"}).status_code == 422
+    report = client.get("/api/ta/candidates/diversity-report").json()
+    assert report["hiring_funnel"]["screened"] == 1
+    assert report["diversity_breakdown"]["gender"] == {"Female": 1}
+
+    # A candidate stored directly is counted as applied before moving on
+    session.add(Candidate(id=99, ethnicity="Indian", gender="Male", age=35))
+    session.commit()
+    client.post("/api/ta/candidates/99/stage", json={"stage": "screened"})
+    report = client.get("/api/ta/candidates/diversity-report").json()
+    assert report["hiring_funnel"] == {"applications": 2, "screened": 2, "interviewed": 0, "hired": 0}
+    assert report["diversity_breakdown"]["gender"] == {"Female": 1, "Male": 1}
+
+    assert client.post("/api/ta/candidates/diversity-report/rebuild").json()["rebuilt"]
+    assert client.get("/api/ta/candidates/diversity-report").json()["hiring_funnel"] == report["hiring_funnel"]
+
+def test_scheduler_skips_prayer_holidays_and_booked_interviewers():
+    from datetime import datetime
+    from backend.modules.ta.scheduling import InterviewScheduler
+
+    # Thursday 2025-08-28; National Day falls on the Sunday
+    scheduler = InterviewScheduler(datetime(2025, 8, 28, 12, 45))
+    scheduler.add_busy(1, datetime(2025, 8, 28, 13, 50), minutes=90)
+
+    # 12:45 + 60 runs into Zohor (13:10-13:50), then interviewer 1 is busy until 15:20
+    slot = scheduler.schedule([1])
+    assert slot["start"] == datetime(2025, 8, 28, 15, 20)
+    # The next hour would run into Asar at 16:25
+    assert scheduler.schedule([1])["start"] == datetime(2025, 8, 28, 16, 55)
+    # Nothing fits before 18:00; Friday's first slot ends before Jumaat prayers
+    assert scheduler.schedule([1])["start"] == datetime(2025, 8, 29, 9, 0)
+    assert scheduler.schedule([1], earliest=datetime(2025, 8, 29, 11, 30))["start"] == datetime(2025, 8, 29, 14, 45)
+
+    # Another interviewer free earlier takes the candidate
+    assert scheduler.schedule([1, 2])["interviewer_id"] == 2
+
+def test_scheduler_uses_holidays_for_each_year_in_window():
+    from datetime import datetime
+    from backend.modules.ta.scheduling import InterviewScheduler
+
+    # Friday 2026-12-25 is Christmas; the next working day is Monday
+    scheduler = InterviewScheduler(datetime(2026, 12, 25, 8, 0))
+    slot = scheduler.schedule([1])
+    assert slot["start"] == datetime(2026, 12, 28, 9, 0)
+    assert slot["holidays_checked"] and scheduler.unchecked_holiday_years == [2027]
+    # January 2027 slots are offered but not vouched for
+    late = scheduler.schedule([1], earliest=datetime(2027, 1, 4, 9, 0))
+    assert late["start"] == datetime(2027, 1, 4, 9, 0) and not late["holidays_checked"]
+
+def test_bulk_scheduling_books_campus_day_without_clashes():
+    import time
+    from datetime import datetime, timedelta
+    from backend.modules.ta.scheduling import InterviewScheduler
+
+    scheduler = InterviewScheduler(datetime(2025, 9, 1, 9, 0), days=60)
+    requests = [{"interviewer_ids": [i % 8, (i + 1) % 8], "minutes": 30, "zone": "PNG01"} for i in range(2000)]
+    started = time.perf_counter()
+    slots = scheduler.schedule_many(requests)
+    assert (time.perf_counter() - started) / len(requests) < 0.005
+
+    by_interviewer = {}
+    for slot in slots:
+        assert slot["start"].weekday() < 5 and slot["start"].date() != datetime(2025, 9, 16).date()
+        assert 9 <= slot["start"].hour and slot["end"] <= slot["start"].replace(hour=18, minute=0)
+        by_interviewer.setdefault(slot["interviewer_id"], []).append(slot)
+    for booked in by_interviewer.values():
+        booked.sort(key=lambda s: s["start"])
+        assert all(a["end"] <= b["start"] for a, b in zip(booked, booked[1:]))
+    # Malaysia Day (a Tuesday) is skipped entirely
+    assert datetime(2025, 9, 17, 9, 0) in {s["start"] for s in slots}
+    assert not any(s["start"].date() == datetime(2025, 9, 16).date() for s in slots)
+    assert max(s["start"] for s in slots) < datetime(2025, 9, 1) + timedelta(days=60)
+
+def test_schedule_endpoint_avoids_existing_interviews():
+    from datetime import datetime
+    from fastapi import FastAPI
+    from sqlalchemy import Column, Integer, Table, create_engine
+    from sqlalchemy.orm import sessionmaker
+    from sqlalchemy.pool import StaticPool
+    from backend.modules.ta.analytics import diversity_report
+    from backend.modules.ta.models import Base, Candidate, Interview, JobPosting
+    from backend.modules.ta_module import get_db
+
+    if "employees" not in Base.metadata.tables:
+        Table("employees", Base.metadata, Column("id", Integer, primary_key=True))
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    for table in ("employees", "candidates", "job_postings", "interviews",
+                  "candidate_daily_rollups", "candidate_rollup_totals"):
+        Base.metadata.tables[table].create(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(Candidate(id=1, gender="Female", status="screened"))
+    session.add(Interview(interviewer_id=5, interview_date=datetime(2025, 9, 2, 9, 0), status="scheduled"))
+    session.add(Interview(interviewer_id=5, interview_date=datetime(2025, 9, 2, 10, 0), status="cancelled"))
+    session.commit()
+
+    app = FastAPI()
+    app.include_router(router)
+    app.dependency_overrides[get_db] = lambda: session
+    client = TestClient(app)
+
+    body = client.post("/api/ta/interview/schedule", json={
+        "candidate_id": 1, "interviewer_id": 5, "preferred_time": "2025-09-02T09:00:00"
+    }).json()
+    assert body["scheduled_time"] == "2025-09-02T10:00:00"
+    assert body["cultural_considerations"]["prayer_zone"] == "WLY01"
+    # Booking an interview moves the candidate along the funnel
+    assert session.get(Candidate, 1).status == "interviewed"
+    assert diversity_report(session)["hiring_funnel"]["interviewed"] == 1
+
+    batch = client.post("/api/ta/interview/schedule:batch", json={"zone": "JHR02", "candidates": [
+        {"candidate_id": c, "interviewer_ids": [5], "preferred_time": "2025-09-02T11:30:00"} for c in (2, 3)
+    ]}).json()
+    assert batch["scheduled"] == 2
+    assert [r["scheduled_time"] for r in batch["results"]] == ["2025-09-02T11:30:00", "2025-09-02T13:40:00"]
+    # Johor Bahru Zohor ends at 13:40; Kuala Lumpur would have been 13:50
+    assert session.query(Interview).filter(Interview.status == "scheduled").count() == 4
+    assert batch["results"][0]["cultural_considerations"]["public_holidays_checked"] is True
+
+    # A stored two-hour interview blocks its full length, not the default hour
+    client.post("/api/ta/interview/schedule", json={
+        "candidate_id": 4, "interviewer_id": 6, "preferred_time": "2025-09-03T09:00:00", "duration_minutes": 120
+    })
+    assert session.query(Interview).filter(Interview.candidate_id == 4).one().duration_minutes == 120
+    body = client.post("/api/ta/interview/schedule", json={
+        "candidate_id": 5, "interviewer_id": 6, "preferred_time": "2025-09-03T09:00:00"
+    }).json()
+    assert body["scheduled_time"] == "2025-09-03T11:00:00"
+    assert client.post("/api/ta/interview/schedule", json={"zone": "XXX99", "interviewer_id": 5}).status_code == 422